@@ -1,59 +1,82 @@
-from crewai import Agent
-from langchain.tools import Tool
 from typing import Dict, List
+from models.listing import (
+    AggregatedProduct, AnalysisMetadata, CompetitionAnalysis, MarketAnalysis,
+    PriceRange, ProductInformation, TechnicalDetails
+)
+from services.confidence_scoring import get_confidence_scorer, main_detection
+from utils.lazy import agent_class
+import asyncio
 import json
 
-class DataAggregationAgent(Agent):
+class DataAggregationEngine:
     def __init__(self):
-        super().__init__(
-            tools=[
-                Tool(
-                    name="aggregate_data",
-                    func=self.aggregate_data,
-                    description="Agrège et structure les données d'analyse"
-                )
-            ]
-        )
+        self.confidence_scorer = get_confidence_scorer()
     
-    async def aggregate_data(self, vision_data: Dict, lens_data: Dict) -> Dict:
+    async def aggregate_data(self, vision_data: Dict, lens_data: Dict,
+                             confidence_score: float = None) -> AggregatedProduct:
         """Agrège les données des différentes sources d'analyse"""
+        if confidence_score is None:
+            confidence_score = self._calculate_confidence_score(vision_data, lens_data)
         
-        aggregated_data = {
-            'product_information': self._compile_product_info(vision_data, lens_data),
-            'market_analysis': self._compile_market_analysis(lens_data),
-            'technical_details': self._compile_technical_details(vision_data, lens_data),
-            'metadata': self._generate_metadata()
-        }
+        aggregated_data = AggregatedProduct(
+            product_information=self._compile_product_info(vision_data, lens_data),
+            market_analysis=self._compile_market_analysis(lens_data),
+            technical_details=self._compile_technical_details(vision_data, lens_data),
+            metadata=self._generate_metadata(confidence_score)
+        )
         
         return aggregated_data
     
-    def _compile_product_info(self, vision_data: Dict, lens_data: Dict) -> Dict:
-        """Compile les informations principales du produit"""
+    async def aggregate_objects(self, vision_data: Dict, lens_data_per_object: List[Dict]) -> List[AggregatedProduct]:
+        """Agrège chaque objet détecté comme un produit distinct, en parallèle"""
+        # Scores déjà calculés par la recherche Lens, sinon en un seul lot vectorisé
+        confidence_scores = [lens_data.get('confidence_score') for lens_data in lens_data_per_object]
+        if None in confidence_scores:
+            confidence_scores = self.confidence_scorer.score_many(
+                [lens_data['detection'] for lens_data in lens_data_per_object],
+                [lens_data.get('lens_analysis') for lens_data in lens_data_per_object],
+                vision_data.get('image_shape')
+            )
+        return await asyncio.gather(*(
+            self.aggregate_data(self._object_vision_data(vision_data, lens_data['detection']), lens_data, score)
+            for lens_data, score in zip(lens_data_per_object, confidence_scores)
+        ))
+    
+    def _object_vision_data(self, vision_data: Dict, detection: Dict) -> Dict:
+        """Restreint les données de vision à un seul objet détecté"""
         return {
-            'main_category': vision_data.get('main_subject'),
-            'detected_objects': vision_data.get('objects', []),
-            'visual_matches': lens_data.get('lens_analysis', {}).get('visual_matches', []),
-            'product_name': self._determine_product_name(vision_data, lens_data),
-            'condition': self._assess_condition(vision_data)
+            **vision_data,
+            'objects': [detection],
+            'main_subject': detection['class']
         }
     
-    def _compile_market_analysis(self, lens_data: Dict) -> Dict:
+    def _compile_product_info(self, vision_data: Dict, lens_data: Dict) -> ProductInformation:
+        """Compile les informations principales du produit"""
+        return ProductInformation(
+            main_category=vision_data.get('main_subject'),
+            detected_objects=vision_data.get('objects', []),
+            visual_matches=lens_data.get('lens_analysis', {}).get('visual_matches', []),
+            product_name=self._determine_product_name(vision_data, lens_data),
+            condition=self._assess_condition(vision_data)
+        )
+    
+    def _compile_market_analysis(self, lens_data: Dict) -> MarketAnalysis:
         """Compile l'analyse de marché"""
         market_insights = lens_data.get('market_insights', {})
-        return {
-            'price_range': market_insights.get('estimated_price_range'),
-            'similar_products': market_insights.get('similar_products', []),
-            'market_categories': market_insights.get('market_categories', []),
-            'competition_analysis': self._analyze_competition(lens_data)
-        }
+        return MarketAnalysis(
+            price_range=PriceRange.from_dict(market_insights.get('estimated_price_range')),
+            similar_products=market_insights.get('similar_products', []),
+            market_categories=market_insights.get('market_categories', []),
+            competition_analysis=self._analyze_competition(lens_data)
+        )
     
-    def _compile_technical_details(self, vision_data: Dict, lens_data: Dict) -> Dict:
+    def _compile_technical_details(self, vision_data: Dict, lens_data: Dict) -> TechnicalDetails:
         """Compile les détails techniques"""
-        return {
-            'specifications': self._extract_specifications(lens_data),
-            'dimensions': self._extract_dimensions(vision_data),
-            'features': self._extract_features(lens_data)
-        }
+        return TechnicalDetails(
+            specifications=self._extract_specifications(lens_data),
+            dimensions=self._extract_dimensions(vision_data),
+            features=self._extract_features(lens_data)
+        )
     
     def _determine_product_name(self, vision_data: Dict, lens_data: Dict) -> str:
         """Détermine le nom le plus approprié pour le produit"""
@@ -62,17 +85,23 @@ class DataAggregationAgent(Agent):
             return lens_matches[0].get('title', vision_data.get('main_subject', ''))
         return vision_data.get('main_subject', '')
     
+    def _main_object(self, vision_data: Dict) -> Dict:
+        """Détection la plus confiante du sujet principal"""
+        return main_detection(vision_data) or {}
+    
     def _assess_condition(self, vision_data: Dict) -> str:
         """Évalue l'état du produit basé sur l'analyse visuelle"""
-        # Logique d'évaluation à implémenter
-        return "Bon état"  # Par défaut
+        # Estimation d'usure calculée sur la détection (services.condition_estimator) ;
+        # photo trop floue ou objet non estimé : état par défaut
+        estimate = self._main_object(vision_data).get('condition_estimate') or {}
+        return estimate.get('label') or "Bon état"
     
-    def _analyze_competition(self, lens_data: Dict) -> Dict:
+    def _analyze_competition(self, lens_data: Dict) -> CompetitionAnalysis:
         """Analyse la concurrence basée sur les données de marché"""
-        return {
-            'market_saturation': 'medium',  # À implémenter
-            'price_competitiveness': 'competitive'  # À implémenter
-        }
+        return CompetitionAnalysis(
+            market_saturation='medium',  # À implémenter
+            price_competitiveness='competitive'  # À implémenter
+        )
     
     def _extract_specifications(self, lens_data: Dict) -> List[str]:
         """Extrait les spécifications techniques"""
@@ -84,8 +113,8 @@ class DataAggregationAgent(Agent):
     
     def _extract_dimensions(self, vision_data: Dict) -> Dict:
         """Extrait les dimensions si disponibles"""
-        # À implémenter avec une logique plus sophistiquée
-        return {}
+        # Dimensions relatives, ou en cm si un objet étalon était visible
+        return dict(self._main_object(vision_data).get('dimensions') or {})
     
     def _extract_features(self, lens_data: Dict) -> List[str]:
         """Extrait les caractéristiques principales"""
@@ -95,20 +124,42 @@ class DataAggregationAgent(Agent):
                 features.update(match['features'])
         return list(features)
     
-    def _generate_metadata(self) -> Dict:
+    def _generate_metadata(self, confidence_score: float) -> AnalysisMetadata:
         """Génère les métadonnées de l'analyse"""
-        return {
-            'analysis_version': '1.0',
-            'confidence_score': self._calculate_confidence_score(),
-            'timestamp': self._get_timestamp()
-        }
+        return AnalysisMetadata(
+            analysis_version='1.0',
+            confidence_score=confidence_score,
+            timestamp=self._get_timestamp()
+        )
     
-    def _calculate_confidence_score(self) -> float:
+    def _calculate_confidence_score(self, vision_data: Dict, lens_data: Dict) -> float:
         """Calcule un score de confiance pour l'analyse"""
-        # À implémenter avec une logique plus sophistiquée
-        return 0.85
+        # Confiance YOLO, taille de l'objet, accord des matches Lens, dispersion des prix
+        return self.confidence_scorer.score(main_detection(vision_data), lens_data.get('lens_analysis'),
+                                            vision_data.get('image_shape'))
     
     def _get_timestamp(self) -> str:
         """Retourne le timestamp actuel"""
         from datetime import datetime
         return datetime.utcnow().isoformat()
+
+
+# Outils de l'agent crewai : (nom, attribut du moteur, description)
+AGENT_TOOLS = (
+    ("aggregate_data", "aggregate_data", "Agrège et structure les données d'analyse"),
+)
+
+# Profil crewai de l'agent : (rôle, objectif, histoire)
+AGENT_PROFILE = (
+    "Data Aggregator",
+    "Agréger et structurer les informations collectées",
+    "Expert en synthèse et organisation de données",
+)
+
+
+def __getattr__(name):
+    # PEP 562 : la sous-classe crewai n'est construite, et crewai importé,
+    # qu'au premier accès à DataAggregationAgent
+    if name == 'DataAggregationAgent':
+        return agent_class(name, DataAggregationEngine, AGENT_TOOLS, AGENT_PROFILE)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
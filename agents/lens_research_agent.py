@@ -1,40 +1,68 @@
-from crewai import Agent
-from langchain.tools import Tool
 from services.image_analyzer import ImageAnalyzer
+from services.pricing import extract_prices, summarize_prices
+from services.confidence_scoring import get_confidence_scorer, main_detection
+from utils.lazy import agent_class
+import asyncio
 
-class LensResearchAgent(Agent):
-    def __init__(self):
-        self.image_analyzer = ImageAnalyzer()
+class LensResearchEngine:
+    def __init__(self, image_analyzer: ImageAnalyzer = None):
+        # Service injecté par le conteneur : caches et sémaphores partagés
+        self.image_analyzer = image_analyzer or ImageAnalyzer()
         
-        super().__init__(
-            tools=[
-                Tool(
-                    name="analyze_with_lens",
-                    func=self.image_analyzer.analyze_with_lens,
-                    description="Analyser une image avec Google Lens"
-                ),
-                Tool(
-                    name="search_additional_info",
-                    func=self.image_analyzer.search_additional_info,
-                    description="Rechercher des informations supplémentaires"
-                )
-            ]
-        )
+        self.confidence_scorer = get_confidence_scorer()
     
     async def research_image(self, image_url, context):
         # Analyser avec Google Lens
         lens_results = await self.image_analyzer.analyze_with_lens(image_url)
         
-        # Rechercher des informations supplémentaires
-        search_query = self._build_search_query(context, lens_results)
-        additional_info = await self.image_analyzer.search_additional_info(search_query)
+        confidence_score = self.confidence_scorer.score(
+            main_detection(context), lens_results, context.get('image_shape'))
+        additional_info = await self._enrich(confidence_score, context, lens_results)
         
         return {
             'lens_analysis': lens_results,
             'additional_info': additional_info,
+            'confidence_score': confidence_score,
             'market_insights': self._extract_market_insights(lens_results)
         }
     
+    async def research_crops(self, crops, upload_crop, image_shape=None, enrich: bool = True):
+        """Une recherche Lens par objet découpé ; recherche complémentaire pour les
+        seuls objets dont le score de confiance reste sous le seuil (si `enrich`)"""
+        crop_results = await self.image_analyzer.analyze_crops_with_lens(crops, upload_crop)
+        
+        # Scores calculés en un seul lot vectorisé
+        confidence_scores = self.confidence_scorer.score_many(
+            [result['detection'] for result in crop_results],
+            [result['lens_analysis'] for result in crop_results],
+            image_shape
+        )
+        additional_info = [None] * len(crop_results)
+        if enrich:
+            additional_info = await asyncio.gather(*(
+                self._enrich(score, {'main_subject': result['detection']['class']}, result['lens_analysis'])
+                for result, score in zip(crop_results, confidence_scores)
+            ))
+        
+        return [
+            {
+                'detection': result['detection'],
+                'lens_analysis': result['lens_analysis'],
+                'additional_info': info,
+                'confidence_score': score,
+                'market_insights': self._extract_market_insights(result['lens_analysis'])
+            }
+            for result, score, info in zip(crop_results, confidence_scores, additional_info)
+        ]
+    
+    async def _enrich(self, confidence_score, context, lens_results):
+        # Rechercher des informations supplémentaires, seulement si l'analyse
+        # n'est pas déjà assez sûre (économise les appels DuckDuckGo / Shopping)
+        if not self.confidence_scorer.should_enrich(confidence_score):
+            return None
+        search_query = self._build_search_query(context, lens_results)
+        return await self.image_analyzer.search_additional_info(search_query)
+    
     def _build_search_query(self, context, lens_results):
         # Construire une requête de recherche pertinente
         main_subject = context.get('main_subject', '')
@@ -57,21 +85,7 @@ class LensResearchAgent(Agent):
     
     def _analyze_price_range(self, results):
         # Analyser la fourchette de prix à partir des résultats
-        prices = []
-        for match in results.get('visual_matches', []):
-            if 'price' in match:
-                try:
-                    prices.append(float(match['price'].replace('$', '')))
-                except:
-                    continue
-        
-        if prices:
-            return {
-                'min': min(prices),
-                'max': max(prices),
-                'average': sum(prices) / len(prices)
-            }
-        return None
+        return summarize_prices(extract_prices(results.get('visual_matches', [])))
     
     def _extract_similar_products(self, results):
         return [match.get('title') for match in results.get('visual_matches', [])[:5]]
@@ -82,3 +96,25 @@ class LensResearchAgent(Agent):
             if 'category' in match:
                 categories.add(match['category'])
         return list(categories)
+
+
+# Outils de l'agent crewai : (nom, attribut du moteur, description)
+AGENT_TOOLS = (
+    ("analyze_with_lens", "image_analyzer.analyze_with_lens", "Analyser une image avec Google Lens"),
+    ("search_additional_info", "image_analyzer.search_additional_info", "Rechercher des informations supplémentaires"),
+)
+
+# Profil crewai de l'agent : (rôle, objectif, histoire)
+AGENT_PROFILE = (
+    "Lens Researcher",
+    "Rechercher des informations détaillées via Google Lens",
+    "Spécialiste en recherche visuelle et analyse de produits",
+)
+
+
+def __getattr__(name):
+    # PEP 562 : la sous-classe crewai n'est construite, et crewai importé,
+    # qu'au premier accès à LensResearchAgent
+    if name == 'LensResearchAgent':
+        return agent_class(name, LensResearchEngine, AGENT_TOOLS, AGENT_PROFILE)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,56 +1,32 @@
-from crewai import Agent
-from langchain.tools import Tool
 from typing import Dict, List
+from models.listing import Listing
+from services.platform_rules import PlatformRules, get_platform_rules
+from services.tag_ranking import get_tag_ranker, listing_text
+from utils.lazy import agent_class
 
-class PlatformOptimizerAgent(Agent):
+class PlatformOptimizerEngine:
     def __init__(self):
-        super().__init__(
-            tools=[
-                Tool(
-                    name="optimize_for_platform",
-                    func=self.optimize_for_platform,
-                    description="Optimise une annonce pour une plateforme spécifique"
-                )
-            ]
-        )
-        
-        self.platform_constraints = {
-            'facebook': {
-                'title_length': 100,
-                'description_length': 5000,
-                'tags_count': 30
-            },
-            'instagram': {
-                'title_length': 80,
-                'description_length': 2200,
-                'tags_count': 30
-            },
-            'leboncoin': {
-                'title_length': 70,
-                'description_length': 4000,
-                'tags_count': 15
-            }
-        }
+        # Règles chargées une seule fois depuis config/platforms.json
+        self.platform_rules = get_platform_rules()
+        self.tag_ranker = get_tag_ranker()
     
-    async def optimize_for_platform(self, listing: Dict, platform: str) -> Dict:
+    async def optimize_for_platform(self, listing: Listing, platform: str) -> Listing:
         """Optimise une annonce pour une plateforme spécifique"""
+        listing = Listing.coerce(listing)
         
-        constraints = self.platform_constraints.get(platform.lower(), {})
-        if not constraints:
+        rules = self.platform_rules.get(platform)
+        if rules is None:
             return listing  # Retourner l'annonce non modifiée si la plateforme n'est pas reconnue
         
-        optimized_listing = {
-            'title': self._optimize_title(listing['title'], constraints['title_length']),
-            'description': self._optimize_description(listing['description'], 
-                                                   constraints['description_length'],
-                                                   platform),
-            'highlights': self._optimize_highlights(listing['highlights'], platform),
-            'tags': self._optimize_tags(listing['tags'], 
-                                      constraints['tags_count'],
-                                      platform),
-            'call_to_action': self._optimize_cta(listing['call_to_action'], platform),
-            'platform_specific': self._add_platform_specific(listing, platform)
-        }
+        optimized_listing = Listing(
+            title=self._optimize_title(listing.title, rules.title_length),
+            description=self._optimize_description(listing.description, rules),
+            highlights=self._optimize_highlights(listing.highlights, rules),
+            tags=self._optimize_tags(listing.tags, listing, rules),
+            call_to_action=self._optimize_cta(listing.call_to_action, rules),
+            condition=listing.condition,
+            platform_specific=self._add_platform_specific(listing, rules)
+        )
         
         return optimized_listing
     
@@ -73,12 +49,13 @@ class PlatformOptimizerAgent(Agent):
         
         return " ".join(optimized)
     
-    def _optimize_description(self, description: str, max_length: int, platform: str) -> str:
+    def _optimize_description(self, description: str, rules: PlatformRules) -> str:
         """Optimise la description pour la plateforme"""
-        if platform.lower() == 'instagram':
-            # Ajouter des emojis stratégiques pour Instagram
+        if rules.emojis:
+            # Ajouter des emojis stratégiques (Instagram)
             description = self._add_emojis(description)
         
+        max_length = rules.description_length
         if len(description) <= max_length:
             return description
         
@@ -96,61 +73,43 @@ class PlatformOptimizerAgent(Agent):
         
         return "\n\n".join(optimized)
     
-    def _optimize_highlights(self, highlights: List[str], platform: str) -> List[str]:
+    def _optimize_highlights(self, highlights: List[str], rules: PlatformRules) -> List[str]:
         """Optimise les points forts pour la plateforme"""
-        if platform.lower() == 'instagram':
+        if rules.highlight_prefix:
             # Ajouter des emojis aux points forts
-            return [f"✨ {highlight}" for highlight in highlights]
+            return [f"{rules.highlight_prefix}{highlight}" for highlight in highlights]
         return highlights
     
-    def _optimize_tags(self, tags: List[str], max_count: int, platform: str) -> List[str]:
+    def _optimize_tags(self, tags: List[str], listing: Listing, rules: PlatformRules) -> List[str]:
         """Optimise les tags pour la plateforme"""
-        if platform.lower() == 'instagram':
-            # Formatter pour Instagram
-            tags = [f"#{tag.replace(' ', '')}" for tag in tags]
+        # Trier par pertinence (BM25 sur le catalogue) et limiter le nombre
+        tags = self.tag_ranker.rank_tags(tags, listing_text(listing), rules.tags_count)
         
-        # Trier par pertinence et limiter le nombre
-        return sorted(tags, key=len)[:max_count]
+        if rules.hashtags:
+            # Formatter en hashtags (Instagram)
+            tags = [f"#{tag.replace(' ', '')}" for tag in tags]
+        return tags
     
-    def _optimize_cta(self, cta: str, platform: str) -> str:
+    def _optimize_cta(self, cta: str, rules: PlatformRules) -> str:
         """Optimise l'appel à l'action pour la plateforme"""
-        platform_ctas = {
-            'facebook': "👉 Cliquez pour plus d'infos !",
-            'instagram': "DM pour plus d'infos 📩",
-            'leboncoin': "Contactez-moi pour plus d'informations"
-        }
-        
-        return platform_ctas.get(platform.lower(), cta)
+        return rules.cta or cta
     
-    def _add_platform_specific(self, listing: Dict, platform: str) -> Dict:
+    def _add_platform_specific(self, listing: Listing, rules: PlatformRules) -> Dict:
         """Ajoute des éléments spécifiques à la plateforme"""
-        if platform.lower() == 'instagram':
-            return {
-                'hashtag_groups': self._create_hashtag_groups(listing['tags']),
-                'story_format': self._create_story_format(listing)
-            }
-        elif platform.lower() == 'facebook':
-            return {
-                'marketplace_category': self._determine_marketplace_category(listing),
-                'condition_category': self._determine_condition_category(listing)
-            }
-        return {}
+        specific = {}
+        if rules.hashtags:
+            specific['hashtag_groups'] = self._create_hashtag_groups(listing.tags)
+        if rules.story:
+            specific['story_format'] = self._create_story_format(listing)
+        if rules.marketplace_category:
+            specific['marketplace_category'] = self._determine_marketplace_category(listing, rules)
+        if rules.condition_map:
+            specific['condition_category'] = self._determine_condition_category(listing, rules)
+        return specific
     
     def _add_emojis(self, text: str) -> str:
-        """Ajoute des emojis stratégiques au texte"""
-        emoji_mapping = {
-            'prix': '💰',
-            'qualité': '✨',
-            'nouveau': '🆕',
-            'contact': '📱',
-            'livraison': '🚚'
-        }
-        
-        for keyword, emoji in emoji_mapping.items():
-            if keyword in text.lower():
-                text = text.replace(keyword, f"{emoji} {keyword}")
-        
-        return text
+        """Ajoute des emojis stratégiques au texte (passe unique et idempotente)"""
+        return self.platform_rules.add_emojis(text)
     
     def _create_hashtag_groups(self, tags: List[str]) -> List[str]:
         """Crée des groupes de hashtags optimisés pour Instagram"""
@@ -173,33 +132,46 @@ class PlatformOptimizerAgent(Agent):
         
         return groups
     
-    def _create_story_format(self, listing: Dict) -> Dict:
+    def _create_story_format(self, listing: Listing) -> Dict:
         """Crée un format optimisé pour les stories Instagram"""
         return {
-            'headline': self._optimize_title(listing['title'], 40),
+            'headline': self._optimize_title(listing.title, 40),
             'price_display': self._format_price_for_story(listing),
-            'key_features': listing['highlights'][:3],
+            'key_features': listing.highlights[:3],
             'story_cta': "Swipe Up ⬆️"
         }
     
-    def _determine_marketplace_category(self, listing: Dict) -> str:
+    def _determine_marketplace_category(self, listing: Listing, rules: PlatformRules) -> str:
         """Détermine la catégorie Marketplace appropriée"""
         # Logique de détermination de catégorie à implémenter
-        return "Autre"
+        return rules.marketplace_category
     
-    def _determine_condition_category(self, listing: Dict) -> str:
-        """Détermine la catégorie d'état pour Marketplace"""
-        condition_mapping = {
-            'Neuf': 'NEW',
-            'Très bon état': 'LIKE_NEW',
-            'Bon état': 'GOOD',
-            'État satisfaisant': 'FAIR',
-            'Pour pièces': 'POOR'
-        }
-        
-        return condition_mapping.get(listing.get('condition', ''), 'GOOD')
+    def _determine_condition_category(self, listing: Listing, rules: PlatformRules) -> str:
+        """Détermine la catégorie d'état de la plateforme"""
+        return rules.condition_category(listing.condition)
     
-    def _format_price_for_story(self, listing: Dict) -> str:
+    def _format_price_for_story(self, listing: Listing) -> str:
         """Formate le prix pour l'affichage en story"""
         # Logique de formatage de prix à implémenter
         return "Prix sur demande"
+
+
+# Outils de l'agent crewai : (nom, attribut du moteur, description)
+AGENT_TOOLS = (
+    ("optimize_for_platform", "optimize_for_platform", "Optimise une annonce pour une plateforme spécifique"),
+)
+
+# Profil crewai de l'agent : (rôle, objectif, histoire)
+AGENT_PROFILE = (
+    "Platform Optimizer",
+    "Optimiser le contenu pour chaque plateforme sociale",
+    "Spécialiste en marketing digital multi-plateformes",
+)
+
+
+def __getattr__(name):
+    # PEP 562 : la sous-classe crewai n'est construite, et crewai importé,
+    # qu'au premier accès à PlatformOptimizerAgent
+    if name == 'PlatformOptimizerAgent':
+        return agent_class(name, PlatformOptimizerEngine, AGENT_TOOLS, AGENT_PROFILE)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,13 @@
-from crewai import Agent
-from langchain.tools import Tool
 from typing import Dict, List
+from dataclasses import replace
+from models.listing import Listing
+from services.platform_rules import get_platform_rules
+from services.tag_ranking import get_tag_ranker
+from utils.lazy import agent_class
 import re
 
-class QualityControlAgent(Agent):
+class QualityControlEngine:
     def __init__(self):
-        super().__init__(
-            tools=[
-                Tool(
-                    name="verify_listing",
-                    func=self.verify_listing,
-                    description="Vérifie et améliore la qualité d'une annonce"
-                )
-            ]
-        )
-        
         self.quality_checks = {
             'spelling': self._check_spelling,
             'grammar': self._check_grammar,
@@ -23,9 +16,13 @@ class QualityControlAgent(Agent):
             'seo': self._check_seo,
             'compliance': self._check_compliance
         }
+        
+        self.platform_rules = get_platform_rules()
+        self.tag_ranker = get_tag_ranker()
     
-    async def verify_listing(self, listing: Dict, platform: str) -> Dict:
+    async def verify_listing(self, listing: Listing, platform: str) -> Dict:
         """Vérifie et améliore la qualité d'une annonce"""
+        listing = Listing.coerce(listing)
         
         # Effectuer tous les contrôles de qualité
         quality_report = self._run_quality_checks(listing, platform)
@@ -39,7 +36,7 @@ class QualityControlAgent(Agent):
             'quality_report': quality_report
         }
     
-    def _run_quality_checks(self, listing: Dict, platform: str) -> Dict:
+    def _run_quality_checks(self, listing: Listing, platform: str) -> Dict:
         """Exécute tous les contrôles de qualité"""
         checks = []
         overall_score = 0
@@ -60,7 +57,7 @@ class QualityControlAgent(Agent):
             'platform': platform
         }
     
-    def _check_spelling(self, listing: Dict, platform: str) -> Dict:
+    def _check_spelling(self, listing: Listing, platform: str) -> Dict:
         """Vérifie l'orthographe"""
         issues = []
         
@@ -71,7 +68,7 @@ class QualityControlAgent(Agent):
             'developp': 'développ'
         }
         
-        for text in [listing['title'], listing['description']]:
+        for text in [listing.title, listing.description]:
             for mistake, correction in common_mistakes.items():
                 if mistake in text.lower():
                     issues.append(f"Correction suggérée: {mistake} -> {correction}")
@@ -83,7 +80,7 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _check_grammar(self, listing: Dict, platform: str) -> Dict:
+    def _check_grammar(self, listing: Listing, platform: str) -> Dict:
         """Vérifie la grammaire"""
         issues = []
         
@@ -94,7 +91,7 @@ class QualityControlAgent(Agent):
             (r'ces bon', "c'est bon")
         ]
         
-        for text in [listing['title'], listing['description']]:
+        for text in [listing.title, listing.description]:
             for pattern, correction in grammar_patterns:
                 if re.search(pattern, text.lower()):
                     issues.append(f"Correction suggérée: {pattern} -> {correction}")
@@ -106,17 +103,17 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _check_completeness(self, listing: Dict, platform: str) -> Dict:
+    def _check_completeness(self, listing: Listing, platform: str) -> Dict:
         """Vérifie que l'annonce est complète"""
         issues = []
         required_fields = ['title', 'description', 'highlights', 'tags']
         
         for field in required_fields:
-            if field not in listing or not listing[field]:
+            if not getattr(listing, field):
                 issues.append(f"Champ manquant ou vide: {field}")
         
         # Vérifier la longueur minimale de la description
-        if len(listing['description']) < 100:
+        if len(listing.description) < 100:
             issues.append("Description trop courte (min. 100 caractères)")
         
         score = 1.0 if not issues else 0.7
@@ -126,21 +123,21 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _check_consistency(self, listing: Dict, platform: str) -> Dict:
+    def _check_consistency(self, listing: Listing, platform: str) -> Dict:
         """Vérifie la cohérence des informations"""
         issues = []
         
         # Vérifier la cohérence entre le titre et la description
-        title_keywords = set(listing['title'].lower().split())
-        desc_keywords = set(listing['description'].lower().split())
+        title_keywords = set(listing.title.lower().split())
+        desc_keywords = set(listing.description.lower().split())
         
         if not title_keywords.intersection(desc_keywords):
             issues.append("Le titre et la description semblent déconnectés")
         
         # Vérifier la cohérence des tags
-        for tag in listing['tags']:
-            if not (tag.lower() in listing['title'].lower() or 
-                   tag.lower() in listing['description'].lower()):
+        for tag in listing.tags:
+            if not (tag.lower() in listing.title.lower() or 
+                   tag.lower() in listing.description.lower()):
                 issues.append(f"Tag non pertinent: {tag}")
         
         score = 1.0 if not issues else 0.9
@@ -150,23 +147,21 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _check_seo(self, listing: Dict, platform: str) -> Dict:
+    def _check_seo(self, listing: Listing, platform: str) -> Dict:
         """Vérifie l'optimisation SEO"""
         issues = []
         
-        # Vérifier la présence de mots-clés importants
-        if 'tags' in listing:
-            main_keywords = set(listing['tags'])
-            title_words = set(listing['title'].lower().split())
-            desc_words = set(listing['description'].lower().split())
-            
-            missing_keywords = main_keywords - (title_words | desc_words)
+        # Vérifier la présence de mots-clés importants (tous les termes du tag,
+        # ponctuation ignorée)
+        if listing.tags:
+            missing_keywords = set(self.tag_ranker.missing_keywords(
+                listing.tags, f"{listing.title}\n{listing.description}"))
             if missing_keywords:
                 issues.append(f"Mots-clés manquants dans le contenu: {missing_keywords}")
         
         # Vérifier la densité des mots-clés
-        if 'description' in listing:
-            word_count = len(listing['description'].split())
+        if listing.description:
+            word_count = len(listing.description.split())
             if word_count < 50:
                 issues.append("Contenu trop court pour une bonne optimisation SEO")
         
@@ -177,38 +172,21 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _check_compliance(self, listing: Dict, platform: str) -> Dict:
+    def _check_compliance(self, listing: Listing, platform: str) -> Dict:
         """Vérifie la conformité aux règles de la plateforme"""
         issues = []
         
-        # Vérifier les restrictions spécifiques à la plateforme
-        platform_restrictions = {
-            'facebook': {
-                'title_length': 100,
-                'forbidden_words': ['gratuit', 'urgent']
-            },
-            'instagram': {
-                'title_length': 80,
-                'max_tags': 30
-            },
-            'leboncoin': {
-                'title_length': 70,
-                'max_description': 4000
-            }
-        }
-        
-        if platform.lower() in platform_restrictions:
-            restrictions = platform_restrictions[platform.lower()]
-            
+        # Vérifier les restrictions spécifiques à la plateforme (règles partagées
+        # avec l'optimiseur, config/platforms.json)
+        rules = self.platform_rules.get(platform)
+        if rules is not None:
             # Vérifier la longueur du titre
-            if len(listing['title']) > restrictions['title_length']:
+            if len(listing.title) > rules.title_length:
                 issues.append(f"Titre trop long pour {platform}")
             
             # Vérifier les mots interdits
-            if 'forbidden_words' in restrictions:
-                for word in restrictions['forbidden_words']:
-                    if word in listing['title'].lower() or word in listing['description'].lower():
-                        issues.append(f"Mot interdit détecté: {word}")
+            for word in rules.find_forbidden(listing.title, listing.description):
+                issues.append(f"Mot interdit détecté: {word}")
         
         score = 1.0 if not issues else 0.7
         return {
@@ -217,9 +195,9 @@ class QualityControlAgent(Agent):
             'issues': issues
         }
     
-    def _improve_listing(self, listing: Dict, quality_report: Dict) -> Dict:
+    def _improve_listing(self, listing: Listing, quality_report: Dict) -> Listing:
         """Améliore l'annonce en fonction du rapport de qualité"""
-        improved_listing = listing.copy()
+        improved_listing = replace(listing)
         
         for check in quality_report['checks']:
             if not check['passed']:
@@ -234,9 +212,9 @@ class QualityControlAgent(Agent):
         
         return improved_listing
     
-    def _fix_spelling(self, listing: Dict, issues: List[str]) -> Dict:
+    def _fix_spelling(self, listing: Listing, issues: List[str]) -> Listing:
         """Corrige les erreurs d'orthographe"""
-        improved = listing.copy()
+        improved = replace(listing)
         
         for issue in issues:
             if '->' in issue:
@@ -244,14 +222,14 @@ class QualityControlAgent(Agent):
                 mistake = mistake.strip().split(':')[-1].strip()
                 correction = correction.strip()
                 
-                improved['title'] = improved['title'].replace(mistake, correction)
-                improved['description'] = improved['description'].replace(mistake, correction)
+                improved.title = improved.title.replace(mistake, correction)
+                improved.description = improved.description.replace(mistake, correction)
         
         return improved
     
-    def _fix_grammar(self, listing: Dict, issues: List[str]) -> Dict:
+    def _fix_grammar(self, listing: Listing, issues: List[str]) -> Listing:
         """Corrige les erreurs grammaticales"""
-        improved = listing.copy()
+        improved = replace(listing)
         
         for issue in issues:
             if '->' in issue:
@@ -259,48 +237,48 @@ class QualityControlAgent(Agent):
                 mistake = mistake.strip().split(':')[-1].strip()
                 correction = correction.strip()
                 
-                improved['title'] = improved['title'].replace(mistake, correction)
-                improved['description'] = improved['description'].replace(mistake, correction)
+                improved.title = improved.title.replace(mistake, correction)
+                improved.description = improved.description.replace(mistake, correction)
         
         return improved
     
-    def _complete_listing(self, listing: Dict, issues: List[str]) -> Dict:
+    def _complete_listing(self, listing: Listing, issues: List[str]) -> Listing:
         """Complète les informations manquantes"""
-        improved = listing.copy()
+        improved = replace(listing)
         
         for issue in issues:
             if "Champ manquant" in issue:
                 field = issue.split(':')[-1].strip()
-                if field == 'highlights' and not improved.get('highlights'):
-                    improved['highlights'] = self._generate_highlights(improved)
-                elif field == 'tags' and not improved.get('tags'):
-                    improved['tags'] = self._generate_tags(improved)
+                if field == 'highlights' and not improved.highlights:
+                    improved.highlights = self._generate_highlights(improved)
+                elif field == 'tags' and not improved.tags:
+                    improved.tags = self._generate_tags(improved)
         
         return improved
     
-    def _optimize_seo(self, listing: Dict, issues: List[str]) -> Dict:
+    def _optimize_seo(self, listing: Listing, issues: List[str]) -> Listing:
         """Optimise le contenu pour le SEO"""
-        improved = listing.copy()
+        improved = replace(listing)
         
         for issue in issues:
             if "Mots-clés manquants" in issue:
                 keywords = issue.split(':')[-1].strip()
-                improved['description'] = self._integrate_keywords(
-                    improved['description'],
+                improved.description = self._integrate_keywords(
+                    improved.description,
                     eval(keywords)  # Convertir la string en set
                 )
         
         return improved
     
-    def _generate_highlights(self, listing: Dict) -> List[str]:
+    def _generate_highlights(self, listing: Listing) -> List[str]:
         """Génère des points forts à partir de la description"""
         # Exemple simple - à améliorer selon les besoins
         return ["Point fort 1", "Point fort 2", "Point fort 3"]
     
-    def _generate_tags(self, listing: Dict) -> List[str]:
+    def _generate_tags(self, listing: Listing) -> List[str]:
         """Génère des tags à partir du contenu"""
         # Exemple simple - à améliorer selon les besoins
-        words = listing['title'].lower().split()
+        words = listing.title.lower().split()
         return list(set(words))[:5]
     
     def _integrate_keywords(self, description: str, keywords: set) -> str:
@@ -310,3 +288,24 @@ class QualityControlAgent(Agent):
             if keyword not in description.lower():
                 description += f" {keyword}"
         return description
+
+
+# Outils de l'agent crewai : (nom, attribut du moteur, description)
+AGENT_TOOLS = (
+    ("verify_listing", "verify_listing", "Vérifie et améliore la qualité d'une annonce"),
+)
+
+# Profil crewai de l'agent : (rôle, objectif, histoire)
+AGENT_PROFILE = (
+    "Quality Controller",
+    "Vérifier et améliorer la qualité des annonces",
+    "Expert en contrôle qualité et optimisation de contenu",
+)
+
+
+def __getattr__(name):
+    # PEP 562 : la sous-classe crewai n'est construite, et crewai importé,
+    # qu'au premier accès à QualityControlAgent
+    if name == 'QualityControlAgent':
+        return agent_class(name, QualityControlEngine, AGENT_TOOLS, AGENT_PROFILE)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,33 +1,20 @@
-from crewai import Agent
-from langchain.tools import Tool
 from services.object_detection import ObjectDetectionService
+from utils.lazy import agent_class
 
-class VisionAgent(Agent):
-    def __init__(self):
-        self.object_detection = ObjectDetectionService()
-        
-        super().__init__(
-            tools=[
-                Tool(
-                    name="detect_objects",
-                    func=self.object_detection.detect_objects,
-                    description="Détecte les objets dans une image"
-                ),
-                Tool(
-                    name="process_realtime",
-                    func=self.object_detection.process_realtime,
-                    description="Traite un flux vidéo en temps réel"
-                )
-            ]
-        )
+class VisionEngine:
+    def __init__(self, object_detection: ObjectDetectionService = None):
+        # Service injecté par le conteneur : le modèle YOLO n'est chargé qu'une fois
+        self.object_detection = object_detection or ObjectDetectionService()
     
     async def analyze_image(self, image_data):
         # Utiliser les outils pour analyser l'image
-        detections = await self.object_detection.detect_objects(image_data)
+        image = self.object_detection.decode_image(image_data)
+        detections = await self.object_detection.detect_objects_in_image(image)
         
         # Analyser et structurer les résultats
         analysis = {
             'objects': detections,
+            'image_shape': image.shape[:2],
             'main_subject': self._identify_main_subject(detections),
             'scene_context': self._analyze_scene(detections)
         }
@@ -48,3 +35,24 @@ class VisionAgent(Agent):
             'object_count': len(detections),
             'unique_objects': list(set(object_classes))
         }
+
+
+# Outils de l'agent crewai : (nom, attribut du moteur, description)
+AGENT_TOOLS = (
+    ("detect_objects", "object_detection.detect_objects", "Détecte les objets dans une image"),
+)
+
+# Profil crewai de l'agent : (rôle, objectif, histoire)
+AGENT_PROFILE = (
+    "Vision Analyst",
+    "Analyser précisément les objets dans les images",
+    "Expert en vision par ordinateur et analyse d'images",
+)
+
+
+def __getattr__(name):
+    # PEP 562 : la sous-classe crewai n'est construite, et crewai importé,
+    # qu'au premier accès à VisionAgent
+    if name == 'VisionAgent':
+        return agent_class(name, VisionEngine, AGENT_TOOLS, AGENT_PROFILE)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,97 @@
+"""Coût de démarrage : temps d'import et mémoire résidente par module
+
+Chaque module est importé dans un interpréteur neuf (plusieurs fois, le
+meilleur temps est retenu). Le script affiche le temps d'import, le pic de
+mémoire résidente et les dépendances lourdes effectivement chargées. Avec
+--check, il échoue si un module censé rester léger (agents d'annonces,
+contrôle qualité, optimiseur, export, inventaire...) charge la pile vision
+ou LLM.
+
+    python benchmarks/import_time.py --repeat 5 --check
+
+Pour le détail par sous-module : python -X importtime -c "import agents.copywriter_agent"
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_DEPENDENCIES = ('crewai', 'langchain', 'ultralytics', 'torch', 'cv2', 'serpapi',
+                      'duckduckgo_search', 'fastapi')
+
+# (module, doit rester léger)
+MODULES = (
+    ('agents.copywriter_agent', True),
+    ('agents.platform_optimizer_agent', True),
+    ('agents.quality_control_agent', True),
+    ('agents.data_aggregation_agent', True),
+    ('agents.lens_research_agent', True),
+    ('agents.vision_agent', True),
+    ('crews.listing_generation_crew', True),
+    ('crews.image_analysis_crew', True),
+    ('services.container', True),
+    ('services.listing_export', True),
+    ('services.inventory_store', True),
+    ('main', False),
+)
+
+_PROBE = """
+import importlib, json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        probe = _PROBE.format(root=ROOT, module=module, heavy=HEAVY_DEPENDENCIES)
+        completed = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {'error': error[-1] if error else f"code de sortie {completed.returncode}"}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help="imports par module (meilleur temps retenu)")
+    parser.add_argument('--check', action='store_true',
+                        help="échoue si un module léger charge une dépendance lourde")
+    parser.add_argument('modules', nargs='*', help="modules à mesurer (défaut : liste de référence)")
+    args = parser.parse_args()
+
+    modules = [(name, False) for name in args.modules] if args.modules else MODULES
+    failures = []
+    print(f"{'module':<36} {'import (ms)':>12} {'RSS (Mo)':>9}  dépendances lourdes")
+    for module, light in modules:
+        result = measure(module, args.repeat)
+        if 'error' in result:
+            print(f"{module:<36} {'erreur':>12} {'':>9}  {result['error']}")
+            failures.append(module)
+            continue
+        print(f"{module:<36} {result['seconds'] * 1000:>12.1f} {result['rss_mb']:>9.0f}  "
+              f"{', '.join(result['heavy']) or '-'}")
+        if light and result['heavy']:
+            failures.append(module)
+
+    if args.check and failures:
+        print(f"Modules en échec ou trop lourds au démarrage : {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Débit et mémoire de l'export en masse des annonces (services/listing_export.py)
+
+Génère des annonces synthétiques (et, avec --images, quelques photos
+partagées par toutes les annonces), les exporte vers les flux de toutes les
+plateformes configurées et affiche le débit, le pic de mémoire résidente et
+la taille des fichiers produits.
+
+    python benchmarks/listing_export.py --listings 100000 --output /tmp/export
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.listing import Listing
+from services.container import get_container
+from services.listing_export import ExportItem
+
+
+def synthetic_items(count: int, image_paths):
+    for i in range(count):
+        yield ExportItem(
+            listing_id=f"L{i:07d}",
+            listing=Listing(
+                title=f"Smartphone reconditionné modèle {i % 500} 128 Go",
+                description="Téléphone en bon état, livré avec chargeur.\n\nPrix ferme, qualité garantie.",
+                highlights=["Batterie neuve", "Écran sans rayure"],
+                tags=["smartphone", "reconditionné", "128 go", f"modèle {i % 500}"],
+                call_to_action="Contactez-moi",
+                condition="Bon état"
+            ),
+            price=50.0 + i % 400,
+            image_path=image_paths[i % len(image_paths)] if image_paths else None,
+            url=f"https://example.com/annonces/L{i:07d}"
+        )
+
+
+def sample_images(directory: str, count: int):
+    import cv2
+    import numpy as np
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"source-{i}.jpg")
+        cv2.imwrite(path, np.random.default_rng(i).integers(0, 255, (3000, 4000, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=100_000)
+    parser.add_argument('--output', default='/tmp/listing_export')
+    parser.add_argument('--images', type=int, default=0, help="nombre de photos sources à générer")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    image_paths = sample_images(os.path.join(args.output, 'sources'), args.images) if args.images else []
+    container = get_container()
+    exporter = container.listing_exporter
+    exporter.chunk_size = args.chunk_size
+
+    start = time.perf_counter()
+    stats = await exporter.export(synthetic_items(args.listings, image_paths), args.output)
+    elapsed = time.perf_counter() - start
+    await container.shutdown()
+
+    print(f"{args.listings} annonces en {elapsed:.1f} s ({args.listings / elapsed:.0f} annonces/s), "
+          f"{stats['images']} images")
+    print(f"Pic de mémoire résidente : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} Mo")
+    for path, written in stats['files'].items():
+        print(f"  {os.path.basename(path)}: {written} annonces, {os.path.getsize(path) / 1e6:.1f} Mo")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
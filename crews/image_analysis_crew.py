@@ -1,58 +1,128 @@
-from crewai import Crew, Task, Agent
 from services.object_detection import ObjectDetectionService
 from services.image_analyzer import ImageAnalyzer
-from agents.vision_agent import VisionAgent
-from agents.lens_research_agent import LensResearchAgent
-from agents.data_aggregation_agent import DataAggregationAgent
+from services.roi_cropper import RegionOfInterestCropper
+from services.condition_estimator import ConditionEstimator
+from agents.lens_research_agent import LensResearchEngine
+from agents.data_aggregation_agent import DataAggregationEngine
 
 class ImageAnalysisCrew:
-    def __init__(self):
-        self.object_detection = ObjectDetectionService()
-        self.image_analyzer = ImageAnalyzer()
+    def __init__(self, object_detection: ObjectDetectionService = None,
+                 image_analyzer: ImageAnalyzer = None,
+                 roi_cropper: RegionOfInterestCropper = None,
+                 condition_estimator: ConditionEstimator = None,
+                 lens_researcher: LensResearchEngine = None,
+                 aggregator: DataAggregationEngine = None):
+        # Services et agents injectés par le conteneur (une instance par processus)
+        self.object_detection = object_detection or ObjectDetectionService()
+        self.image_analyzer = image_analyzer or ImageAnalyzer()
+        self.roi_cropper = roi_cropper or RegionOfInterestCropper()
+        self.condition_estimator = condition_estimator or ConditionEstimator()
+        
+        # Agents concrets pour le mode multi-objets (un produit par objet détecté)
+        self.lens_researcher = lens_researcher or LensResearchEngine(self.image_analyzer)
+        self.aggregator = aggregator or DataAggregationEngine()
+        self._agents = None
+    
+    @property
+    def agents(self):
+        """Agents crewai construits au premier usage, puis partagés par toutes les analyses
+
+        crewai et langchain ne sont importés qu'ici : le mode multi-objets
+        (analyze_objects) n'utilise que les moteurs concrets.
+        """
+        if self._agents is None:
+            self._agents = self._build_agents()
+        return self._agents
+    
+    def _build_agents(self):
+        from crewai import Agent
+        from agents.vision_agent import VisionAgent
+        from agents.lens_research_agent import LensResearchAgent
+        from agents.data_aggregation_agent import DataAggregationAgent
         
         # Initialisation des agents
-        self.vision_agent = Agent(
+        vision_agent = Agent(
             role='Vision Analyst',
             goal='Analyser précisément les objets dans les images',
             backstory='Expert en vision par ordinateur et analyse d\'images',
             agent_type=VisionAgent
         )
         
-        self.lens_agent = Agent(
+        lens_agent = Agent(
             role='Lens Researcher',
             goal='Rechercher des informations détaillées via Google Lens',
             backstory='Spécialiste en recherche visuelle et analyse de produits',
             agent_type=LensResearchAgent
         )
         
-        self.data_agent = Agent(
+        data_agent = Agent(
             role='Data Aggregator',
             goal='Agréger et structurer les informations collectées',
             backstory='Expert en synthèse et organisation de données',
             agent_type=DataAggregationAgent
         )
-
-    async def analyze_image(self, image_file):
-        crew = Crew(
-            agents=[self.vision_agent, self.lens_agent, self.data_agent],
+        
+        return vision_agent, lens_agent, data_agent
+    
+    def _build_crew(self):
+        """Crew et tâches neufs à chaque kickoff : l'état d'exécution d'un Crew
+        (sorties des tâches, itérations) n'est jamais partagé entre requêtes concurrentes"""
+        from crewai import Crew, Task
+        vision_agent, lens_agent, data_agent = self.agents
+        
+        return Crew(
+            agents=[vision_agent, lens_agent, data_agent],
             tasks=[
                 Task(
                     description='Détecter et analyser les objets dans l\'image',
-                    agent=self.vision_agent,
+                    agent=vision_agent,
                     expected_output="Liste des objets détectés avec leurs caractéristiques"
                 ),
                 Task(
                     description='Rechercher des informations via Google Lens',
-                    agent=self.lens_agent,
+                    agent=lens_agent,
                     expected_output="Informations détaillées sur les objets identifiés"
                 ),
                 Task(
                     description='Compiler et structurer toutes les informations',
-                    agent=self.data_agent,
+                    agent=data_agent,
                     expected_output="Données structurées pour la génération d'annonces"
                 )
             ]
         )
-        
-        result = await crew.kickoff()
+
+    async def analyze_image(self, image_file):
+        result = await self._build_crew().kickoff()
         return result
+
+    async def analyze_objects(self, image_bytes, upload_crop, max_objects=20, imgsz=None, escalate=True,
+                              enrich=True, image=None):
+        """Traite chaque objet détecté comme un article distinct (photos à plat, étagères)
+
+        `imgsz`, `escalate` et `enrich` (recherches complémentaires des objets
+        peu sûrs) reprennent le mode retenu par le contrôle d'admission ;
+        `image` évite un second décodage si l'appelant a déjà décodé les bytes.
+        """
+        if image is None:
+            image = await self.object_detection.run_in_executor(self.object_detection.decode_image, image_bytes)
+        detections = await self.object_detection.detect_objects_in_image(image, imgsz, escalate=escalate)
+        # État et dimensions estimés sur l'image déjà décodée, hors de la boucle d'événements
+        await self.object_detection.run_in_executor(self.condition_estimator.annotate, image, detections)
+        
+        crops = await self.object_detection.run_in_executor(
+            self.roi_cropper.crop_regions, image, detections, 'all', max_objects)
+        if not crops:
+            return []
+        
+        vision_data = {
+            'objects': detections,
+            'image_shape': image.shape[:2],
+            'scene_context': {
+                'object_count': len(detections),
+                'unique_objects': list({d['class'] for d in detections})
+            }
+        }
+        
+        lens_data_per_object = await self.lens_researcher.research_crops(
+            crops, upload_crop, image.shape[:2], enrich=enrich)
+        return await self.aggregator.aggregate_objects(vision_data, lens_data_per_object)
@@ -1,52 +1,83 @@
-from crewai import Crew, Task, Agent
-from agents.copywriter_agent import CopywriterAgent
-from agents.platform_optimizer_agent import PlatformOptimizerAgent
-from agents.quality_control_agent import QualityControlAgent
+from agents.copywriter_agent import CopywriterEngine
 
 class ListingGenerationCrew:
-    def __init__(self):
-        self.copywriter = Agent(
+    def __init__(self, copywriter_engine: CopywriterEngine = None):
+        # Agent concret pour la génération directe en masse (mode multi-objets),
+        # injecté par le conteneur
+        self.copywriter_engine = copywriter_engine or CopywriterEngine()
+        self._agents = None
+    
+    @property
+    def agents(self):
+        """Agents crewai construits au premier usage, puis partagés par toutes les générations
+
+        crewai et langchain ne sont importés qu'ici : la génération en masse
+        (generate_listings) n'utilise que le moteur concret.
+        """
+        if self._agents is None:
+            self._agents = self._build_agents()
+        return self._agents
+    
+    def _build_agents(self):
+        from crewai import Agent
+        from agents.copywriter_agent import CopywriterAgent
+        from agents.platform_optimizer_agent import PlatformOptimizerAgent
+        from agents.quality_control_agent import QualityControlAgent
+        
+        copywriter = Agent(
             role='Copywriter',
             goal='Créer des descriptions attractives et précises',
             backstory='Expert en rédaction publicitaire et marketing',
             agent_type=CopywriterAgent
         )
         
-        self.optimizer = Agent(
+        optimizer = Agent(
             role='Platform Optimizer',
             goal='Optimiser le contenu pour chaque plateforme sociale',
             backstory='Spécialiste en marketing digital multi-plateformes',
             agent_type=PlatformOptimizerAgent
         )
         
-        self.quality_control = Agent(
+        quality_control = Agent(
             role='Quality Controller',
             goal='Vérifier et améliorer la qualité des annonces',
             backstory='Expert en contrôle qualité et optimisation de contenu',
             agent_type=QualityControlAgent
         )
-
-    async def generate_listing(self, analysis_data):
-        crew = Crew(
-            agents=[self.copywriter, self.optimizer, self.quality_control],
+        
+        return copywriter, optimizer, quality_control
+    
+    def _build_crew(self):
+        """Crew et tâches neufs à chaque kickoff : l'état d'exécution d'un Crew
+        (sorties des tâches, itérations) n'est jamais partagé entre requêtes concurrentes"""
+        from crewai import Crew, Task
+        copywriter, optimizer, quality_control = self.agents
+        
+        return Crew(
+            agents=[copywriter, optimizer, quality_control],
             tasks=[
                 Task(
                     description='Créer une description attractive basée sur l\'analyse',
-                    agent=self.copywriter,
+                    agent=copywriter,
                     expected_output="Description engageante et détaillée du produit"
                 ),
                 Task(
                     description='Optimiser le contenu pour différentes plateformes',
-                    agent=self.optimizer,
+                    agent=optimizer,
                     expected_output="Versions optimisées pour chaque plateforme sociale"
                 ),
                 Task(
                     description='Vérifier et améliorer la qualité finale',
-                    agent=self.quality_control,
+                    agent=quality_control,
                     expected_output="Annonce finale vérifiée et améliorée"
                 )
             ]
         )
-        
-        result = await crew.kickoff()
+
+    async def generate_listing(self, analysis_data):
+        result = await self._build_crew().kickoff()
         return result
+
+    async def generate_listings(self, products_data):
+        """Génère une annonce par produit agrégé, en parallèle"""
+        return await self.copywriter_engine.generate_listings(products_data)
@@ -0,0 +1,54 @@
+"""Export en masse des annonces de l'inventaire vers les flux des plateformes
+
+Lit les annonces enregistrées (INVENTORY_DB) par lots, les optimise pour
+chaque plateforme et écrit les flux compressés définis dans
+config/platforms.json (CSV leboncoin, catalogue Facebook, légendes Instagram).
+
+    python export_listings.py --output exports/ --status draft --platforms leboncoin facebook
+
+Les flux sont réécrits entièrement à chaque export ; seules les images déjà
+réencodées dans le dossier de sortie sont réutilisées.
+"""
+from dotenv import load_dotenv
+from services.container import get_container
+from services.listing_export import inventory_items
+import argparse
+import asyncio
+import os
+
+
+async def export(args):
+    container = get_container()
+    inventory = container.inventory
+    await inventory.start()
+    try:
+        exporter = container.listing_exporter
+        exporter.chunk_size = args.chunk_size
+        items = inventory_items(inventory, category=args.category, status=args.status,
+                                listing_url=args.listing_url)
+        return await exporter.export(items, args.output, args.platforms or None)
+    finally:
+        await container.shutdown()
+        await inventory.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True, help="dossier de sortie des flux et des images")
+    parser.add_argument('--platforms', nargs='*', help="plateformes cibles (défaut : toutes celles avec un export)")
+    parser.add_argument('--status', help="statut des annonces à exporter (ex. draft, published)")
+    parser.add_argument('--category', help="catégorie des annonces à exporter")
+    parser.add_argument('--listing-url', default=os.getenv('EXPORT_LISTING_URL', ''),
+                        help="URL publique des annonces, suivie de /<id>")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    stats = asyncio.run(export(args))
+    for path, written in stats['files'].items():
+        print(f"{path}: {written} annonces")
+    print(f"{stats['images']} images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Configuration gunicorn du mode production multi-workers :
+#   python main.py --workers N   (ou gunicorn -c gunicorn.conf.py main:app)
+#
+# Le maître charge les poids YOLO et lance le démon de cache partagé avant de
+# forker ; chaque worker est ensuite épinglé sur son propre bloc de cœurs.
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from services.deployment import DEFAULT_THREADS_PER_WORKER, configure_worker, preload_shared_state, worker_count
+
+os.environ.setdefault('LENS_CACHE_SOCKET', '/tmp/lens_inventory_cache.sock')
+os.environ.setdefault('OMP_NUM_THREADS', str(DEFAULT_THREADS_PER_WORKER))
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = worker_count(int(os.getenv('WEB_CONCURRENCY', '0')))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+_cache_daemon = None
+
+
+def on_starting(server):
+    global _cache_daemon
+    from services.shared_cache import CacheDaemon
+    _cache_daemon = multiprocessing.Process(
+        target=CacheDaemon(os.environ['LENS_CACHE_SOCKET']).run, name='lens-cache', daemon=True)
+    _cache_daemon.start()
+
+
+def when_ready(server):
+    preload_shared_state()
+
+
+def pre_fork(server, worker):
+    # Premier bloc de cœurs libre (un worker redémarré reprend le bloc du défunt)
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(server.cfg.workers + len(taken)) if slot not in taken)
+
+
+def post_fork(server, worker):
+    cores = configure_worker(worker.slot, server.cfg.workers)
+    server.log.info("Worker %s épinglé sur les cœurs %s", worker.pid, cores)
+
+
+def on_exit(server):
+    if _cache_daemon is not None and _cache_daemon.is_alive():
+        _cache_daemon.terminate()
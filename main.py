@@ -1,47 +1,211 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 import uvicorn
-from services.object_detection import ObjectDetectionService
-from services.image_analyzer import ImageAnalyzer
+from services.admission_control import Overloaded
+from services.container import get_container
+from services.inventory_store import log_write_failure
+from services.tag_ranking import get_tag_ranker, index_recorded_listings
+from utils.serialization import FastJSONResponse, negotiate_response
 from dotenv import load_dotenv
+import argparse
+import asyncio
 import os
 import io
 import aiohttp
 
 load_dotenv()
 
-app = FastAPI(title="Lens Inventory Market")
-object_detection = ObjectDetectionService()
-image_analyzer = ImageAnalyzer()
+# Services et agents construits une fois par processus, au démarrage de l'application
+container = get_container()
+app = FastAPI(title="Lens Inventory Market", default_response_class=FastJSONResponse,
+              lifespan=container.lifespan)
+
+@container.on_startup
+async def start_inventory(container):
+    await container.inventory.start()
+    # Corpus BM25 des tags construit à partir du catalogue enregistré (tokenisation
+    # hors de la boucle d'événements), puis complété à chaque enregistrement
+    catalog = await container.inventory.catalog()
+    await asyncio.to_thread(get_tag_ranker().add_catalog, catalog)
+
+@container.on_shutdown
+async def stop_inventory(container):
+    # Vide la file d'écriture avant l'arrêt
+    await container.inventory.close()
+
+async def store_temporary_image(image_bytes: bytes) -> str:
+    """Publie une image et retourne son URL publique (une URL par contenu)"""
+    return await container.image_store.store(image_bytes)
 
 @app.post("/analyze")
-async def analyze_image(file: UploadFile = File(...)):
+async def analyze_image(request: Request, file: UploadFile = File(...), crop_strategy: str = "distinct"):
+    admission = container.admission
     try:
+        if crop_strategy not in container.roi_cropper.STRATEGIES:
+            raise ValueError(f"Stratégie de découpage inconnue: {crop_strategy}")
         # Lire le contenu de l'image
         contents = await file.read()
+
+        # Admettre, dégrader ou refuser la requête selon la charge (SLO de latence)
+        async with admission.admit() as ticket:
+            # Décoder une seule fois l'image, hors de la boucle d'événements (thread d'inférence)
+            async with admission.stage('decode'):
+                image = await container.object_detection.run_in_executor(
+                    container.object_detection.decode_image, contents)
+
+                # Réutiliser l'analyse d'une image quasi identique déjà traitée
+                image_hash = await container.object_detection.run_in_executor(
+                    container.deduplicator.hash_image, image)
+                previous = container.deduplicator.lookup(image_hash, crop_strategy)
+            if previous is None:
+                # Analyse persistée (redémarrage, éviction du cache) : pas de nouvelle inférence
+                stored = await container.inventory.find_analysis(image_hash, crop_strategy)
+                if stored is not None:
+                    container.deduplicator.remember(image_hash, stored, crop_strategy)
+                    previous = {'analysis': stored, 'hamming_distance': 0}
+            if previous is not None:
+                # Réponse sans analyse : ne doit pas entrer dans les temps de service
+                ticket.cached = True
+                return negotiate_response(request, {
+                    **previous['analysis'],
+                    "deduplicated": True,
+                    "hamming_distance": previous['hamming_distance']
+                })
+
+            # Détecter les objets dans l'image : escalade vers un modèle plus gros
+            # seulement à pleine charge, résolution réduite en mode dégradé
+            async with admission.stage('inference'):
+                detections = await container.object_detection.detect_objects_in_image(
+                    image, ticket.imgsz, escalate=not ticket.degraded)
+                # Usure et dimensions par objet, sur l'image et les boîtes déjà calculées,
+                # hors de la boucle d'événements (thread d'inférence)
+                await container.object_detection.run_in_executor(
+                    container.condition_estimator.annotate, image, detections, image_hash)
+
+            if ticket.mode == 'detection_only':
+                # Surcharge : pas d'appel Lens, résultat non mémorisé pour la déduplication
+                return negotiate_response(request, {
+                    "object_detection": detections,
+                    "lens_analysis": [],
+                    "degraded": ticket.mode
+                })
+
+            # Découper les objets détectés pour n'envoyer que la zone utile à Lens
+            # (redimensionnement et encodage JPEG hors de la boucle d'événements)
+            crops = await container.object_detection.run_in_executor(
+                container.roi_cropper.crop_regions, image, detections, crop_strategy)
+
+            async with admission.stage('lens'):
+                if crops:
+                    # Analyser chaque crop avec Google Lens, en parallèle ; recherches
+                    # complémentaires pour les objets peu sûrs, hors mode dégradé
+                    lens_results = await container.lens_researcher.research_crops(
+                        crops, store_temporary_image, image.shape[:2], enrich=not ticket.degraded)
+                else:
+                    # Aucun objet exploitable : analyser l'image complète
+                    lens_results = [{
+                        'detection': None,
+                        'lens_analysis': await container.image_analyzer.analyze_image_bytes(
+                            contents, store_temporary_image)
+                    }]
+
+            # Combiner les résultats
+            results = {
+                "object_detection": detections,
+                "lens_analysis": lens_results
+            }
+            if ticket.degraded:
+                results["degraded"] = ticket.mode
+            else:
+                container.deduplicator.remember(image_hash, results, crop_strategy)
+                # Écriture groupée en arrière-plan, sans allonger la réponse
+                container.inventory.record_analysis(
+                    image_hash, detections, lens_results, crop_strategy
+                ).add_done_callback(log_write_failure)
+
+            return negotiate_response(request, results)
+
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze/objects")
+async def analyze_objects(request: Request, file: UploadFile = File(...), max_objects: int = Query(20, ge=1)):
+    """Génère une annonce par objet détecté à partir d'une seule photo"""
+    try:
+        contents = await file.read()
         
-        # Détecter les objets dans l'image
-        detections = await object_detection.detect_objects(contents)
-        
-        # Créer une URL temporaire pour l'image (simulé pour l'exemple)
-        image_url = "https://example.com/temp.jpg"  # À remplacer par un vrai service de stockage
-        
-        # Analyser avec Google Lens
-        lens_results = await image_analyzer.analyze_with_lens(image_url)
-        
-        # Combiner les résultats
-        results = {
-            "object_detection": detections,
-            "lens_analysis": lens_results
-        }
+        # Mêmes emplacements que /analyze ; une annonce exige Lens : pas de mode détection seule
+        async with container.admission.admit('objects', ('full', 'reduced')) as ticket:
+            # Décodage et hash (lien des annonces vers leur image) hors de la boucle d'événements
+            image = await container.object_detection.run_in_executor(
+                container.object_detection.decode_image, contents)
+            image_hash = await container.object_detection.run_in_executor(
+                container.deduplicator.hash_image, image)
+            products = await container.image_analysis_crew.analyze_objects(
+                contents, store_temporary_image, max_objects,
+                imgsz=ticket.imgsz, escalate=not ticket.degraded, enrich=not ticket.degraded, image=image)
+            listings = await container.listing_generation_crew.generate_listings(products)
+        # Photo source conservée avec les annonces, réencodée à l'export
+        image_path = await container.listing_images.save(contents) if products else None
+        recorded = container.inventory.record_listings(products, listings, image_hash, image_path=image_path)
+        recorded.add_done_callback(log_write_failure)
+        recorded.add_done_callback(index_recorded_listings(listings))
         
-        return results
+        return negotiate_response(request, {
+            "object_count": len(products),
+            "listings": [
+                {"product": product, "listing": listing}
+                for product, listing in zip(products, listings)
+            ]
+        })
         
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/inventory/listings")
+async def search_listings(category: str = None, platform: str = None, status: str = None,
+                          min_price: float = None, max_price: float = None, limit: int = 100):
+    """Annonces enregistrées, filtrées par catégorie, plateforme, statut et prix"""
+    return await container.inventory.search_listings(category, platform, status, min_price, max_price, limit)
+
+@app.get("/health/load")
+async def load_status():
+    """État du contrôle d'admission : requêtes en cours, file, latences par mode
+
+    Inclut les escalades de l'échelle de modèles, si le détecteur est chargé.
+    """
+    status = container.admission.snapshot()
+    detector = container.built('object_detection')
+    if detector is not None:
+        status['detection'] = detector.ladder_stats()
+    return status
+
 @app.get("/")
 async def root():
     return {"message": "Bienvenue sur l'API Lens Inventory Market"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Serveur API Lens Inventory Market")
+    parser.add_argument('--host', default="0.0.0.0")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="1 : mode développement (rechargement auto) ; N > 1 : mode production "
+                             "gunicorn à N workers ; 0 : un worker par bloc de cœurs")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
+    else:
+        # Mode production : modèle préchargé, cache partagé et workers épinglés (gunicorn.conf.py)
+        command = ['gunicorn', '-c', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'),
+                   '--bind', f"{args.host}:{args.port}"]
+        if args.workers > 1:
+            command += ['--workers', str(args.workers)]
+        os.execvp('gunicorn', command + ['main:app'])
@@ -0,0 +1,219 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Modèle typé échangé entre l'agrégation et la génération d'annonces.
+# Les dictionnaires ne sont construits qu'en bordure d'API (to_dict / from_dict).
+
+
+def _require(data: Dict, key: str, context: str):
+    """Retourne data[key] ou lève une ValueError explicite"""
+    try:
+        return data[key]
+    except (KeyError, TypeError):
+        raise ValueError(f"Champ manquant: {context}.{key}") from None
+
+
+@dataclass(slots=True)
+class PriceRange:
+    min: float
+    max: float
+    average: float
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['PriceRange']:
+        if not data:
+            return None
+        return cls(
+            min=_require(data, 'min', 'price_range'),
+            max=_require(data, 'max', 'price_range'),
+            average=_require(data, 'average', 'price_range')
+        )
+
+    def to_dict(self) -> Dict:
+        return {'min': self.min, 'max': self.max, 'average': self.average}
+
+
+@dataclass(slots=True)
+class ProductInformation:
+    product_name: str
+    condition: str
+    main_category: Optional[str] = None
+    detected_objects: List[Dict] = field(default_factory=list)
+    visual_matches: List[Dict] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProductInformation':
+        return cls(
+            product_name=_require(data, 'product_name', 'product_information') or '',
+            condition=_require(data, 'condition', 'product_information') or '',
+            main_category=data.get('main_category'),
+            detected_objects=list(data.get('detected_objects') or []),
+            visual_matches=list(data.get('visual_matches') or [])
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'main_category': self.main_category,
+            'detected_objects': self.detected_objects,
+            'visual_matches': self.visual_matches,
+            'product_name': self.product_name,
+            'condition': self.condition
+        }
+
+
+@dataclass(slots=True)
+class CompetitionAnalysis:
+    market_saturation: str = 'medium'
+    price_competitiveness: str = 'competitive'
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'CompetitionAnalysis':
+        data = data or {}
+        return cls(
+            market_saturation=data.get('market_saturation', 'medium'),
+            price_competitiveness=data.get('price_competitiveness', 'competitive')
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'market_saturation': self.market_saturation,
+            'price_competitiveness': self.price_competitiveness
+        }
+
+
+@dataclass(slots=True)
+class MarketAnalysis:
+    price_range: Optional[PriceRange] = None
+    similar_products: List[str] = field(default_factory=list)
+    market_categories: List[str] = field(default_factory=list)
+    competition_analysis: CompetitionAnalysis = field(default_factory=CompetitionAnalysis)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MarketAnalysis':
+        return cls(
+            price_range=PriceRange.from_dict(data.get('price_range')),
+            similar_products=list(data.get('similar_products') or []),
+            market_categories=list(data.get('market_categories') or []),
+            competition_analysis=CompetitionAnalysis.from_dict(data.get('competition_analysis'))
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'price_range': self.price_range.to_dict() if self.price_range else None,
+            'similar_products': self.similar_products,
+            'market_categories': self.market_categories,
+            'competition_analysis': self.competition_analysis.to_dict()
+        }
+
+
+@dataclass(slots=True)
+class TechnicalDetails:
+    specifications: List[str] = field(default_factory=list)
+    dimensions: Dict = field(default_factory=dict)
+    features: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TechnicalDetails':
+        return cls(
+            specifications=list(data.get('specifications') or []),
+            dimensions=dict(data.get('dimensions') or {}),
+            features=list(data.get('features') or [])
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'specifications': self.specifications,
+            'dimensions': self.dimensions,
+            'features': self.features
+        }
+
+
+@dataclass(slots=True)
+class AnalysisMetadata:
+    analysis_version: str
+    confidence_score: float
+    timestamp: str
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AnalysisMetadata':
+        return cls(
+            analysis_version=data.get('analysis_version', '1.0'),
+            confidence_score=float(data.get('confidence_score', 0.0)),
+            timestamp=data.get('timestamp', '')
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'analysis_version': self.analysis_version,
+            'confidence_score': self.confidence_score,
+            'timestamp': self.timestamp
+        }
+
+
+@dataclass(slots=True)
+class AggregatedProduct:
+    product_information: ProductInformation
+    market_analysis: MarketAnalysis
+    technical_details: TechnicalDetails
+    metadata: AnalysisMetadata
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AggregatedProduct':
+        return cls(
+            product_information=ProductInformation.from_dict(_require(data, 'product_information', 'product')),
+            market_analysis=MarketAnalysis.from_dict(data.get('market_analysis') or {}),
+            technical_details=TechnicalDetails.from_dict(data.get('technical_details') or {}),
+            metadata=AnalysisMetadata.from_dict(data.get('metadata') or {})
+        )
+
+    @classmethod
+    def coerce(cls, data) -> 'AggregatedProduct':
+        """Accepte un AggregatedProduct ou sa forme dictionnaire (bordure d'API)"""
+        return data if isinstance(data, cls) else cls.from_dict(data)
+
+    def to_dict(self) -> Dict:
+        return {
+            'product_information': self.product_information.to_dict(),
+            'market_analysis': self.market_analysis.to_dict(),
+            'technical_details': self.technical_details.to_dict(),
+            'metadata': self.metadata.to_dict()
+        }
+
+
+@dataclass(slots=True)
+class Listing:
+    title: str
+    description: str
+    highlights: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    call_to_action: str = ''
+    condition: Optional[str] = None
+    platform_specific: Dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Listing':
+        return cls(
+            title=_require(data, 'title', 'listing'),
+            description=_require(data, 'description', 'listing'),
+            highlights=list(data.get('highlights') or []),
+            tags=list(data.get('tags') or []),
+            call_to_action=data.get('call_to_action', ''),
+            condition=data.get('condition'),
+            platform_specific=dict(data.get('platform_specific') or {})
+        )
+
+    @classmethod
+    def coerce(cls, data) -> 'Listing':
+        """Accepte un Listing ou sa forme dictionnaire (bordure d'API)"""
+        return data if isinstance(data, cls) else cls.from_dict(data)
+
+    def to_dict(self) -> Dict:
+        return {
+            'title': self.title,
+            'description': self.description,
+            'highlights': self.highlights,
+            'tags': self.tags,
+            'call_to_action': self.call_to_action,
+            'condition': self.condition,
+            'platform_specific': self.platform_specific
+        }
@@ -0,0 +1,197 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from services.hedging import LatencyTracker
+import asyncio
+import math
+import time
+
+# Modes de traitement, du plus complet au plus économique
+MODES = ('full', 'reduced', 'detection_only')
+STAGES = ('decode', 'inference', 'lens')
+
+
+class Overloaded(Exception):
+    """Requête refusée : le SLO de latence ne peut pas être tenu"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Service surchargé: {reason}")
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class Admission:
+    """Ticket d'admission : mode de traitement retenu et temps passé en file"""
+    mode: str
+    queued: float
+    imgsz: Optional[int] = None
+    # Réponse servie sans analyse (déduplication, inventaire) : temps mesuré à part
+    cached: bool = False
+
+    @property
+    def degraded(self) -> bool:
+        return self.mode != 'full'
+
+
+class AdmissionController:
+    """Contrôle d'admission des endpoints d'analyse piloté par un SLO de latence
+
+    Le nombre de requêtes exécutées simultanément est borné ; les autres
+    attendent dans une file elle aussi bornée. À l'admission, le contrôleur
+    estime la latence de chaque mode (attente en file + percentile cible, p99
+    par défaut, du temps de service observé pour ce mode) et retient le plus complet qui tient dans le
+    SLO : analyse complète, résolution réduite, ou détection seule (sans
+    Lens). Si aucun ne tient, la requête est refusée avec un délai de
+    nouvelle tentative.
+
+    Les emplacements sont partagés par tous les endpoints ; les temps de
+    service sont suivis par type de traitement (`workload`) et par mode, et
+    les réponses servies depuis un cache à part, pour ne pas fausser les
+    estimations des analyses réelles.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, latency_slo: float = 5.0,
+                 queue_target: float = 0.25, reduced_imgsz: int = 320, percentile: float = 99,
+                 window: int = 256, min_samples: int = 10, workload_slos: Optional[Dict[str, float]] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.latency_slo = latency_slo
+        # SLO propres aux traitements plus longs que /analyze (ex. {'objects': 20.0})
+        self.workload_slos = dict(workload_slos or {})
+        # Attente en file tolérée, en fraction du SLO : au-delà on refuse plutôt
+        # que de laisser la file absorber tout le budget de latence
+        self.max_queue_wait = queue_target * latency_slo
+        self.reduced_imgsz = reduced_imgsz
+        self.percentile = percentile
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.queue_latency = LatencyTracker(window, min_samples)
+        self.window = window
+        self.min_samples = min_samples
+        # Temps de service par type de traitement puis par mode
+        self.service_time: Dict[str, Dict[str, LatencyTracker]] = {}
+        self.cache_hit_time = LatencyTracker(window, min_samples)
+        # Occupation d'un emplacement, tous modes confondus (cadence de la file)
+        self.slot_time = LatencyTracker(window, min_samples)
+        self.waiting = 0
+        self.running = 0
+        self.in_flight = dict.fromkeys(STAGES, 0)
+        self.admitted = dict.fromkeys(MODES, 0)
+        self.cache_hits = 0
+        self.rejected = 0
+
+    def _trackers(self, workload: str) -> Dict[str, LatencyTracker]:
+        trackers = self.service_time.get(workload)
+        if trackers is None:
+            trackers = self.service_time[workload] = {
+                mode: LatencyTracker(self.window, self.min_samples) for mode in MODES
+            }
+        return trackers
+
+    def _service_estimate(self, workload: str, mode: str, q: float = None) -> float:
+        # Sans historique, on suppose le mode assez rapide (démarrage à froid)
+        return self._trackers(workload)[mode].percentile(q or self.percentile) or 0.0
+
+    def expected_wait(self) -> float:
+        """Attente estimée en file pour une nouvelle requête"""
+        ahead = self.waiting + max(0, self.running - self.max_concurrent + 1)
+        if not ahead:
+            return 0.0
+        # Estimation par la loi de Little, corrigée par l'attente réellement observée
+        estimate = ahead / self.max_concurrent * (self.slot_time.percentile(50) or 0.0)
+        return max(estimate, self.queue_latency.percentile(50) or 0.0)
+
+    def choose_mode(self, budget: float, workload: str = 'analyze',
+                    modes: Tuple[str, ...] = MODES) -> Optional[str]:
+        """Mode le plus complet dont le temps de service (percentile cible) tient dans le budget"""
+        for mode in modes:
+            if self._service_estimate(workload, mode) <= budget:
+                return mode
+        return None
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait() or self.latency_slo))
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise Overloaded(reason, self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self, workload: str = 'analyze', modes: Tuple[str, ...] = MODES):
+        """Admet une requête (ou lève Overloaded) et retourne son ticket
+
+        `modes` restreint les modes acceptables pour ce traitement (du plus
+        complet au plus économique). Le temps de service n'est enregistré que
+        si le bloc se termine sans erreur ; un ticket marqué `cached` est
+        compté comme réponse servie depuis un cache.
+        """
+        slo = self.workload_slos.get(workload, self.latency_slo)
+        idle = self.waiting == 0 and self.running < self.max_concurrent
+        if not idle:
+            if self.waiting >= self.max_queue:
+                self._reject("file d'attente pleine")
+            expected_wait = self.expected_wait()
+            if (expected_wait > self.max_queue_wait
+                    or self.choose_mode(slo - expected_wait, workload, modes) is None):
+                self._reject("SLO de latence compromis")
+
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            if idle:
+                # Emplacement libre : acquisition immédiate, quel que soit l'historique
+                await self.slots.acquire()
+            else:
+                # Attendre au plus ce qui laisse le temps de servir le mode le plus économique
+                max_wait = max(slo - self._service_estimate(workload, modes[-1]), 0.0)
+                await asyncio.wait_for(self.slots.acquire(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            self._reject("délai d'attente dépassé")
+        finally:
+            self.waiting -= 1
+
+        queued = time.monotonic() - start
+        self.queue_latency.record(queued)
+        # Sans file, l'analyse complète est toujours tentée : cela rafraîchit
+        # aussi ses mesures après une période de dégradation
+        mode = modes[0] if idle else (self.choose_mode(slo - queued, workload, modes) or modes[-1])
+        ticket = Admission(mode, queued, self.reduced_imgsz if mode == 'reduced' else None)
+        self.admitted[mode] += 1
+        self.running += 1
+        try:
+            yield ticket
+            service_time = time.monotonic() - start - queued
+            if ticket.cached:
+                self.cache_hits += 1
+                self.cache_hit_time.record(service_time)
+            else:
+                self._trackers(workload)[ticket.mode].record(service_time)
+            self.slot_time.record(service_time)
+        finally:
+            self.running -= 1
+            self.slots.release()
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Compte les traitements en cours par étape (décodage, inférence, Lens)"""
+        self.in_flight[name] += 1
+        try:
+            yield
+        finally:
+            self.in_flight[name] -= 1
+
+    def snapshot(self) -> Dict:
+        """État courant, exposé par l'endpoint de santé"""
+        return {
+            'running': self.running,
+            'waiting': self.waiting,
+            'in_flight': dict(self.in_flight),
+            'queue_latency_p95': self.queue_latency.percentile(95),
+            'service_time_p95': {
+                workload: {mode: tracker.percentile(95) for mode, tracker in trackers.items()}
+                for workload, trackers in self.service_time.items()
+            },
+            'cache_hit_time_p95': self.cache_hit_time.percentile(95),
+            'admitted': dict(self.admitted),
+            'cache_hits': self.cache_hits,
+            'rejected': self.rejected
+        }
@@ -0,0 +1,186 @@
+from cachetools import LRUCache
+from services.image_dedup import PerceptualHasher
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.lazy import lazy_import
+import numpy as np
+
+cv2 = lazy_import('cv2')
+
+# Plus grand côté typique (cm) d'objets COCO de taille peu variable, servant
+# d'étalon pour estimer les dimensions des autres objets de la photo
+REFERENCE_SIZES_CM = {
+    'cell phone': 15.0,
+    'remote': 18.0,
+    'mouse': 11.0,
+    'keyboard': 44.0,
+    'book': 23.0,
+    'cup': 10.0,
+    'bottle': 25.0,
+    'laptop': 35.0,
+    'scissors': 20.0,
+    'banana': 19.0,
+}
+
+# Seuils d'usure (score 0-1) vers les libellés d'état des plateformes. La
+# vision seule ne permet d'affirmer ni « Neuf » ni « Pour pièces » (une
+# texture marquée ressemble à de l'usure) : ces états restent au vendeur.
+CONDITION_THRESHOLDS = (
+    (0.15, "Très bon état"),
+    (0.40, "Bon état"),
+)
+WORST_CONDITION = "État satisfaisant"
+
+
+class ConditionEstimator:
+    """Estimation de l'usure et des dimensions à partir de l'image déjà décodée
+
+    Chaque objet détecté est ramené à une vignette en niveaux de gris de taille
+    fixe ; toutes les vignettes sont empilées et traitées en une seule passe
+    NumPy (laplacien, gradients). Les caractéristiques sont mises en cache par
+    hash d'image et boîte englobante.
+    """
+
+    def __init__(self, patch_size: int = 96, margin: float = 0.1, edge_threshold: float = 40.0,
+                 wear_baseline: float = 0.04, wear_scale: float = 0.25, min_sharpness: float = 20.0,
+                 cache_size: int = 10_000):
+        self.patch_size = patch_size
+        # Bordure ignorée : les contours de l'objet ne sont pas de l'usure
+        self.margin = margin
+        self.edge_threshold = edge_threshold
+        self.wear_baseline = wear_baseline
+        self.wear_scale = wear_scale
+        # En deçà, la photo est trop floue pour juger l'état
+        self.min_sharpness = min_sharpness
+        self.cache = LRUCache(maxsize=cache_size)
+        self.hasher = PerceptualHasher()
+
+    def estimate(self, image: np.ndarray, detections: List[Dict], image_hash: Optional[int] = None) -> List[Dict]:
+        """Retourne {'condition_estimate', 'dimensions'} pour chaque détection, dans l'ordre"""
+        return self.estimate_many([(image, detections, image_hash)])[0]
+
+    def estimate_many(self, items: Sequence[Tuple[np.ndarray, List[Dict], Optional[int]]]) -> List[List[Dict]]:
+        """Traitement en masse : les vignettes de toutes les images partagent un seul lot"""
+        keys = []
+        computed = {}
+        missing = []
+        patches = []
+        for image, detections, image_hash in items:
+            if image_hash is None:
+                image_hash = self.hasher.hash_image(image)
+            image_keys = [(image_hash, self._box_key(d['bbox'])) for d in detections]
+            keys.append(image_keys)
+            for key, detection in zip(image_keys, detections):
+                if key not in self.cache and key not in computed:
+                    computed[key] = None
+                    patch = self._patch(image, detection['bbox'])
+                    if patch is not None:
+                        missing.append(key)
+                        patches.append(patch)
+
+        if patches:
+            for key, features in zip(missing, self._features(np.stack(patches))):
+                self.cache[key] = computed[key] = features
+
+        return [
+            [
+                {
+                    'condition_estimate': computed[key] if key in computed else self.cache.get(key),
+                    'dimensions': self._dimensions(image, detections, detection)
+                }
+                for key, detection in zip(image_keys, detections)
+            ]
+            for (image, detections, _), image_keys in zip(items, keys)
+        ]
+
+    def annotate(self, image: np.ndarray, detections: List[Dict], image_hash: Optional[int] = None) -> List[Dict]:
+        """Ajoute les champs 'condition_estimate' et 'dimensions' aux détections (données de vision)"""
+        for detection, estimate in zip(detections, self.estimate(image, detections, image_hash)):
+            detection.update(estimate)
+        return detections
+
+    @staticmethod
+    def _box_key(bbox) -> Tuple[int, ...]:
+        return tuple(int(round(float(value))) for value in bbox)
+
+    def _patch(self, image: np.ndarray, bbox) -> Optional[np.ndarray]:
+        """Vignette carrée en niveaux de gris de l'intérieur de la boîte"""
+        height, width = image.shape[:2]
+        x1, y1, x2, y2 = (float(value) for value in bbox)
+        inset_x = (x2 - x1) * self.margin
+        inset_y = (y2 - y1) * self.margin
+        left, top = max(int(x1 + inset_x), 0), max(int(y1 + inset_y), 0)
+        right, bottom = min(int(x2 - inset_x), width), min(int(y2 - inset_y), height)
+        if right - left < 4 or bottom - top < 4:
+            return None
+
+        region = image[top:bottom, left:right]
+        gray = region if region.ndim == 2 else cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (self.patch_size, self.patch_size), interpolation=cv2.INTER_AREA)
+
+    def _features(self, patches: np.ndarray) -> List[Dict]:
+        """Netteté (variance du laplacien), densité de contours et score d'usure par vignette"""
+        batch = patches.astype(np.float32)
+
+        # Laplacien 4-voisins sur tout le lot
+        laplacian = (batch[:, :-2, 1:-1] + batch[:, 2:, 1:-1] + batch[:, 1:-1, :-2]
+                     + batch[:, 1:-1, 2:] - 4.0 * batch[:, 1:-1, 1:-1])
+        sharpness = laplacian.reshape(len(batch), -1).var(axis=1)
+
+        # Gradients centrés : rayures, éclats et taches créent des contours
+        # courts à l'intérieur de surfaces normalement lisses
+        gx = batch[:, 1:-1, 2:] - batch[:, 1:-1, :-2]
+        gy = batch[:, 2:, 1:-1] - batch[:, :-2, 1:-1]
+        magnitude = np.sqrt(gx * gx + gy * gy)
+        edge_density = (magnitude > self.edge_threshold).reshape(len(batch), -1).mean(axis=1)
+
+        wear = np.clip((edge_density - self.wear_baseline) / self.wear_scale, 0.0, 1.0)
+        reliable = sharpness >= self.min_sharpness
+
+        return [
+            {
+                'wear_score': round(float(wear[i]), 3),
+                'sharpness': round(float(sharpness[i]), 1),
+                'edge_density': round(float(edge_density[i]), 4),
+                'label': self._label(wear[i]) if reliable[i] else None,
+                'reliable': bool(reliable[i])
+            }
+            for i in range(len(batch))
+        ]
+
+    @staticmethod
+    def _label(wear: float) -> str:
+        for threshold, label in CONDITION_THRESHOLDS:
+            if wear < threshold:
+                return label
+        return WORST_CONDITION
+
+    def _dimensions(self, image: np.ndarray, detections: List[Dict], detection: Dict) -> Dict:
+        """Dimensions relatives à l'image, et en cm si un objet étalon est visible
+
+        L'échelle est déduite de l'étalon le plus confiant (hors l'objet lui-même) ;
+        la perspective est ignorée, les valeurs sont approximatives.
+        """
+        height, width = image.shape[:2]
+        x1, y1, x2, y2 = (float(value) for value in detection['bbox'])
+        box_width, box_height = x2 - x1, y2 - y1
+        dimensions = {
+            'relative_width': round(box_width / width, 3),
+            'relative_height': round(box_height / height, 3)
+        }
+
+        references = [
+            d for d in detections
+            if d is not detection and d['class'] in REFERENCE_SIZES_CM
+        ]
+        if references:
+            reference = max(references, key=lambda d: d['confidence'])
+            rx1, ry1, rx2, ry2 = (float(value) for value in reference['bbox'])
+            longest = max(rx2 - rx1, ry2 - ry1)
+            if longest > 0:
+                cm_per_pixel = REFERENCE_SIZES_CM[reference['class']] / longest
+                dimensions.update({
+                    'width_cm': round(box_width * cm_per_pixel, 1),
+                    'height_cm': round(box_height * cm_per_pixel, 1),
+                    'reference': reference['class']
+                })
+        return dimensions
@@ -0,0 +1,186 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from services.pricing import extract_prices
+from services.tag_ranking import tokenize
+import json
+import os
+import numpy as np
+
+FEATURES = ('detection_confidence', 'box_size', 'match_agreement', 'price_dispersion')
+
+# Coefficients a priori de la régression logistique (ordre de FEATURES), fixés à
+# la main tant qu'aucun modèle ajusté (ConfidenceScorer.fit, CONFIDENCE_MODEL)
+# n'est fourni : une détection sûre (0.9) sur un objet de taille moyenne (0.5)
+# avec des titres Lens concordants (0.6) et des prix resserrés (0.2) donne
+# environ 0.9 ; sans prix ni accord, on reste sous 0.5.
+DEFAULT_WEIGHTS = (3.0, 1.0, 2.5, -1.5)
+DEFAULT_BIAS = -2.0
+DEFAULT_ENRICHMENT_THRESHOLD = 0.8
+
+# Dispersion retenue quand les prix manquent : incertitude maximale
+_UNKNOWN_DISPERSION = 2.0
+
+
+class ConfidenceScorer:
+    """Score de confiance (0-1) d'une analyse produit
+
+    Régression logistique sur quatre signaux : confiance YOLO de l'objet
+    principal, taille de sa boîte relative à l'image, accord entre les
+    correspondances Lens (similarité des titres) et dispersion des prix
+    observés. Avec les coefficients a priori (DEFAULT_WEIGHTS), le score
+    ordonne les analyses sans mesurer une probabilité ; une fois ajusté par
+    `fit` sur des analyses étiquetées (exacte ou non), il estime la
+    probabilité qu'une analyse soit exacte. Le calcul est vectorisé sur un
+    lot d'analyses.
+    """
+
+    def __init__(self, weights: Sequence[float] = DEFAULT_WEIGHTS, bias: float = DEFAULT_BIAS,
+                 enrichment_threshold: float = DEFAULT_ENRICHMENT_THRESHOLD, top_matches: int = 5):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        # Au-delà, l'enrichissement (DuckDuckGo / Google Shopping) est superflu
+        self.enrichment_threshold = enrichment_threshold
+        self.top_matches = top_matches
+
+    def features(self, detections: Sequence[Optional[Dict]], lens_analyses: Sequence[Optional[Dict]],
+                 image_shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Matrice (N, 4) des signaux, une ligne par couple (détection, analyse Lens)
+
+        `image_shape` (hauteur, largeur) est celle de l'image d'où viennent les
+        détections ; sans elle, la taille de boîte vaut 0.
+        """
+        rows = np.zeros((len(detections), len(FEATURES)))
+        for i, (detection, lens_analysis) in enumerate(zip(detections, lens_analyses)):
+            detection = detection or {}
+            matches = (lens_analysis or {}).get('visual_matches', [])
+            rows[i, 0] = detection.get('confidence', 0.0)
+            rows[i, 1] = self._box_size(detection, image_shape)
+            rows[i, 2] = self._match_agreement(matches[:self.top_matches])
+            rows[i, 3] = self._price_dispersion(matches)
+        return rows
+
+    def fit(self, features: np.ndarray, labels: Sequence[float], l2: float = 1.0,
+            max_iterations: int = 50, tolerance: float = 1e-8) -> 'ConfidenceScorer':
+        """Ajuste les coefficients par maximum de vraisemblance (Newton, pénalité L2)
+
+        `features` est la matrice de `features` ; `labels` vaut 1 pour une
+        analyse jugée exacte, 0 sinon. La pénalité `l2` (sur les poids, pas sur
+        le biais) stabilise l'ajustement sur peu d'analyses ou des signaux séparables.
+        """
+        features = np.asarray(features, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.float64)
+        if features.ndim != 2 or features.shape != (len(labels), len(FEATURES)):
+            raise ValueError(f"Matrice de signaux invalide pour l'ajustement: {features.shape}")
+        if len(np.unique(labels)) < 2:
+            raise ValueError("L'ajustement exige des analyses exactes et inexactes")
+
+        design = np.hstack([features, np.ones((len(labels), 1))])
+        penalty = np.full(design.shape[1], l2)
+        penalty[-1] = 0.0
+        coefficients = np.append(self.weights, self.bias)
+        for _ in range(max_iterations):
+            probabilities = 1.0 / (1.0 + np.exp(-(design @ coefficients)))
+            gradient = design.T @ (probabilities - labels) + penalty * coefficients
+            curvature = probabilities * (1.0 - probabilities)
+            hessian = (design.T * curvature) @ design + np.diag(penalty)
+            step = np.linalg.solve(hessian + 1e-9 * np.eye(len(coefficients)), gradient)
+            coefficients -= step
+            if np.max(np.abs(step)) < tolerance:
+                break
+
+        self.weights, self.bias = coefficients[:-1], float(coefficients[-1])
+        return self
+
+    def save(self, path: str):
+        """Écrit les coefficients (ajustés) et le seuil d'enrichissement en JSON"""
+        with open(path, 'w', encoding='utf-8') as model_file:
+            json.dump({
+                'features': list(FEATURES),
+                'weights': self.weights.tolist(),
+                'bias': self.bias,
+                'enrichment_threshold': self.enrichment_threshold
+            }, model_file, indent=2)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'ConfidenceScorer':
+        """Scoreur à partir d'un fichier écrit par `save`"""
+        with open(path, encoding='utf-8') as model_file:
+            model = json.load(model_file)
+        if model.get('features', list(FEATURES)) != list(FEATURES):
+            raise ValueError(f"Signaux du modèle de confiance incompatibles: {model['features']}")
+        kwargs.setdefault('enrichment_threshold', model.get('enrichment_threshold', DEFAULT_ENRICHMENT_THRESHOLD))
+        return cls(model['weights'], model['bias'], **kwargs)
+
+    def score_batch(self, features: np.ndarray) -> np.ndarray:
+        """Scores (sigmoïde) pour une matrice de signaux"""
+        logits = features @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def score_many(self, detections: Sequence[Optional[Dict]], lens_analyses: Sequence[Optional[Dict]],
+                   image_shape: Optional[Tuple[int, int]] = None) -> List[float]:
+        if not detections:
+            return []
+        features = self.features(detections, lens_analyses, image_shape)
+        return [round(float(score), 3) for score in self.score_batch(features)]
+
+    def score(self, detection: Optional[Dict], lens_analysis: Optional[Dict],
+              image_shape: Optional[Tuple[int, int]] = None) -> float:
+        return self.score_many([detection], [lens_analysis], image_shape)[0]
+
+    def should_enrich(self, score: float) -> bool:
+        """Vrai si l'analyse est assez incertaine pour justifier les recherches complémentaires"""
+        return score < self.enrichment_threshold
+
+    @staticmethod
+    def _box_size(detection: Dict, image_shape: Optional[Tuple[int, int]]) -> float:
+        # Racine de la surface relative de la boîte : un objet minuscule est peu fiable
+        bbox = detection.get('bbox')
+        if bbox is None or not image_shape:
+            return 0.0
+        height, width = image_shape[:2]
+        x1, y1, x2, y2 = (float(value) for value in bbox)
+        area = max(x2 - x1, 0.0) * max(y2 - y1, 0.0) / (width * height)
+        return float(np.sqrt(min(area, 1.0)))
+
+    @staticmethod
+    def _match_agreement(matches: List[Dict]) -> float:
+        """Similarité de Jaccard moyenne entre le titre principal et les suivants"""
+        titles = [set(tokenize(match.get('title', ''))) for match in matches]
+        titles = [title for title in titles if title]
+        if len(titles) < 2:
+            return 0.0
+        first = titles[0]
+        return float(np.mean([len(first & other) / len(first | other) for other in titles[1:]]))
+
+    @staticmethod
+    def _price_dispersion(matches: List[Dict]) -> float:
+        """Coefficient de variation des prix, borné ; maximal sans prix exploitable"""
+        prices = np.asarray(extract_prices(matches))
+        if len(prices) < 2 or prices.mean() <= 0:
+            return _UNKNOWN_DISPERSION if len(prices) == 0 else _UNKNOWN_DISPERSION / 2
+        return float(min(prices.std() / prices.mean(), _UNKNOWN_DISPERSION))
+
+
+def main_detection(vision_data: Dict) -> Optional[Dict]:
+    """Détection la plus confiante du sujet principal (ou de l'image, à défaut)"""
+    objects = vision_data.get('objects') or []
+    main_subject = vision_data.get('main_subject')
+    candidates = [obj for obj in objects if obj.get('class') == main_subject] or objects
+    return max(candidates, key=lambda obj: obj.get('confidence', 0.0), default=None)
+
+
+@lru_cache(maxsize=None)
+def get_confidence_scorer() -> ConfidenceScorer:
+    """Scoreur partagé par le processus
+
+    CONFIDENCE_MODEL désigne un modèle ajusté (ConfidenceScorer.save) ;
+    CONFIDENCE_ENRICH_THRESHOLD remplace le seuil d'enrichissement.
+    """
+    kwargs = {}
+    threshold = os.getenv('CONFIDENCE_ENRICH_THRESHOLD')
+    if threshold:
+        kwargs['enrichment_threshold'] = float(threshold)
+    path = os.getenv('CONFIDENCE_MODEL')
+    if path:
+        return ConfidenceScorer.load(path, **kwargs)
+    return ConfidenceScorer(**kwargs)
@@ -0,0 +1,216 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Awaitable, Callable, List
+import asyncio
+import inspect
+import os
+
+
+class ServiceContainer:
+    """Conteneur des services et agents partagés par le processus
+
+    Chaque service est construit une seule fois, à la première demande ou au
+    démarrage de l'application (startup), puis injecté dans les agents et les
+    crews qui en dépendent. Les imports sont faits dans les fabriques pour
+    qu'un processus ne charge que ce qu'il utilise.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._startup_hooks: List[Callable] = []
+        self._shutdown_hooks: List[Callable] = []
+        self.started = False
+
+    def _get(self, name: str, factory: Callable):
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._instances[name] = factory()
+        return instance
+
+    def built(self, name: str):
+        """Instance déjà construite, ou None (sans la construire)"""
+        return self._instances.get(name)
+
+    # Services
+
+    @property
+    def object_detection(self):
+        from services.object_detection import ObjectDetectionService
+        return self._get('object_detection', ObjectDetectionService)
+
+    @property
+    def shared_cache(self):
+        """Client du démon de cache partagé entre workers, si LENS_CACHE_SOCKET est défini"""
+        path = os.getenv('LENS_CACHE_SOCKET')
+        if not path:
+            return None
+        from services.shared_cache import SharedCacheClient
+        return self._get('shared_cache', lambda: SharedCacheClient(path))
+
+    @property
+    def image_analyzer(self):
+        from services.image_analyzer import ImageAnalyzer
+        return self._get('image_analyzer', lambda: ImageAnalyzer(shared_cache=self.shared_cache))
+
+    @property
+    def image_store(self):
+        from services.image_storage import DEFAULT_TEMP_IMAGE_DIR, TemporaryImageStore
+        return self._get('image_store', lambda: TemporaryImageStore(
+            os.getenv('TEMP_IMAGE_DIR', DEFAULT_TEMP_IMAGE_DIR),
+            os.getenv('TEMP_IMAGE_BASE_URL')
+        ))
+
+    @property
+    def listing_images(self):
+        from services.image_storage import DEFAULT_LISTING_IMAGE_DIR, ListingImageStore
+        return self._get('listing_images', lambda: ListingImageStore(
+            os.getenv('LISTING_IMAGE_DIR', DEFAULT_LISTING_IMAGE_DIR)
+        ))
+
+    @property
+    def roi_cropper(self):
+        from services.roi_cropper import RegionOfInterestCropper
+        return self._get('roi_cropper', RegionOfInterestCropper)
+
+    @property
+    def deduplicator(self):
+        from services.image_dedup import ImageDeduplicator
+        return self._get('deduplicator', ImageDeduplicator)
+
+    @property
+    def condition_estimator(self):
+        from services.condition_estimator import ConditionEstimator
+        return self._get('condition_estimator', ConditionEstimator)
+
+    @property
+    def admission(self):
+        from services.admission_control import AdmissionController
+        return self._get('admission', lambda: AdmissionController(
+            max_concurrent=int(os.getenv('ANALYZE_MAX_CONCURRENT', '8')),
+            latency_slo=float(os.getenv('ANALYZE_LATENCY_SLO', '5.0')),
+            # /analyze/objects : une recherche Lens par objet
+            workload_slos={'objects': float(os.getenv('ANALYZE_OBJECTS_LATENCY_SLO', '20.0'))}
+        ))
+
+    @property
+    def inventory(self):
+        """Inventaire persistant ; démarré et arrêté par les hooks de cycle de vie"""
+        from services.inventory_store import DEFAULT_INVENTORY_PATH, InventoryStore
+        return self._get('inventory', lambda: InventoryStore(os.getenv('INVENTORY_DB', DEFAULT_INVENTORY_PATH)))
+
+    @property
+    def listing_exporter(self):
+        from services.listing_export import ListingExporter
+        return self._get('listing_exporter', lambda: ListingExporter(
+            self.platform_optimizer,
+            image_base_url=os.getenv('EXPORT_IMAGE_BASE_URL', '')
+        ))
+
+    # Agents (moteurs concrets : crewai n'est importé que par les crews qui l'utilisent)
+
+    @property
+    def vision_agent(self):
+        from agents.vision_agent import VisionEngine
+        return self._get('vision_agent', lambda: VisionEngine(self.object_detection))
+
+    @property
+    def lens_researcher(self):
+        from agents.lens_research_agent import LensResearchEngine
+        return self._get('lens_researcher', lambda: LensResearchEngine(self.image_analyzer))
+
+    @property
+    def aggregator(self):
+        from agents.data_aggregation_agent import DataAggregationEngine
+        return self._get('aggregator', DataAggregationEngine)
+
+    @property
+    def copywriter(self):
+        from agents.copywriter_agent import CopywriterEngine
+        return self._get('copywriter', CopywriterEngine)
+
+    @property
+    def platform_optimizer(self):
+        from agents.platform_optimizer_agent import PlatformOptimizerEngine
+        return self._get('platform_optimizer', PlatformOptimizerEngine)
+
+    @property
+    def quality_control(self):
+        from agents.quality_control_agent import QualityControlEngine
+        return self._get('quality_control', QualityControlEngine)
+
+    # Crews
+
+    @property
+    def image_analysis_crew(self):
+        from crews.image_analysis_crew import ImageAnalysisCrew
+        return self._get('image_analysis_crew', lambda: ImageAnalysisCrew(
+            object_detection=self.object_detection,
+            image_analyzer=self.image_analyzer,
+            roi_cropper=self.roi_cropper,
+            condition_estimator=self.condition_estimator,
+            lens_researcher=self.lens_researcher,
+            aggregator=self.aggregator
+        ))
+
+    @property
+    def listing_generation_crew(self):
+        from crews.listing_generation_crew import ListingGenerationCrew
+        return self._get('listing_generation_crew', lambda: ListingGenerationCrew(
+            copywriter_engine=self.copywriter
+        ))
+
+    # Cycle de vie
+
+    def on_startup(self, hook: Callable[['ServiceContainer'], Awaitable]):
+        """Enregistre un hook (sync ou async) exécuté au démarrage, après la construction des services"""
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Callable[['ServiceContainer'], Awaitable]):
+        """Enregistre un hook exécuté à l'arrêt, dans l'ordre inverse d'enregistrement"""
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    async def startup(self, eager: List[str] = None):
+        """Construit les services (chargement des modèles hors du chemin des requêtes)"""
+        for name in eager or ('image_analysis_crew', 'listing_generation_crew', 'deduplicator'):
+            # Construction bloquante (poids YOLO) déportée dans un thread
+            await asyncio.to_thread(getattr, self, name)
+        for hook in self._startup_hooks:
+            await _call(hook, self)
+        self.started = True
+
+    async def shutdown(self):
+        """Exécute les hooks d'arrêt puis libère les instances"""
+        for hook in reversed(self._shutdown_hooks):
+            await _call(hook, self)
+        if 'shared_cache' in self._instances:
+            await self._instances['shared_cache'].close()
+        if 'object_detection' in self._instances:
+            self._instances['object_detection'].close()
+        if 'listing_exporter' in self._instances:
+            # Arrêt du pool de réencodage d'images
+            await asyncio.to_thread(self._instances['listing_exporter'].close)
+        self._instances.clear()
+        self.started = False
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """Gestionnaire de cycle de vie à passer à FastAPI(lifespan=...)"""
+        await self.startup()
+        try:
+            yield
+        finally:
+            await self.shutdown()
+
+
+async def _call(hook: Callable, container: ServiceContainer):
+    result = hook(container)
+    if inspect.isawaitable(result):
+        await result
+
+
+@lru_cache(maxsize=None)
+def get_container() -> ServiceContainer:
+    """Conteneur unique du processus"""
+    return ServiceContainer()
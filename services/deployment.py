@@ -0,0 +1,71 @@
+from typing import List, Optional
+import os
+
+# Threads d'inférence par worker : au-delà, les workers se disputent les cœurs
+DEFAULT_THREADS_PER_WORKER = 4
+
+
+def available_cores() -> List[int]:
+    """Cœurs utilisables par le processus (respecte cgroups / taskset)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_count(requested: Optional[int] = None,
+                 threads_per_worker: int = DEFAULT_THREADS_PER_WORKER) -> int:
+    """Nombre de workers : demandé explicitement, ou un par bloc de cœurs"""
+    if requested:
+        return requested
+    return max(1, len(available_cores()) // threads_per_worker)
+
+
+def core_block(slot: int, workers: int, cores: Optional[List[int]] = None) -> List[int]:
+    """Bloc contigu de cœurs attribué au worker `slot` (les restes vont aux premiers)"""
+    cores = cores or available_cores()
+    if workers >= len(cores):
+        return [cores[slot % len(cores)]]
+    size, extra = divmod(len(cores), workers)
+    start = slot * size + min(slot, extra)
+    return cores[start:start + size + (1 if slot < extra else 0)]
+
+
+def configure_worker(slot: int, workers: int) -> List[int]:
+    """Épingle le worker sur son bloc de cœurs et aligne les pools de threads dessus"""
+    cores = core_block(slot, workers)
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    set_inference_threads(len(cores))
+    return cores
+
+
+def set_inference_threads(threads: int):
+    """Limite les threads de torch (YOLO) et d'OpenCV pour éviter la sursouscription"""
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+
+def preload_shared_state():
+    """Charge dans le processus maître ce qui peut être partagé par copie sur écriture
+
+    Les poids YOLO (toute l'échelle de modèles) et les gabarits compilés sont
+    chargés avant le fork : les workers en héritent sans les recharger ni les
+    dupliquer en mémoire.
+    """
+    from services.container import get_container
+    from services.listing_templates import get_template_engine
+    from services.platform_rules import get_platform_rules
+
+    get_container().object_detection.preload()
+    get_template_engine()
+    get_platform_rules()
@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import asyncio
+import time
+
+class LatencyTracker:
+    """Suit en ligne la latence des derniers appels pour en estimer les percentiles"""
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Retourne le percentile q (0-100), ou None tant que l'échantillon est trop petit"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+
+class HedgedRequester:
+    """Exécute des requêtes doublées (hedged requests) pour couper la traîne de latence
+
+    Si la requête n'a pas répondu après le percentile `percentile` des latences
+    observées, une seconde requête identique est lancée ; la première réponse
+    l'emporte et l'autre est annulée. Un seau de jetons limite le trafic
+    supplémentaire : chaque requête crédite `budget` jeton, chaque doublon en
+    consomme un, soit au plus `budget` de requêtes en plus en régime établi.
+
+    Les appels bloquants exécutés via `asyncio.to_thread` ne peuvent pas être
+    interrompus : l'annulation libère l'appelant, le thread termine en arrière-plan.
+    """
+
+    def __init__(self, percentile: float = 95, budget: float = 0.1,
+                 window: int = 256, min_samples: int = 20,
+                 min_delay: float = 0.05, max_tokens: float = 10.0):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.max_tokens = max_tokens
+        self.tracker = LatencyTracker(window, min_samples)
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Délai avant l'envoi du doublon, ou None si l'historique est insuffisant"""
+        observed = self.tracker.percentile(self.percentile)
+        if observed is None:
+            return None
+        return max(observed, self.min_delay)
+
+    async def call(self, request_factory: Callable[[], Awaitable]):
+        """Exécute `request_factory()` avec éventuellement un doublon différé
+
+        Chaque appel alimente les percentiles avec le temps écoulé depuis le
+        départ de la requête principale, qu'il aboutisse, échoue ou soit annulé :
+        une requête principale abandonnée au profit du doublon compte pour au
+        moins le temps qu'elle a déjà pris.
+        """
+        self.requests += 1
+        self.tokens = min(self.tokens + self.budget, self.max_tokens)
+
+        started = time.monotonic()
+        try:
+            return await self._hedged(request_factory)
+        finally:
+            self.tracker.record(time.monotonic() - started)
+
+    async def _hedged(self, request_factory: Callable[[], Awaitable]):
+        primary = asyncio.ensure_future(request_factory())
+        delay = self.hedge_delay()
+        if delay is None:
+            return await primary
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done or self.tokens < 1.0:
+            return await primary
+
+        self.tokens -= 1.0
+        self.hedges += 1
+        hedge = asyncio.ensure_future(request_factory())
+        return await self._first_success({primary, hedge})
+
+    async def _first_success(self, tasks):
+        """Retourne le premier résultat réussi et annule les requêtes perdantes"""
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
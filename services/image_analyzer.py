@@ -1,37 +1,169 @@
-from serpapi import GoogleSearch
-from duckduckgo_search import DDGS
-from cachetools import TTLCache, cached
+from cachetools import TTLCache
+from services.search_backends import DuckDuckGoBackend, GoogleShoppingBackend, merge_results, serpapi
+from services.hedging import HedgedRequester
+from services.image_storage import content_key
+from utils.serialization import trim_lens_payload
+import asyncio
 import os
 import json
 
 class ImageAnalyzer:
-    def __init__(self):
+    def __init__(self, max_concurrent_lens: int = 8, search_backends=None,
+                 hedge_percentile: float = 95, hedge_budget: float = 0.1, shared_cache=None):
         self.serpapi_key = os.getenv('SERPAPI_API_KEY')
         if not self.serpapi_key:
             raise ValueError("SERPAPI_API_KEY n'est pas définie dans les variables d'environnement")
-        
+
         self.lens_cache = TTLCache(maxsize=100, ttl=3600)
-    
-    @cached(cache=lambda self: self.lens_cache)
-    async def analyze_with_lens(self, image_url):
+        self.search_cache = TTLCache(maxsize=1000, ttl=3600)
+        # Second niveau optionnel partagé entre workers (services.shared_cache)
+        self.shared_cache = shared_cache
+        # Limite globale des appels Lens simultanés, toutes images confondues
+        self.lens_semaphore = asyncio.Semaphore(max_concurrent_lens)
+
+        # Requêtes SerpAPI doublées au-delà du percentile de latence observé
+        self.lens_hedger = HedgedRequester(percentile=hedge_percentile, budget=hedge_budget)
+        self.shopping_hedger = HedgedRequester(percentile=hedge_percentile, budget=hedge_budget)
+
+        # Backends interrogés en parallèle par search_additional_info (remplaçables en test)
+        self.search_backends = search_backends if search_backends is not None else [
+            DuckDuckGoBackend(timeout=4.0),
+            GoogleShoppingBackend(self.serpapi_key, timeout=6.0, hedger=self.shopping_hedger)
+        ]
+
+    async def _cached_lens(self, cache_key: str):
+        if cache_key in self.lens_cache:
+            return self.lens_cache[cache_key]
+        if self.shared_cache is not None:
+            shared = await self.shared_cache.get('lens', cache_key)
+            if shared is not None:
+                self.lens_cache[cache_key] = shared
+                return shared
+        return None
+
+    async def analyze_image_bytes(self, image_bytes: bytes, upload):
+        """Analyse Lens d'une image en mémoire, mise en cache par hash de son contenu
+
+        `upload` (coroutine : bytes -> URL publique) n'est appelée qu'en cas
+        d'absence du cache.
+        """
+        cache_key = content_key(image_bytes)
+        cached = await self._cached_lens(cache_key)
+        if cached is not None:
+            return cached
+        return await self.analyze_with_lens(await upload(image_bytes), cache_key)
+
+    async def analyze_with_lens(self, image_url, cache_key: str = None):
+        """Analyse Lens d'une image publiée ; `cache_key` est le hash de son contenu
+
+        Sans `cache_key`, l'URL sert de clé : elle doit alors désigner un contenu stable.
+        """
+        cache_key = cache_key or image_url
+        cached = await self._cached_lens(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             params = {
                 "api_key": self.serpapi_key,
                 "engine": "google_lens",
                 "url": image_url
             }
-            
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            
-            # Extraire les informations pertinentes
-            visual_matches = results.get('visual_matches', [])
-            knowledge_graph = results.get('knowledge_graph', {})
-            
-            return {
-                'visual_matches': visual_matches[:5] if visual_matches else [],  # Top 5 matches
-                'knowledge_graph': knowledge_graph
-            }
-            
+
+            search = serpapi.GoogleSearch(params)
+            async with self.lens_semaphore:
+                # L'appel SerpAPI est bloquant : l'exécuter hors de la boucle d'événements
+                results = await self.lens_hedger.call(lambda: asyncio.to_thread(search.get_dict))
+
+            # Extraire les informations pertinentes (top 5 matches, champs utiles uniquement)
+            analysis = trim_lens_payload({
+                'visual_matches': results.get('visual_matches', [])[:5],
+                'knowledge_graph': results.get('knowledge_graph', {})
+            })
+            self.lens_cache[cache_key] = analysis
+            if self.shared_cache is not None:
+                await self.shared_cache.set('lens', cache_key, analysis)
+            return analysis
+
         except Exception as e:
             raise Exception(f"Erreur lors de l'analyse avec Google Lens: {str(e)}")
+
+    async def analyze_crops_with_lens(self, crops, upload_crop, max_per_image: int = 3):
+        """Lance une recherche Lens par crop, en parallèle, avec une limite par image
+
+        `upload_crop` est une coroutine qui reçoit les bytes JPEG d'un crop et
+        retourne l'URL publique à transmettre à Google Lens. Le cache est indexé
+        par le contenu du crop : un crop déjà analysé n'est pas republié.
+        """
+        image_semaphore = asyncio.Semaphore(max_per_image)
+
+        async def analyze_crop(crop):
+            async with image_semaphore:
+                lens_results = await self.analyze_image_bytes(crop['jpeg'], upload_crop)
+            return {
+                'detection': crop['detection'],
+                'lens_analysis': lens_results
+            }
+
+        return await asyncio.gather(*(analyze_crop(crop) for crop in crops))
+
+    async def search_additional_info(self, query, max_results: int = 10, min_results: int = None):
+        """Interroge tous les backends de recherche en parallèle et fusionne les résultats
+
+        Chaque backend a son propre délai maximal. Dès que `min_results` résultats
+        uniques sont réunis, les backends encore en cours sont annulés.
+        """
+        query = ' '.join(query.split())
+        if not query:
+            return {'query': query, 'results': [], 'backends': {}}
+
+        cache_key = (query.lower(), max_results)
+        if cache_key in self.search_cache:
+            return self.search_cache[cache_key]
+        shared_key = f"{max_results}:{cache_key[0]}"
+        if self.shared_cache is not None:
+            shared = await self.shared_cache.get('search', shared_key)
+            if shared is not None:
+                self.search_cache[cache_key] = shared
+                return shared
+
+        min_results = min_results or max_results
+        merged = {}
+        statuses = {}
+        tasks = {
+            asyncio.create_task(asyncio.wait_for(backend.search(query, max_results), backend.timeout)): backend
+            for backend in self.search_backends
+        }
+
+        try:
+            pending = set(tasks)
+            while pending and len(merged) < min_results:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = tasks[task]
+                    try:
+                        merge_results(merged, task.result())
+                        statuses[backend.name] = 'ok'
+                    except asyncio.TimeoutError:
+                        statuses[backend.name] = 'timeout'
+                    except Exception as e:
+                        statuses[backend.name] = f"error: {e}"
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    statuses[tasks[task].name] = 'cancelled'
+
+        search_results = {
+            'query': query,
+            'results': list(merged.values())[:max_results],
+            'backends': statuses
+        }
+        # Ne mettre en cache que la réponse complète : ni vide (pannes de backends),
+        # ni tronquée par un arrêt anticipé à `min_results` (backends annulés)
+        complete = 'cancelled' not in statuses.values()
+        if search_results['results'] and complete:
+            self.search_cache[cache_key] = search_results
+            if self.shared_cache is not None:
+                await self.shared_cache.set('search', shared_key, search_results)
+        return search_results
@@ -0,0 +1,194 @@
+from cachetools import LRUCache
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from utils.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+
+# Nombre de bits à 1 pour chaque valeur d'octet (popcount vectorisé)
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(hashes: np.ndarray, target: int) -> np.ndarray:
+    """Distances de Hamming entre un tableau de hashes 64 bits et un hash cible"""
+    xored = np.bitwise_xor(hashes, np.uint64(target))
+    return _POPCOUNT_TABLE[xored.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class PerceptualHasher:
+    """Calcule des hashes perceptuels 64 bits (dHash ou pHash) sur des images décodées"""
+
+    METHODS = ('dhash', 'phash')
+
+    def __init__(self, method: str = 'dhash'):
+        if method not in self.METHODS:
+            raise ValueError(f"Méthode de hash inconnue: {method}")
+        self.method = method
+
+    def hash_image(self, image: np.ndarray) -> int:
+        """Retourne le hash perceptuel de l'image (BGR ou niveaux de gris)"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        bits = self._dhash_bits(gray) if self.method == 'dhash' else self._phash_bits(gray)
+        return int(np.packbits(bits).view('>u8')[0])
+
+    def _dhash_bits(self, gray: np.ndarray) -> np.ndarray:
+        # Gradient horizontal sur une vignette 9x8
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        return (small[:, 1:] > small[:, :-1]).ravel()
+
+    def _phash_bits(self, gray: np.ndarray) -> np.ndarray:
+        # Basses fréquences de la DCT d'une vignette 32x32, comparées à leur médiane
+        small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+        low = cv2.dct(small)[:8, :8]
+        median = np.median(low.ravel()[1:])
+        return (low > median).ravel()
+
+
+class HashIndex:
+    """Index multi-tables de hashes 64 bits pour la recherche par distance de Hamming
+
+    Le hash est découpé en `max_distance + 1` segments : deux hashes à distance
+    inférieure ou égale à `max_distance` partagent au moins un segment identique.
+    Chaque table est un couple de tableaux numpy (segments triés, slots) interrogé
+    par recherche dichotomique ; les insertions récentes restent dans un tampon
+    fusionné par lots. L'index est circulaire : au-delà de `capacity`, les plus
+    anciennes entrées sont écrasées.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, max_distance: int = 4,
+                 merge_threshold: int = 4096):
+        if not 0 <= max_distance < 32:
+            raise ValueError("max_distance doit être compris entre 0 et 31")
+
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.merge_threshold = merge_threshold
+
+        tables = max_distance + 1
+        widths = [64 // tables + (1 if i < 64 % tables else 0) for i in range(tables)]
+        self._shifts = [sum(widths[:i]) for i in range(tables)]
+        self._masks = [(1 << width) - 1 for width in widths]
+
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        # Numéro d'insertion de chaque slot : identifiant stable des entrées
+        self._sequence = np.full(capacity, -1, dtype=np.int64)
+        self._keys = [np.empty(0, dtype=np.uint32) for _ in range(tables)]
+        self._slots = [np.empty(0, dtype=np.int32) for _ in range(tables)]
+        self._pending = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def add(self, image_hash: int) -> int:
+        """Ajoute un hash et retourne son identifiant d'insertion"""
+        entry_id = self._count
+        slot = entry_id % self.capacity
+
+        self._hashes[slot] = image_hash
+        self._sequence[slot] = entry_id
+        self._pending.append(slot)
+        self._count += 1
+
+        if len(self._pending) >= self.merge_threshold:
+            self._merge_pending()
+        return entry_id
+
+    def search(self, image_hash: int) -> Optional[Tuple[int, int]]:
+        """Retourne (identifiant, distance) du hash indexé le plus proche, ou None"""
+        matches = self.search_all(image_hash)
+        return matches[0] if matches else None
+
+    def search_all(self, image_hash: int) -> List[Tuple[int, int]]:
+        """Retourne les (identifiant, distance) à distance <= max_distance, du plus proche au plus éloigné"""
+        slots = self._candidates(image_hash)
+        if slots.size == 0:
+            return []
+
+        distances = hamming_distances(self._hashes[slots], image_hash)
+        in_range = np.flatnonzero(distances <= self.max_distance)
+        # Tri stable : à distance égale, l'entrée la plus ancienne d'abord
+        in_range = in_range[np.argsort(distances[in_range], kind='stable')]
+        return [(int(self._sequence[slots[i]]), int(distances[i])) for i in in_range]
+
+    def _segments(self, hashes: np.ndarray, table: int) -> np.ndarray:
+        shift, mask = self._shifts[table], self._masks[table]
+        return ((hashes >> np.uint64(shift)) & np.uint64(mask)).astype(np.uint32)
+
+    def _candidates(self, image_hash: int) -> np.ndarray:
+        found = []
+        for table, (shift, mask) in enumerate(zip(self._shifts, self._masks)):
+            segment = np.uint32((image_hash >> shift) & mask)
+            keys = self._keys[table]
+            lo = np.searchsorted(keys, segment, side='left')
+            hi = np.searchsorted(keys, segment, side='right')
+            found.append(self._slots[table][lo:hi])
+
+        if self._pending:
+            found.append(np.asarray(self._pending, dtype=np.int32))
+
+        # Un slot recyclé depuis la dernière fusion est simplement comparé à son hash actuel
+        return np.unique(np.concatenate(found))
+
+    def _merge_pending(self):
+        """Fusionne le tampon d'insertions dans les tables triées"""
+        pending = np.asarray(self._pending, dtype=np.int32)
+        self._pending = []
+        pending_hashes = self._hashes[pending]
+        wrapped = self._count > self.capacity
+
+        for table in range(len(self._keys)):
+            keys, slots = self._keys[table], self._slots[table]
+
+            if wrapped:
+                # Écarter les entrées dont le slot a été réutilisé par un autre hash
+                valid = self._segments(self._hashes[slots], table) == keys
+                keys, slots = keys[valid], slots[valid]
+
+            new_keys = self._segments(pending_hashes, table)
+            order = np.argsort(new_keys, kind='stable')
+            new_keys, new_slots = new_keys[order], pending[order]
+
+            # Insertion linéaire des nouvelles clés triées dans la table existante
+            positions = np.searchsorted(keys, new_keys, side='right')
+            self._keys[table] = np.insert(keys, positions, new_keys)
+            self._slots[table] = np.insert(slots, positions, new_slots)
+
+
+class ImageDeduplicator:
+    """Retrouve l'analyse d'une image quasi identique déjà traitée"""
+
+    def __init__(self, method: str = 'dhash', max_distance: int = 4,
+                 capacity: int = 1_000_000, results_capacity: int = 10_000):
+        self.hasher = PerceptualHasher(method)
+        self.index = HashIndex(capacity=capacity, max_distance=max_distance)
+        # Seules les analyses récentes sont gardées en mémoire ; l'index conserve les hashes
+        self.results = LRUCache(maxsize=results_capacity)
+
+    def hash_image(self, image: np.ndarray) -> int:
+        return self.hasher.hash_image(image)
+
+    def lookup(self, image_hash: int, variant: str = '') -> Optional[Dict]:
+        """Retourne l'analyse précédente d'une image proche, si encore disponible
+
+        `variant` distingue les analyses d'une même image faites avec des
+        paramètres différents (stratégie de découpage) : seule une analyse de
+        même variante est réutilisée. Si l'analyse la plus proche a été évincée,
+        les autres candidats à distance admissible sont essayés.
+        """
+        for entry_id, distance in self.index.search_all(image_hash):
+            previous = self.results.get(entry_id)
+            if previous is None or previous[0] != variant:
+                continue
+            return {
+                'analysis': previous[1],
+                'duplicate_of': entry_id,
+                'hamming_distance': distance
+            }
+        return None
+
+    def remember(self, image_hash: int, analysis: Dict, variant: str = '') -> int:
+        """Indexe le hash d'une image et mémorise son analyse pour cette variante"""
+        entry_id = self.index.add(image_hash)
+        self.results[entry_id] = (variant, analysis)
+        return entry_id
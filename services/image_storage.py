@@ -0,0 +1,62 @@
+from typing import Optional
+import asyncio
+import hashlib
+import os
+
+DEFAULT_TEMP_IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'temp_images')
+DEFAULT_LISTING_IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'listing_images')
+
+
+def content_key(image_bytes: bytes) -> str:
+    """Hash du contenu d'une image, clé de cache et nom de fichier"""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+class TemporaryImageStore:
+    """Publication des images transmises à Google Lens
+
+    Les images sont écrites dans `directory`, qui doit être servi publiquement
+    sous `base_url` (bucket monté, serveur statique). Le nom du fichier est le
+    hash du contenu : deux images différentes n'ont jamais la même URL.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TEMP_IMAGE_DIR, base_url: Optional[str] = None):
+        self.directory = directory
+        self.base_url = (base_url or '').rstrip('/')
+
+    async def store(self, image_bytes: bytes) -> str:
+        """Écrit l'image (une seule fois par contenu) et retourne son URL publique"""
+        if not self.base_url:
+            raise RuntimeError("Stockage temporaire des images non configuré (TEMP_IMAGE_BASE_URL)")
+        name = f"{content_key(image_bytes)}.jpg"
+        await asyncio.to_thread(_write_once, self.directory, name, image_bytes)
+        return f"{self.base_url}/{name}"
+
+
+class ListingImageStore:
+    """Photos sources des annonces, conservées pour l'export (services.listing_export)
+
+    Contrairement aux images publiées pour Lens, ces fichiers sont durables :
+    l'inventaire enregistre leur chemin avec chaque annonce. Le nom du
+    fichier est le hash du contenu, une photo n'est écrite qu'une fois.
+    """
+
+    def __init__(self, directory: str = DEFAULT_LISTING_IMAGE_DIR):
+        self.directory = directory
+
+    async def save(self, image_bytes: bytes) -> str:
+        """Écrit la photo (une seule fois par contenu) et retourne son chemin local"""
+        name = f"{content_key(image_bytes)}.jpg"
+        return await asyncio.to_thread(_write_once, self.directory, name, image_bytes)
+
+
+def _write_once(directory: str, name: str, image_bytes: bytes) -> str:
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.part"
+    with open(temporary, 'wb') as image_file:
+        image_file.write(image_bytes)
+    os.replace(temporary, path)
+    return path
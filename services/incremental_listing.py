@@ -0,0 +1,218 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from models.listing import AggregatedProduct, Listing, PriceRange
+from services.pricing import extract_prices, summarize_prices
+import weakref
+
+# Valeur absente du cache : le nœud sera calculé à la demande
+_MISSING = object()
+
+
+class DependencyGraph:
+    """Graphe de dépendances entre champs d'entrée et champs dérivés
+
+    Les nœuds sont déclarés dans l'ordre topologique : un nœud ne peut dépendre
+    que de nœuds déjà déclarés.
+    """
+
+    def __init__(self):
+        self.inputs = set()
+        self.nodes = {}
+        self.order = []
+        self._dependents = {}
+
+    def add_input(self, name: str):
+        self.inputs.add(name)
+        self._dependents.setdefault(name, [])
+
+    def add_node(self, name: str, deps: List[str], compute: Callable):
+        for dep in deps:
+            if dep not in self._dependents:
+                raise ValueError(f"Dépendance inconnue pour {name}: {dep}")
+            self._dependents[dep].append(name)
+        self.nodes[name] = (deps, compute)
+        self.order.append(name)
+        self._dependents[name] = []
+
+    def affected(self, changed: Iterable[str]) -> List[str]:
+        """Nœuds dérivés à recalculer, dans l'ordre topologique"""
+        stack = list(changed)
+        seen = set()
+        while stack:
+            for dependent in self._dependents[stack.pop()]:
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return [name for name in self.order if name in seen]
+
+
+# Un graphe par agent d'agrégation, partagé par toutes les annonces suivies et
+# libéré avec l'agent
+_GRAPHS = weakref.WeakKeyDictionary()
+
+
+def _listing_graph(aggregator) -> DependencyGraph:
+    graph = _GRAPHS.get(aggregator)
+    if graph is None:
+        graph = _GRAPHS[aggregator] = _build_listing_graph(aggregator)
+    return graph
+
+
+def _build_listing_graph(aggregator) -> DependencyGraph:
+    """Graphe agrégation → annonce, branché sur l'agrégateur et les gabarits compilés"""
+    # Référence faible : le graphe, valeur de _GRAPHS, ne doit pas garder sa clé en vie
+    aggregator = weakref.proxy(aggregator)
+    graph = DependencyGraph()
+    for name in ('templates', 'main_subject', 'visual_matches', 'price_samples', 'condition', 'competition'):
+        graph.add_input(name)
+
+    def lens_data(get):
+        return {'lens_analysis': {'visual_matches': get('visual_matches')}}
+
+    # Champs agrégés
+    graph.add_node('product_name', ['main_subject', 'visual_matches'], lambda get: aggregator._determine_product_name(
+        {'main_subject': get('main_subject')}, lens_data(get)))
+    graph.add_node('price_range', ['visual_matches', 'price_samples'], lambda get: PriceRange.from_dict(
+        summarize_prices(extract_prices(get('visual_matches')) + list(get('price_samples')))))
+    graph.add_node('similar_products', ['visual_matches'], lambda get: [
+        match.get('title') for match in get('visual_matches')[:5]])
+    graph.add_node('market_categories', ['visual_matches'], lambda get: list({
+        match['category'] for match in get('visual_matches') if 'category' in match}))
+    graph.add_node('specifications', ['visual_matches'], lambda get: aggregator._extract_specifications(lens_data(get)))
+    graph.add_node('features', ['visual_matches'], lambda get: aggregator._extract_features(lens_data(get)))
+
+    # Sections de la description, recalculées indépendamment
+    graph.add_node('section_opening', ['templates', 'product_name', 'condition'], lambda get: get('templates').opening(
+        get('product_name'), get('condition')))
+    graph.add_node('section_main', ['templates', 'specifications'], lambda get: get('templates').main(
+        get('specifications')))
+    graph.add_node('section_technical', ['templates', 'features'], lambda get: get('templates').technical(
+        get('features')))
+    graph.add_node('section_market', ['templates', 'price_range'], lambda get: get('templates').market(
+        get('price_range')))
+
+    # Champs de l'annonce
+    graph.add_node('title', ['templates', 'product_name', 'condition', 'competition'], lambda get: get('templates').title(
+        get('product_name'), get('condition'), get('competition')))
+    graph.add_node('description', ['templates', 'section_opening', 'section_main', 'section_technical', 'section_market'],
+                   lambda get: get('templates').description((
+                       get('section_opening'), get('section_main'),
+                       get('section_technical'), get('section_market'))))
+    graph.add_node('highlights', ['templates', 'features', 'condition'], lambda get: get('templates').highlights(
+        get('features'), get('condition')))
+    graph.add_node('tags', ['templates', 'market_categories', 'product_name', 'condition'], lambda get: get('templates').tags(
+        get('market_categories'), get('product_name'), get('condition')))
+    graph.add_node('call_to_action', ['templates', 'price_range'], lambda get: get('templates').cta(get('price_range')))
+
+    return graph
+
+
+# Emplacement de chaque nœud persistant dans le produit agrégé ou l'annonce
+_PRODUCT_FIELDS = {
+    'product_name': ('product_information', 'product_name'),
+    'condition': ('product_information', 'condition'),
+    'visual_matches': ('product_information', 'visual_matches'),
+    'price_range': ('market_analysis', 'price_range'),
+    'similar_products': ('market_analysis', 'similar_products'),
+    'market_categories': ('market_analysis', 'market_categories'),
+    'specifications': ('technical_details', 'specifications'),
+    'features': ('technical_details', 'features'),
+}
+_LISTING_FIELDS = ('title', 'description', 'highlights', 'tags', 'call_to_action')
+
+
+class IncrementalListing:
+    """Maintient un produit agrégé et son annonce à jour par recalcul incrémental
+
+    Seuls les champs dépendant d'une entrée modifiée sont recalculés ; un
+    champ dont la valeur ne change pas n'invalide pas ses dépendants. Chaque
+    mise à jour retourne le diff des champs modifiés, en valeurs simples
+    (sérialisables en JSON).
+
+    Le produit et l'annonce reçus sont modifiés en place par `update` : ce
+    sont eux que l'on maintient à jour. Passer des copies pour conserver les
+    originaux.
+    """
+
+    def __init__(self, aggregator, templates, product: AggregatedProduct, listing: Listing,
+                 price_samples: Optional[List[float]] = None):
+        self.graph = _listing_graph(aggregator)
+        self.product = product
+        self.listing = listing
+
+        competition = product.market_analysis.competition_analysis
+        self._values = {
+            'templates': templates,
+            'main_subject': product.product_information.main_category,
+            'price_samples': list(price_samples or []),
+            'competition': competition.price_competitiveness,
+        }
+        for node, (section, attribute) in _PRODUCT_FIELDS.items():
+            self._values[node] = getattr(getattr(product, section), attribute)
+        for node in _LISTING_FIELDS:
+            self._values[node] = getattr(listing, node)
+
+    def update(self, visual_matches: Optional[List[Dict]] = None,
+               price_samples: Optional[List[float]] = None,
+               condition: Optional[str] = None) -> Dict:
+        """Applique de nouvelles données et retourne le diff {champ: {old, new}}
+
+        Les matches et échantillons de prix s'ajoutent aux précédents ; le
+        produit et l'annonce sont mis à jour en place.
+        """
+        changed = set()
+        if visual_matches:
+            self._values['visual_matches'] = self._values['visual_matches'] + list(visual_matches)
+            changed.add('visual_matches')
+        if price_samples:
+            self._values['price_samples'] = self._values['price_samples'] + list(price_samples)
+            changed.add('price_samples')
+        if condition is not None and condition != self._values['condition']:
+            self._values['condition'] = condition
+            changed.add('condition')
+
+        diff = {}
+        if 'condition' in changed:
+            diff['condition'] = {'old': self.listing.condition, 'new': condition}
+            self.product.product_information.condition = condition
+            self.listing.condition = condition
+        if 'visual_matches' in changed:
+            self.product.product_information.visual_matches = self._values['visual_matches']
+
+        for node in self.graph.affected(changed):
+            deps, compute = self.graph.nodes[node]
+            if not changed.intersection(deps):
+                continue
+
+            old = self._values.get(node, _MISSING)
+            new = compute(self._get)
+            if old is not _MISSING and old == new:
+                continue
+
+            self._values[node] = new
+            changed.add(node)
+            self._store(node, old, new, diff)
+
+        return diff
+
+    def _get(self, node: str):
+        """Retourne la valeur d'un nœud, en la calculant si elle n'est pas connue"""
+        value = self._values.get(node, _MISSING)
+        if value is _MISSING:
+            deps, compute = self.graph.nodes[node]
+            value = self._values[node] = compute(self._get)
+        return value
+
+    def _store(self, node: str, old, new, diff: Dict):
+        if node in _PRODUCT_FIELDS:
+            section, attribute = _PRODUCT_FIELDS[node]
+            setattr(getattr(self.product, section), attribute, new)
+        elif node in _LISTING_FIELDS:
+            setattr(self.listing, node, new)
+        else:
+            return  # Nœud intermédiaire (section de description)
+        diff[node] = {'old': _plain(old), 'new': _plain(new)}
+
+
+def _plain(value):
+    """Valeur de diff sérialisable : les modèles (PriceRange) passent par to_dict"""
+    return value.to_dict() if hasattr(value, 'to_dict') else value
@@ -0,0 +1,415 @@
+from models.listing import AggregatedProduct, Listing
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from utils.serialization import dumps_json
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import orjson
+
+DEFAULT_INVENTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'inventory.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    hash INTEGER NOT NULL,
+    crop_strategy TEXT NOT NULL DEFAULT 'distinct',
+    analyzed_at REAL NOT NULL,
+    UNIQUE (hash, crop_strategy)
+);
+CREATE TABLE IF NOT EXISTS detections (
+    image_id INTEGER NOT NULL REFERENCES images(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (image_id, position)
+);
+CREATE TABLE IF NOT EXISTS lens_results (
+    image_id INTEGER NOT NULL REFERENCES images(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (image_id, position)
+);
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    image_id INTEGER REFERENCES images(id) ON DELETE SET NULL,
+    platform TEXT NOT NULL,
+    status TEXT NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT,
+    condition TEXT,
+    price REAL,
+    image_path TEXT,
+    listing BLOB NOT NULL,
+    product BLOB,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_class ON detections(class);
+CREATE INDEX IF NOT EXISTS idx_listings_platform_status ON listings(platform, status);
+CREATE INDEX IF NOT EXISTS idx_listings_category ON listings(category);
+CREATE INDEX IF NOT EXISTS idx_listings_price ON listings(price);
+CREATE INDEX IF NOT EXISTS idx_listings_image ON listings(image_id);
+"""
+
+# « Stratégie » des images connues par leurs seules annonces (/analyze/objects) :
+# find_analysis ne la sert jamais, ce n'est pas une stratégie de découpage
+LISTING_ONLY = 'listings'
+
+# Sentinelle de fin pour la tâche d'écriture
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+def log_write_failure(future: asyncio.Future):
+    """Callback de fin d'une écriture non attendue : journalise son échec éventuel"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Écriture dans l'inventaire échouée", exc_info=future.exception())
+
+
+def _signed(image_hash: int) -> int:
+    """Hash perceptuel 64 bits non signé vers un INTEGER SQLite (signé)"""
+    return image_hash - (1 << 64) if image_hash >= 1 << 63 else image_hash
+
+
+_LISTING_COLUMNS = "id, image_id, image_path, platform, status, category, price, listing, updated_at"
+
+
+def _listing_filters(category: Optional[str] = None, platform: Optional[str] = None,
+                     status: Optional[str] = None, min_price: Optional[float] = None,
+                     max_price: Optional[float] = None) -> Tuple[List[str], List]:
+    clauses, parameters = [], []
+    for column, value in (('category', category), ('platform', platform), ('status', status)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            parameters.append(value)
+    if min_price is not None:
+        clauses.append("price >= ?")
+        parameters.append(min_price)
+    if max_price is not None:
+        clauses.append("price <= ?")
+        parameters.append(max_price)
+    return clauses, parameters
+
+
+def _listing_row(row: sqlite3.Row) -> Dict:
+    return {
+        'id': row['id'],
+        'image_id': row['image_id'],
+        'image_path': row['image_path'],
+        'platform': row['platform'],
+        'status': row['status'],
+        'category': row['category'],
+        'price': row['price'],
+        'listing': orjson.loads(row['listing']),
+        'updated_at': row['updated_at']
+    }
+
+
+class InventoryStore:
+    """Inventaire persistant (SQLite en mode WAL) des analyses et des annonces
+
+    Toutes les écritures passent par une file asyncio vidée par une seule tâche
+    d'écriture, qui les regroupe par lots dans une transaction (un point de
+    sauvegarde par opération : une écriture invalide n'annule pas le lot). Les
+    lectures s'exécutent dans des threads, sur une connexion en lecture seule
+    par thread ; le WAL leur permet de ne pas attendre l'écrivain.
+    """
+
+    def __init__(self, path: str = DEFAULT_INVENTORY_PATH, max_batch: int = 256, busy_timeout: float = 5.0):
+        self.path = path
+        self.max_batch = max_batch
+        self.busy_timeout = busy_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._write_connection: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._read_connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Transactions gérées explicitement (BEGIN / COMMIT)
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    # Cycle de vie
+
+    async def start(self):
+        """Crée le schéma et lance la tâche d'écriture"""
+        if self._writer is not None:
+            return
+        self._write_connection = await asyncio.to_thread(self._open_writer)
+        self.queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def _open_writer(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    async def close(self):
+        """Vide la file d'écriture puis ferme les connexions"""
+        if self._writer is None:
+            return
+        await self.queue.put((_STOP, None))
+        await self._writer
+        self._writer = None
+        with self._lock:
+            connections, self._read_connections = self._read_connections, []
+        for connection in connections + [self._write_connection]:
+            connection.close()
+        self._write_connection = None
+        self._local = threading.local()
+
+    # Écritures
+
+    def submit(self, operation: Callable[[sqlite3.Connection], object]) -> asyncio.Future:
+        """Met une opération d'écriture en file ; le futur reçoit son résultat
+
+        Inutile d'attendre le futur pour une écriture « fire and forget » : la
+        tâche d'écriture la traitera avec les suivantes (voir log_write_failure).
+        Inventaire non démarré : l'écriture est ignorée et le futur reçoit None.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._writer is None:
+            logger.warning("Inventaire non démarré (InventoryStore.start) : écriture ignorée")
+            future.set_result(None)
+            return future
+        self.queue.put_nowait((operation, future))
+        return future
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            stop = any(operation is _STOP for operation, _ in batch)
+            batch = [(operation, future) for operation, future in batch if operation is not _STOP]
+            if batch:
+                try:
+                    results = await asyncio.to_thread(self._apply, [operation for operation, _ in batch])
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (_, future), result in zip(batch, results):
+                    if future.cancelled():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            if stop:
+                return
+
+    def _apply(self, operations: List[Callable]) -> List:
+        """Exécute un lot d'écritures dans une seule transaction"""
+        connection = self._write_connection
+        results = []
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for operation in operations:
+                connection.execute("SAVEPOINT operation")
+                try:
+                    results.append(operation(connection))
+                    connection.execute("RELEASE operation")
+                except Exception as e:
+                    connection.execute("ROLLBACK TO operation")
+                    connection.execute("RELEASE operation")
+                    results.append(e)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return results
+
+    def record_analysis(self, image_hash: int, detections: List[Dict], lens_results: List[Dict],
+                        crop_strategy: str = 'distinct') -> asyncio.Future:
+        """Enregistre (ou remplace) l'analyse d'une image pour une stratégie de découpage
+
+        Chaque stratégie a sa propre analyse ; le futur reçoit l'id de l'image.
+        """
+        now = time.time()
+        detection_rows = [
+            (position, detection.get('class', ''), float(detection.get('confidence', 0.0)), dumps_json(detection))
+            for position, detection in enumerate(detections)
+        ]
+        lens_rows = [(position, dumps_json(result)) for position, result in enumerate(lens_results)]
+
+        def operation(connection: sqlite3.Connection) -> int:
+            image_id = connection.execute(
+                "INSERT INTO images (hash, crop_strategy, analyzed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(hash, crop_strategy) DO UPDATE SET analyzed_at = excluded.analyzed_at RETURNING id",
+                (_signed(image_hash), crop_strategy, now)
+            ).fetchone()[0]
+            connection.execute("DELETE FROM detections WHERE image_id = ?", (image_id,))
+            connection.execute("DELETE FROM lens_results WHERE image_id = ?", (image_id,))
+            connection.executemany(
+                "INSERT INTO detections (image_id, position, class, confidence, payload) VALUES (?, ?, ?, ?, ?)",
+                [(image_id, *row) for row in detection_rows]
+            )
+            connection.executemany(
+                "INSERT INTO lens_results (image_id, position, payload) VALUES (?, ?, ?)",
+                [(image_id, *row) for row in lens_rows]
+            )
+            return image_id
+
+        return self.submit(operation)
+
+    def record_listings(self, products: Sequence[AggregatedProduct], listings: Sequence[Listing],
+                        image_hash: Optional[int] = None, platform: str = 'generic',
+                        status: str = 'draft', image_path: Optional[str] = None) -> asyncio.Future:
+        """Enregistre des annonces et leur produit agrégé ; le futur reçoit leurs ids
+
+        Avec `image_hash`, les annonces sont liées à l'analyse la plus récente de
+        l'image ou, à défaut, à une entrée d'image sans analyse (LISTING_ONLY).
+        `image_path` est la photo source conservée (ListingImageStore), reprise à l'export.
+        """
+        now = time.time()
+        rows = []
+        for product, listing in zip(products, listings):
+            product = AggregatedProduct.coerce(product)
+            listing = Listing.coerce(listing)
+            price_range = product.market_analysis.price_range
+            rows.append((
+                platform, status, listing.title, product.product_information.main_category,
+                listing.condition, price_range.average if price_range else None,
+                dumps_json(listing), dumps_json(product), now, now
+            ))
+
+        def operation(connection: sqlite3.Connection) -> List[int]:
+            image_id = None
+            if image_hash is not None:
+                row = connection.execute(
+                    "SELECT id FROM images WHERE hash = ? ORDER BY crop_strategy = ?, analyzed_at DESC LIMIT 1",
+                    (_signed(image_hash), LISTING_ONLY)
+                ).fetchone()
+                image_id = row[0] if row else connection.execute(
+                    "INSERT INTO images (hash, crop_strategy, analyzed_at) VALUES (?, ?, ?) RETURNING id",
+                    (_signed(image_hash), LISTING_ONLY, now)
+                ).fetchone()[0]
+            return [
+                connection.execute(
+                    "INSERT INTO listings (image_id, image_path, platform, status, title, category, condition, "
+                    "price, listing, product, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "RETURNING id",
+                    (image_id, image_path, *row)
+                ).fetchone()[0]
+                for row in rows
+            ]
+
+        return self.submit(operation)
+
+    def update_listing(self, listing_id: int, status: Optional[str] = None,
+                       price: Optional[float] = None) -> asyncio.Future:
+        """Met à jour le statut et/ou le prix d'une annonce (publication, revalorisation)"""
+        def operation(connection: sqlite3.Connection) -> bool:
+            cursor = connection.execute(
+                "UPDATE listings SET status = COALESCE(?, status), price = COALESCE(?, price), "
+                "updated_at = ? WHERE id = ?",
+                (status, price, time.time(), listing_id)
+            )
+            return cursor.rowcount > 0
+
+        return self.submit(operation)
+
+    # Lectures
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            connection.execute("PRAGMA query_only = ON")
+            connection.row_factory = sqlite3.Row
+            with self._lock:
+                self._read_connections.append(connection)
+        return connection
+
+    async def _read(self, query: Callable[[sqlite3.Connection], object]):
+        # Exécutée dans le pool de threads : la boucle d'événements n'attend jamais SQLite
+        return await asyncio.to_thread(lambda: query(self._reader()))
+
+    async def find_analysis(self, image_hash: int, crop_strategy: str = 'distinct') -> Optional[Dict]:
+        """Analyse déjà enregistrée pour ce hash exact et cette stratégie de découpage, au format de /analyze"""
+        if crop_strategy == LISTING_ONLY:
+            return None
+
+        def query(connection: sqlite3.Connection) -> Optional[Dict]:
+            image = connection.execute(
+                "SELECT id, analyzed_at FROM images WHERE hash = ? AND crop_strategy = ?",
+                (_signed(image_hash), crop_strategy)
+            ).fetchone()
+            if image is None:
+                return None
+            detections = connection.execute(
+                "SELECT payload FROM detections WHERE image_id = ? ORDER BY position", (image['id'],)
+            ).fetchall()
+            lens_results = connection.execute(
+                "SELECT payload FROM lens_results WHERE image_id = ? ORDER BY position", (image['id'],)
+            ).fetchall()
+            return {
+                'object_detection': [orjson.loads(row['payload']) for row in detections],
+                'lens_analysis': [orjson.loads(row['payload']) for row in lens_results],
+                'analyzed_at': image['analyzed_at']
+            }
+
+        return await self._read(query)
+
+    async def catalog(self, limit: int = 100_000) -> List[Tuple[int, Listing]]:
+        """(id, annonce) des annonces enregistrées, des plus récentes aux plus anciennes"""
+        def query(connection: sqlite3.Connection) -> List[Tuple[int, Listing]]:
+            rows = connection.execute(
+                "SELECT id, listing FROM listings ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [(row['id'], Listing.from_dict(orjson.loads(row['listing']))) for row in rows]
+
+        return await self._read(query)
+
+    async def search_listings(self, category: Optional[str] = None, platform: Optional[str] = None,
+                              status: Optional[str] = None, min_price: Optional[float] = None,
+                              max_price: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Annonces filtrées par catégorie, plateforme, statut et fourchette de prix"""
+        clauses, parameters = _listing_filters(category, platform, status, min_price, max_price)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        def query(connection: sqlite3.Connection) -> List[Dict]:
+            rows = connection.execute(
+                f"SELECT {_LISTING_COLUMNS} FROM listings {where} ORDER BY id DESC LIMIT ?",
+                (*parameters, limit)
+            ).fetchall()
+            return [_listing_row(row) for row in rows]
+
+        return await self._read(query)
+
+    async def iter_listings(self, category: Optional[str] = None, platform: Optional[str] = None,
+                            status: Optional[str] = None, batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """Toutes les annonces filtrées, par ordre d'id, lues par lots (mémoire bornée)"""
+        clauses, parameters = _listing_filters(category, platform, status)
+        where = ' AND '.join(clauses + ['id > ?'])
+        last_id = 0
+
+        while True:
+            def query(connection: sqlite3.Connection, after: int = last_id) -> List[Dict]:
+                rows = connection.execute(
+                    f"SELECT {_LISTING_COLUMNS} FROM listings WHERE {where} ORDER BY id LIMIT ?",
+                    (*parameters, after, batch_size)
+                ).fetchall()
+                return [_listing_row(row) for row in rows]
+
+            batch = await self._read(query)
+            for listing in batch:
+                yield listing
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1]['id']
+
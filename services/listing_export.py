@@ -0,0 +1,431 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from models.listing import Listing
+from services.platform_rules import PlatformRulebook, PlatformRules, get_platform_rules
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from utils.lazy import lazy_import
+import asyncio
+import csv
+import gzip
+import io
+import multiprocessing
+import os
+import re
+import tarfile
+import orjson
+
+cv2 = lazy_import('cv2')
+
+# Nombre d'images transmises à un worker du pool par appel (amortit l'IPC)
+IMAGE_BATCH_SIZE = 32
+
+# Identifiants utilisés tels quels comme noms de fichiers (images, membres tar) :
+# ni séparateur de chemin, ni '..' en tête, ni caractère de contrôle
+_SAFE_ID_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,127}')
+
+
+@dataclass(slots=True)
+class ExportItem:
+    """Annonce à exporter, avant optimisation par plateforme"""
+    listing_id: str
+    listing: Listing
+    price: Optional[float] = None
+    currency: str = 'EUR'
+    image_path: Optional[str] = None
+    url: Optional[str] = None
+
+    def __post_init__(self):
+        # Les ids de l'inventaire sont des entiers
+        self.listing_id = str(self.listing_id)
+        if not _SAFE_ID_PATTERN.fullmatch(self.listing_id):
+            raise ValueError(f"Identifiant d'annonce invalide pour l'export: {self.listing_id!r}")
+
+
+@dataclass(slots=True)
+class ExportRecord:
+    """Annonce optimisée pour une plateforme, prête à être sérialisée"""
+    item: ExportItem
+    listing: Listing
+    image: Optional[str] = None
+
+
+def reencode_images(jobs: Sequence[Tuple[str, str, Tuple[int, int], int]]) -> List[bool]:
+    """Redimensionne et réencode en JPEG un lot d'images (exécuté dans le pool de processus)
+
+    Chaque job est (source, destination, (largeur, hauteur) maximales, qualité).
+    Une destination déjà présente est conservée : relancer un export interrompu
+    ne réencode que les images manquantes (les flux, eux, sont réécrits
+    entièrement). L'écriture passe par un fichier temporaire renommé.
+    """
+    results = []
+    for source, destination, (max_width, max_height), quality in jobs:
+        if os.path.exists(destination):
+            results.append(True)
+            continue
+        image = cv2.imread(source, cv2.IMREAD_COLOR)
+        if image is None:
+            results.append(False)
+            continue
+        height, width = image.shape[:2]
+        scale = min(max_width / width, max_height / height, 1.0)
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        encoded, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not encoded:
+            results.append(False)
+            continue
+        temporary = destination + '.part'
+        with open(temporary, 'wb') as image_file:
+            image_file.write(buffer.tobytes())
+        os.replace(temporary, destination)
+        results.append(True)
+    return results
+
+
+def full_text(listing: Listing, max_length: int) -> str:
+    """Description, points forts et appel à l'action en un seul texte borné"""
+    parts = [listing.description]
+    if listing.highlights:
+        parts.append("\n".join(f"- {highlight}" for highlight in listing.highlights))
+    if listing.call_to_action:
+        parts.append(listing.call_to_action)
+    return "\n\n".join(part for part in parts if part)[:max_length]
+
+
+class FeedWriter(ABC):
+    """Flux d'export compressé (gzip), écrit par blocs d'annonces
+
+    Un bloc est sérialisé en mémoire puis écrit en un seul appel : la mémoire
+    reste bornée par la taille d'un bloc, quel que soit le nombre d'annonces.
+    Les sous-classes implémentent `_write_records`.
+    """
+
+    extension = ''
+
+    def __init__(self, path: str, rules: PlatformRules, image_base_url: str = '', compresslevel: int = 6):
+        self.path = path
+        self.rules = rules
+        self.image_base_url = image_base_url.rstrip('/')
+        self.compresslevel = compresslevel
+        self.written = 0
+        self._file = None
+
+    def open(self):
+        self._file = gzip.open(self.path, 'wb', compresslevel=self.compresslevel)
+        self._write_header()
+
+    def write_chunk(self, records: List[ExportRecord]) -> int:
+        self._write_records(records)
+        self.written += len(records)
+        return len(records)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_header(self):
+        pass
+
+    @abstractmethod
+    def _write_records(self, records: List[ExportRecord]):
+        """Écrit un bloc d'annonces dans le fichier ouvert"""
+
+    def _image_link(self, record: ExportRecord) -> str:
+        if not record.image:
+            return ''
+        return f"{self.image_base_url}/{record.image}" if self.image_base_url else record.image
+
+    @staticmethod
+    def _price(item: ExportItem) -> str:
+        return f"{item.price:.2f}" if item.price is not None else ''
+
+
+class CsvFeedWriter(FeedWriter):
+    extension = '.csv.gz'
+    columns: Tuple[str, ...] = ()
+    delimiter = ','
+
+    def _write_header(self):
+        self._file.write(self._csv_bytes([dict(zip(self.columns, self.columns))]))
+
+    def _write_records(self, records: List[ExportRecord]):
+        self._file.write(self._csv_bytes([self._row(record) for record in records]))
+
+    def _csv_bytes(self, rows: List[Dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, delimiter=self.delimiter,
+                                extrasaction='ignore', lineterminator='\n')
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    @abstractmethod
+    def _row(self, record: ExportRecord) -> Dict:
+        """Ligne CSV d'une annonce, indexée par les noms de `columns`"""
+
+
+class LeboncoinCsvWriter(CsvFeedWriter):
+    """Flux CSV d'import en masse leboncoin (séparateur point-virgule)"""
+
+    columns = ('reference', 'titre', 'description', 'prix', 'etat', 'photo')
+    delimiter = ';'
+
+    def _row(self, record: ExportRecord) -> Dict:
+        return {
+            'reference': record.item.listing_id,
+            'titre': record.listing.title,
+            'description': full_text(record.listing, self.rules.description_length),
+            'prix': self._price(record.item),
+            'etat': record.listing.condition or '',
+            'photo': self._image_link(record)
+        }
+
+
+class FacebookCatalogMixin:
+    """Champs du catalogue produits Facebook (Commerce Manager)"""
+
+    columns = ('id', 'title', 'description', 'availability', 'condition', 'price', 'link', 'image_link')
+
+    def _row(self, record: ExportRecord) -> Dict:
+        item = record.item
+        category = self.rules.condition_category(record.listing.condition)
+        return {
+            'id': item.listing_id,
+            'title': record.listing.title,
+            'description': full_text(record.listing, self.rules.description_length),
+            'availability': 'in stock',
+            'condition': 'new' if category == 'NEW' else 'used',
+            'price': f"{self._price(item)} {item.currency}" if item.price is not None else '',
+            'link': item.url or '',
+            'image_link': self._image_link(record)
+        }
+
+
+class FacebookCatalogCsvWriter(FacebookCatalogMixin, CsvFeedWriter):
+    pass
+
+
+class FacebookCatalogJsonlWriter(FacebookCatalogMixin, FeedWriter):
+    extension = '.jsonl.gz'
+
+    def _write_records(self, records: List[ExportRecord]):
+        self._file.write(b''.join(orjson.dumps(self._row(record)) + b'\n' for record in records))
+
+
+class InstagramCaptionWriter(FeedWriter):
+    """Archive tar.gz d'une légende par annonce (<id>.txt), écrite en flux"""
+
+    extension = '.tar.gz'
+
+    def open(self):
+        super().open()
+        self._archive = tarfile.open(fileobj=self._file, mode='w|')
+
+    def _write_records(self, records: List[ExportRecord]):
+        for record in records:
+            data = self._caption(record).encode('utf-8')
+            info = tarfile.TarInfo(f"{record.item.listing_id}.txt")
+            info.size = len(data)
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        if self._file is not None:
+            self._archive.close()
+        super().close()
+
+    def _caption(self, record: ExportRecord) -> str:
+        listing = record.listing
+        hashtags = " ".join(listing.platform_specific.get('hashtag_groups') or listing.tags)
+        caption = f"{listing.title}\n\n{full_text(listing, self.rules.description_length)}"
+        caption = caption[:self.rules.description_length]
+        # Les hashtags passent en fin de légende, dans la limite de la plateforme
+        room = self.rules.description_length - len(caption) - 2
+        if hashtags and room > 0:
+            if len(hashtags) > room:
+                hashtags = hashtags[:room].rsplit(' ', 1)[0]
+            caption = f"{caption}\n\n{hashtags}"
+        return caption
+
+
+WRITERS = {
+    'leboncoin_csv': LeboncoinCsvWriter,
+    'facebook_csv': FacebookCatalogCsvWriter,
+    'facebook_jsonl': FacebookCatalogJsonlWriter,
+    'instagram_captions': InstagramCaptionWriter,
+}
+
+
+async def _chunks(items: Union[Iterable[ExportItem], AsyncIterable[ExportItem]], size: int):
+    """Découpe un flux (synchrone ou asynchrone) d'annonces en blocs"""
+    chunk = []
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def inventory_items(inventory, category: Optional[str] = None, status: Optional[str] = None,
+                          listing_url: str = '', currency: str = 'EUR'):
+    """Annonces de l'inventaire (services.inventory_store) à exporter, lues par lots
+
+    L'id de l'annonce dans l'inventaire sert de référence et sa photo source
+    enregistrée est réencodée pour chaque plateforme ; `listing_url`, si
+    fourni, donne le lien public de chaque annonce (`<listing_url>/<id>`).
+    """
+    listing_url = listing_url.rstrip('/')
+    async for row in inventory.iter_listings(category=category, status=status):
+        yield ExportItem(
+            listing_id=row['id'],
+            listing=Listing.from_dict(row['listing']),
+            price=row['price'],
+            currency=currency,
+            image_path=row['image_path'],
+            url=f"{listing_url}/{row['id']}" if listing_url else None
+        )
+
+
+class ListingExporter:
+    """Export en masse des annonces optimisées vers les flux de chaque plateforme
+
+    Les annonces sont lues et traitées par blocs : optimisation par
+    PlatformOptimizerEngine, réencodage des images aux tailles de
+    config/platforms.json dans un pool de processus, puis écriture compressée
+    dans un thread. Le réencodage du bloc suivant se fait pendant l'écriture
+    du bloc courant ; au plus deux blocs sont en mémoire.
+    """
+
+    def __init__(self, optimizer, platform_rules: PlatformRulebook = None, chunk_size: int = 1000,
+                 image_workers: Optional[int] = None, image_quality: int = 85,
+                 image_base_url: str = '', compresslevel: int = 6):
+        self.optimizer = optimizer
+        self.platform_rules = platform_rules or get_platform_rules()
+        self.chunk_size = chunk_size
+        self.image_workers = image_workers
+        self.image_quality = image_quality
+        self.image_base_url = image_base_url
+        self.compresslevel = compresslevel
+        self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn : le processus parent a déjà des threads (boucle, écriture,
+            # inférence), un fork pourrait hériter d'un verrou tenu
+            self._pool = ProcessPoolExecutor(max_workers=self.image_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def export_platforms(self) -> List[str]:
+        """Plateformes disposant d'au moins un format d'export"""
+        return [name for name, rules in self.platform_rules.platforms.items() if rules.export_formats]
+
+    async def export(self, items: Union[Iterable[ExportItem], AsyncIterable[ExportItem]],
+                     output_dir: str, platforms: List[str] = None) -> Dict:
+        """Exporte les annonces et retourne le nombre d'annonces écrites par fichier"""
+        rules_by_platform = {}
+        for platform in platforms or self.export_platforms():
+            rules = self.platform_rules.get(platform)
+            if rules is None or not rules.export_formats:
+                raise ValueError(f"Aucun format d'export pour la plateforme: {platform}")
+            unknown = [name for name in rules.export_formats if name not in WRITERS]
+            if unknown:
+                raise ValueError(f"Format d'export inconnu: {', '.join(unknown)}")
+            rules_by_platform[rules.name] = rules
+
+        os.makedirs(output_dir, exist_ok=True)
+        writers = {
+            platform: [
+                WRITERS[name](
+                    os.path.join(output_dir, f"{platform}-{name}{WRITERS[name].extension}"),
+                    rules, self.image_base_url, self.compresslevel
+                )
+                for name in rules.export_formats
+            ]
+            for platform, rules in rules_by_platform.items()
+        }
+        for platform_writers in writers.values():
+            for writer in platform_writers:
+                writer.open()
+
+        images = 0
+        pending = encoding = None
+        try:
+            async for chunk in _chunks(items, self.chunk_size):
+                encoding = asyncio.create_task(self._reencode_chunk(chunk, rules_by_platform, output_dir))
+                if pending is not None:
+                    images += await self._write_chunk(*pending, rules_by_platform, writers)
+                pending = (chunk, encoding)
+            if pending is not None:
+                images += await self._write_chunk(*pending, rules_by_platform, writers)
+        except BaseException:
+            # Échec d'un bloc : le réencodage du bloc suivant n'a plus de destinataire
+            if encoding is not None and not encoding.done():
+                encoding.cancel()
+            raise
+        finally:
+            for platform_writers in writers.values():
+                for writer in platform_writers:
+                    await asyncio.to_thread(writer.close)
+
+        return {
+            'files': {writer.path: writer.written for platform_writers in writers.values() for writer in platform_writers},
+            'images': images
+        }
+
+    async def _write_chunk(self, chunk: List[ExportItem], encoding: asyncio.Task,
+                           rules_by_platform: Dict[str, PlatformRules], writers: Dict[str, List[FeedWriter]]) -> int:
+        images_by_size = await encoding
+        for platform, rules in rules_by_platform.items():
+            listings = await asyncio.gather(*(
+                self.optimizer.optimize_for_platform(item.listing, platform) for item in chunk
+            ))
+            images = images_by_size.get(rules.image_size) or [None] * len(chunk)
+            records = [ExportRecord(item, listing, image) for item, listing, image in zip(chunk, listings, images)]
+            for writer in writers[platform]:
+                # Compression et écriture disque hors de la boucle d'événements
+                await asyncio.to_thread(writer.write_chunk, records)
+        return sum(image is not None for images in images_by_size.values() for image in images)
+
+    async def _reencode_chunk(self, chunk: List[ExportItem], rules_by_platform: Dict[str, PlatformRules],
+                              output_dir: str) -> Dict[Tuple[int, int], List[Optional[str]]]:
+        """Chemins relatifs des images réencodées, par taille (une seule fois par taille)"""
+        sizes = {rules.image_size for rules in rules_by_platform.values() if rules.image_size}
+        loop = asyncio.get_running_loop()
+        images_by_size = {}
+        for size in sizes:
+            directory = os.path.join('images', f"{size[0]}x{size[1]}")
+            os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+            indices, jobs = [], []
+            for index, item in enumerate(chunk):
+                if item.image_path:
+                    relative = os.path.join(directory, f"{item.listing_id}.jpg")
+                    indices.append(index)
+                    jobs.append((item.image_path, os.path.join(output_dir, relative), size, self.image_quality))
+
+            batches = [jobs[i:i + IMAGE_BATCH_SIZE] for i in range(0, len(jobs), IMAGE_BATCH_SIZE)]
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self.pool, reencode_images, batch) for batch in batches
+            ))
+            images = [None] * len(chunk)
+            for index, job, encoded in zip(indices, jobs, (ok for batch in results for ok in batch)):
+                if encoded:
+                    images[index] = os.path.relpath(job[1], output_dir)
+            images_by_size[size] = images
+        return images_by_size
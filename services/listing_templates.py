@@ -0,0 +1,287 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+from models.listing import AggregatedProduct, Listing, PriceRange
+import json
+import os
+import re
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'listing_templates.json')
+
+# Syntaxe des gabarits :
+#   {champ}            valeur du contexte
+#   {champ|filtre:arg} valeur transformée par un filtre (dash, bullet, lower)
+#   [[ ... ]]          segment rendu seulement si tous ses champs sont renseignés
+# Un champ de gabarit peut aussi être {"join": sep, "parts": [...]} (parties
+# non vides jointes) ou {"first": [...]} (première alternative non vide).
+_SEGMENT_PATTERN = re.compile(r'\[\[(.*?)\]\]', re.DOTALL)
+_FIELD_PATTERN = re.compile(r'\{(\w+)(?:\|(\w+)(?::(\w+))?)?\}')
+
+TEMPLATE_FIELDS = ('title', 'usp', 'opening', 'main', 'technical', 'market', 'highlight_condition', 'cta')
+
+
+def _present(value) -> bool:
+    # 0 est une valeur valide (prix) ; seuls None et les vides sont absents
+    return value is not None and value != '' and value != [] and value != ()
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value)
+
+
+def _limit(items, limit):
+    return items[:limit] if limit else items
+
+
+# Filtres de liste acceptant une limite ({champ|dash:5})
+_LIMIT_FILTERS = ('dash', 'bullet')
+_FILTERS = {
+    'dash': lambda items, arg: "\n".join(f"- {item}" for item in _limit(items, arg)),
+    'bullet': lambda items, arg: "\n".join(f"• {item}" for item in _limit(items, arg)),
+    'lower': lambda value, arg: _text(value).lower() if _present(value) else '',
+}
+
+
+class TemplateCompiler:
+    """Compile les gabarits déclaratifs en fonctions Python natives
+
+    Chaque gabarit est traduit une seule fois en une expression Python
+    (concaténations, conditions) évaluée en lambda : le rendu ne fait plus
+    aucune analyse de chaîne. Le gabarit n'entre dans l'expression que sous
+    forme de littéraux (repr) et de noms de champs validés ; toute erreur de
+    configuration est levée ici (ValueError), jamais au rendu.
+    """
+
+    def compile(self, template, name: str) -> Callable[[Dict], str]:
+        source = f"lambda v: {self._expression(template)}"
+        namespace = {'_present': _present, '_text': _text, '_filters': _FILTERS}
+        return eval(compile(source, f"<template {name}>", 'eval'), namespace)
+
+    def _expression(self, template) -> str:
+        if isinstance(template, dict):
+            if 'join' in template:
+                if not isinstance(template['join'], str) or not isinstance(template.get('parts'), list):
+                    raise ValueError(f"Gabarit invalide: {template}")
+                parts = ', '.join(self._expression(part) for part in template['parts'])
+                return f"{template['join']!r}.join(part for part in ({parts},) if part)"
+            if 'first' in template and isinstance(template['first'], list):
+                alternatives = [self._expression(alternative) for alternative in template['first']]
+                return '(' + ' or '.join(alternatives) + ')'
+            raise ValueError(f"Gabarit invalide: {template}")
+        if not isinstance(template, str):
+            raise ValueError(f"Gabarit invalide: {template!r}")
+
+        pieces = []
+        position = 0
+        for match in _SEGMENT_PATTERN.finditer(template):
+            pieces.extend(self._string_pieces(template[position:match.start()]))
+            segment_pieces = self._string_pieces(match.group(1))
+            fields = sorted(set(_FIELD_PATTERN.findall(match.group(1))))
+            guard = ' and '.join(f"_present(v.get({field!r}))" for field, _, _ in fields) or 'True'
+            pieces.append(f"({self._concat(segment_pieces)} if {guard} else '')")
+            position = match.end()
+        pieces.extend(self._string_pieces(template[position:]))
+        return self._concat(pieces)
+
+    def _string_pieces(self, text: str) -> List[str]:
+        pieces = []
+        position = 0
+        for match in _FIELD_PATTERN.finditer(text):
+            if match.start() > position:
+                pieces.append(repr(text[position:match.start()]))
+            field, filter_name, arg = match.groups()
+            if filter_name:
+                if filter_name not in _FILTERS:
+                    raise ValueError(f"Filtre de gabarit inconnu: {filter_name}")
+                if arg is not None and (filter_name not in _LIMIT_FILTERS or not arg.isdigit()):
+                    raise ValueError(f"Argument de filtre invalide: {filter_name}:{arg}")
+                limit = int(arg) if arg else None
+                pieces.append(f"_filters[{filter_name!r}](v.get({field!r}) or [], {limit!r})")
+            else:
+                pieces.append(f"_text(v.get({field!r}))")
+            position = match.end()
+        if position < len(text):
+            pieces.append(repr(text[position:]))
+        return pieces
+
+    def _concat(self, pieces: List[str]) -> str:
+        return ' + '.join(pieces) if pieces else "''"
+
+
+class TemplateSet:
+    """Gabarits compilés pour une locale, une catégorie et une plateforme"""
+
+    def __init__(self, locale: str, renderers: Dict[str, Callable], conditions: Dict[str, str],
+                 default_condition: str):
+        self.locale = locale
+        self.conditions = conditions
+        self.default_condition = default_condition
+        self._title = renderers['title']
+        # Argument de vente constant : rendu une fois pour toutes
+        self._usp = renderers['usp']({})
+        self._opening = renderers['opening']
+        self._main = renderers['main']
+        self._technical = renderers['technical']
+        self._market = renderers['market']
+        self._highlight_condition = renderers['highlight_condition']
+        self._cta = renderers['cta']
+
+    def condition_label(self, condition: str) -> str:
+        return self.conditions.get(condition, condition)
+
+    def title(self, product_name: str, condition: str, price_competitiveness: str) -> str:
+        return self._title({
+            'product_name': product_name,
+            # L'état par défaut n'apporte rien au titre
+            'condition_title': self.condition_label(condition) if condition != self.default_condition else '',
+            'usp': self._usp if price_competitiveness == 'competitive' else ''
+        })
+
+    def opening(self, product_name: str, condition: str) -> str:
+        return self._opening({'product_name': product_name, 'condition': self.condition_label(condition)})
+
+    def main(self, specifications: List[str]) -> str:
+        return self._main({'specifications': specifications})
+
+    def technical(self, features: List[str]) -> str:
+        return self._technical({'features': features})
+
+    def market(self, price_range: Optional[PriceRange]) -> str:
+        if not price_range:
+            return ''
+        return self._market({'price_min': price_range.min, 'price_max': price_range.max})
+
+    def description(self, sections: Iterable[str]) -> str:
+        return "\n\n".join(filter(None, sections))
+
+    def highlights(self, features: List[str], condition: str) -> List[str]:
+        highlights = list(features[:5])
+        condition_line = self._highlight_condition({'condition': self.condition_label(condition) if condition else None})
+        if condition_line:
+            highlights.append(condition_line)
+        return highlights
+
+    def tags(self, market_categories: List[str], product_name: str, condition: str) -> List[str]:
+        tags = set(market_categories)
+        tags.add(product_name.lower())
+        if condition:
+            tags.add(self.condition_label(condition).lower())
+        return list(tags)
+
+    def cta(self, price_range: Optional[PriceRange]) -> str:
+        return self._cta({'price_average': price_range.average if price_range else None})
+
+    def render(self, product: AggregatedProduct) -> Listing:
+        """Rend une annonce complète à partir d'un produit agrégé
+
+        Mêmes fonctions par champ que le recalcul incrémental
+        (services.incremental_listing) : les deux rendus ne peuvent diverger.
+        """
+        info = product.product_information
+        market = product.market_analysis
+        details = product.technical_details
+        condition = info.condition
+
+        return Listing(
+            title=self.title(info.product_name, condition, market.competition_analysis.price_competitiveness),
+            description=self.description((
+                self.opening(info.product_name, condition),
+                self.main(details.specifications),
+                self.technical(details.features),
+                self.market(market.price_range)
+            )),
+            highlights=self.highlights(details.features, condition),
+            tags=self.tags(market.market_categories, info.product_name, condition),
+            call_to_action=self.cta(market.price_range),
+            condition=condition
+        )
+
+
+class ListingTemplateEngine:
+    """Moteur de gabarits d'annonces multi-locales, compilé une fois au démarrage"""
+
+    def __init__(self, config: Dict):
+        self.default_condition = config['default_condition']
+        self.category_groups = {
+            detected_class: group
+            for group, classes in config.get('categories', {}).items()
+            for detected_class in classes
+        }
+        self.locales = tuple(config['locales'])
+        self._sets = self._compile_all(config)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_TEMPLATES_PATH) -> 'ListingTemplateEngine':
+        with open(path, encoding='utf-8') as config_file:
+            return cls(json.load(config_file))
+
+    def _compile_all(self, config: Dict) -> Dict:
+        compiler = TemplateCompiler()
+        sets = {}
+        for locale, locale_config in config['locales'].items():
+            templates = locale_config['templates']
+            default = templates['default']
+            missing = [field for field in TEMPLATE_FIELDS if field not in default]
+            if missing:
+                raise ValueError(f"Gabarits manquants pour {locale}: {missing}")
+
+            categories = [None] + [key.split(':', 1)[1] for key in templates if key.startswith('category:')]
+            platforms = [None] + [key.split(':', 1)[1] for key in templates if key.startswith('platform:')]
+
+            for category in categories:
+                for platform in platforms:
+                    # Priorité : plateforme > catégorie > défaut
+                    merged = dict(default)
+                    if category:
+                        merged.update(templates[f"category:{category}"])
+                    if platform:
+                        merged.update(templates[f"platform:{platform}"])
+
+                    name = f"{locale}/{category or 'default'}/{platform or 'default'}"
+                    renderers = {
+                        field: compiler.compile(merged[field], f"{name}/{field}")
+                        for field in TEMPLATE_FIELDS
+                    }
+                    sets[(locale, category, platform)] = TemplateSet(
+                        locale, renderers, locale_config.get('conditions', {}), self.default_condition
+                    )
+        return sets
+
+    def template_set(self, locale: str = 'fr', category: Optional[str] = None,
+                     platform: Optional[str] = None) -> TemplateSet:
+        """Retourne les gabarits compilés les plus spécifiques disponibles"""
+        if locale not in self.locales:
+            raise ValueError(f"Locale non supportée: {locale}")
+
+        group = self.category_groups.get(category)
+        platform = platform.lower() if platform else None
+        for key in ((locale, group, platform), (locale, group, None),
+                    (locale, None, platform), (locale, None, None)):
+            if key in self._sets:
+                return self._sets[key]
+
+    def templates_for(self, product: AggregatedProduct, locale: str = 'fr',
+                      platform: Optional[str] = None) -> TemplateSet:
+        return self.template_set(locale, product.product_information.main_category, platform)
+
+    def render(self, product: AggregatedProduct, locale: str = 'fr',
+               platform: Optional[str] = None) -> Listing:
+        return self.templates_for(product, locale, platform).render(product)
+
+    def render_many(self, products: Iterable[AggregatedProduct], locale: str = 'fr',
+                    platform: Optional[str] = None) -> List[Listing]:
+        """Rendu en masse : la résolution des gabarits est mémorisée par catégorie"""
+        resolved = {}
+        listings = []
+        for product in products:
+            category = product.product_information.main_category
+            templates = resolved.get(category)
+            if templates is None:
+                templates = resolved[category] = self.template_set(locale, category, platform)
+            listings.append(templates.render(product))
+        return listings
+
+
+@lru_cache(maxsize=None)
+def get_template_engine(path: str = DEFAULT_TEMPLATES_PATH) -> ListingTemplateEngine:
+    """Moteur partagé par le processus, compilé au premier appel"""
+    return ListingTemplateEngine.from_file(path)
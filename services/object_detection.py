@@ -1,33 +1,141 @@
-from ultralytics import YOLO
-import cv2
+from concurrent.futures import ThreadPoolExecutor
+from utils.lazy import lazy_import
+import asyncio
 import numpy as np
 import io
 
+cv2 = lazy_import('cv2')
+
+# Échelle de modèles, du moins coûteux au plus précis : (poids, imgsz)
+DEFAULT_LADDER = (
+    ('yolov8n.pt', 640),
+    ('yolov8s.pt', 640),
+    ('yolov8m.pt', 832),
+)
+
 class ObjectDetectionService:
-    def __init__(self):
-        self.model = YOLO('yolov8n.pt')  # Utiliser le modèle nano pour commencer
-        
+    def __init__(self, ladder=DEFAULT_LADDER, confidence_target: float = 0.5):
+        self.ladder = tuple(ladder)
+        # Confiance minimale de la meilleure détection pour s'arrêter à un barreau
+        self.confidence_target = confidence_target
+        # Modèles chargés à la demande, partagés entre barreaux de mêmes poids
+        self.models = {}
+        self.model = self._load(self.ladder[0][0])  # Utiliser le modèle nano pour commencer
+        # Compteurs exposés par /health/load : analyses complètes, analyses à
+        # résolution réduite et passages de chaque barreau au suivant
+        self.ladder_runs = 0
+        self.reduced_runs = 0
+        self.escalations = [0] * len(self.ladder)
+        # Inférence hors de la boucle d'événements, sur un thread dédié : les
+        # modèles YOLO ne sont pas sûrs entre threads. Le thread n'est créé
+        # qu'à la première inférence, donc après le fork des workers.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='yolo')
+
+    def _load(self, weights):
+        model = self.models.get(weights)
+        if model is None:
+            # ultralytics (et torch) ne sont importés qu'au chargement du premier modèle
+            from ultralytics import YOLO
+            model = self.models[weights] = YOLO(weights)
+        return model
+
+    def preload(self):
+        """Charge tous les modèles de l'échelle (avant le fork des workers)"""
+        for weights, _ in self.ladder:
+            self._load(weights)
+
     async def detect_objects(self, image_bytes):
         try:
-            # Convertir les bytes en numpy array
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            # Faire la détection
-            results = self.model(image)
-            
-            # Extraire les résultats
-            detections = []
-            for r in results:
-                for box in r.boxes:
-                    obj = {
-                        "class": r.names[int(box.cls[0])],
-                        "confidence": float(box.conf[0]),
-                        "bbox": box.xyxy[0].tolist()
-                    }
-                    detections.append(obj)
-            
-            return detections
-            
+            image = self.decode_image(image_bytes)
+            return await self.detect_objects_in_image(image)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la détection d'objets: {str(e)}")
+
+    def decode_image(self, image_bytes):
+        """Décode les bytes d'une image en tableau numpy BGR"""
+        # Convertir les bytes en numpy array
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Image illisible ou format non supporté")
+        return image
+
+    async def detect_objects_in_image(self, image, imgsz: int = None, escalate: bool = True):
+        """Détecte les objets dans une image déjà décodée (évite un second décodage)
+
+        Le modèle le moins coûteux est essayé en premier ; on ne passe au
+        barreau suivant que si sa meilleure détection reste sous
+        `confidence_target`, et l'on garde le résultat le plus confiant.
+        `imgsz` force une résolution réduite sur le premier barreau, sans
+        escalade (mode dégradé sous charge) ; les bbox restent exprimées dans
+        les coordonnées de l'image d'origine.
+        """
+        try:
+            if imgsz:
+                self.reduced_runs += 1
+                return await self.run_in_executor(self._detect, image, self.ladder[0][0], imgsz)
+
+            rungs = self.ladder if escalate else self.ladder[:1]
+            self.ladder_runs += 1
+            best_confidence, best = -1.0, []
+            for level, (weights, size) in enumerate(rungs):
+                detections = await self.run_in_executor(self._detect, image, weights, size)
+                top = max((d['confidence'] for d in detections), default=0.0)
+                if top > best_confidence:
+                    best_confidence, best = top, detections
+                # Aucune détection : pas d'objet à confirmer, inutile de monter
+                if not detections or top >= self.confidence_target:
+                    break
+                if level + 1 < len(rungs):
+                    self.escalations[level] += 1
+
+            return best
+
         except Exception as e:
             raise Exception(f"Erreur lors de la détection d'objets: {str(e)}")
+
+    def ladder_stats(self):
+        """Nombre d'escalades par barreau (poids@imgsz), rapporté au nombre d'analyses"""
+        return {
+            'runs': self.ladder_runs,
+            'reduced_runs': self.reduced_runs,
+            'escalations': {
+                self._model_name(weights, size): count
+                for (weights, size), count in zip(self.ladder, self.escalations)
+            }
+        }
+
+    async def run_in_executor(self, function, *args):
+        """Exécute un traitement d'image bloquant sur le thread d'inférence"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _model_name(weights, imgsz):
+        return f"{weights.rsplit('.', 1)[0]}@{imgsz}"
+
+    def _detect(self, image, weights, imgsz):
+        # Faire la détection
+        results = self._load(weights)(image, imgsz=imgsz)
+
+        # Extraire les résultats en un seul transfert par image ; les bbox
+        # restent des tableaux numpy, sérialisés nativement par orjson
+        model_name = self._model_name(weights, imgsz)
+        detections = []
+        for r in results:
+            boxes = r.boxes.xyxy.cpu().numpy()
+            confidences = r.boxes.conf.cpu().numpy()
+            classes = r.boxes.cls.cpu().numpy().astype(int)
+            for bbox, confidence, class_id in zip(boxes, confidences, classes):
+                obj = {
+                    "class": r.names[class_id],
+                    "confidence": float(confidence),
+                    "bbox": bbox,
+                    "model": model_name
+                }
+                detections.append(obj)
+
+        return detections
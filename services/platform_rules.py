@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+import json
+import os
+import re
+
+DEFAULT_PLATFORMS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'platforms.json')
+
+
+@dataclass(frozen=True, slots=True)
+class PlatformRules:
+    """Règles d'une plateforme, précompilées à partir de config/platforms.json"""
+    name: str
+    title_length: int
+    description_length: int
+    tags_count: int
+    cta: Optional[str] = None
+    forbidden_words: Tuple[str, ...] = ()
+    forbidden_pattern: Optional[Pattern] = None
+    condition_map: Dict[str, str] = field(default_factory=dict)
+    default_condition: Optional[str] = None
+    marketplace_category: Optional[str] = None
+    emojis: bool = False
+    hashtags: bool = False
+    highlight_prefix: str = ''
+    story: bool = False
+    # Export en masse : formats de flux et taille maximale des images (l, h)
+    export_formats: Tuple[str, ...] = ()
+    image_size: Optional[Tuple[int, int]] = None
+
+    def find_forbidden(self, *texts: str) -> List[str]:
+        """Mots interdits présents dans les textes, dans l'ordre de la configuration"""
+        if self.forbidden_pattern is None:
+            return []
+        found = {match.lower() for text in texts for match in self.forbidden_pattern.findall(text)}
+        return [word for word in self.forbidden_words if word in found]
+
+    def condition_category(self, condition: Optional[str]) -> Optional[str]:
+        return self.condition_map.get(condition or '', self.default_condition)
+
+
+class PlatformRulebook:
+    """Ensemble des règles de plateformes et passe d'emojis compilée"""
+
+    def __init__(self, config: Dict):
+        self.platforms = {
+            name.lower(): self._compile_platform(name.lower(), rules)
+            for name, rules in config['platforms'].items()
+        }
+
+        self.emoji_mapping = dict(config.get('emojis', {}))
+        if self.emoji_mapping:
+            # Mots-clés les plus longs d'abord ; un emoji déjà présent devant le
+            # mot-clé est capturé par le préfixe, ce qui rend la passe idempotente
+            keywords = sorted(self.emoji_mapping, key=len, reverse=True)
+            emojis = sorted(set(self.emoji_mapping.values()), key=len, reverse=True)
+            self._emoji_pattern = re.compile(
+                '(?P<prefix>(?:' + '|'.join(map(re.escape, emojis)) + ') )?'
+                '(?P<keyword>' + '|'.join(map(re.escape, keywords)) + ')'
+            )
+        else:
+            self._emoji_pattern = None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_PLATFORMS_PATH) -> 'PlatformRulebook':
+        with open(path, encoding='utf-8') as config_file:
+            return cls(json.load(config_file))
+
+    def _compile_platform(self, name: str, rules: Dict) -> PlatformRules:
+        forbidden_words = tuple(word.lower() for word in rules.get('forbidden_words', []))
+        forbidden_pattern = None
+        if forbidden_words:
+            forbidden_pattern = re.compile('|'.join(map(re.escape, forbidden_words)), re.IGNORECASE)
+        export = rules.get('export', {})
+        image_size = export.get('image_size')
+
+        return PlatformRules(
+            name=name,
+            title_length=rules['title_length'],
+            description_length=rules['description_length'],
+            tags_count=rules['tags_count'],
+            cta=rules.get('cta'),
+            forbidden_words=forbidden_words,
+            forbidden_pattern=forbidden_pattern,
+            condition_map=dict(rules.get('condition_map', {})),
+            default_condition=rules.get('default_condition'),
+            marketplace_category=rules.get('marketplace_category'),
+            emojis=rules.get('emojis', False),
+            hashtags=rules.get('hashtags', False),
+            highlight_prefix=rules.get('highlight_prefix', ''),
+            story=rules.get('story', False),
+            export_formats=tuple(export.get('formats', [])),
+            image_size=tuple(image_size) if image_size else None
+        )
+
+    def get(self, platform: str) -> Optional[PlatformRules]:
+        return self.platforms.get(platform.lower())
+
+    def add_emojis(self, text: str) -> str:
+        """Ajoute l'emoji de chaque mot-clé en une seule passe, sans doublon"""
+        if self._emoji_pattern is None:
+            return text
+        return self._emoji_pattern.sub(self._emoji_replacement, text)
+
+    def _emoji_replacement(self, match) -> str:
+        if match.group('prefix'):
+            return match.group(0)
+        keyword = match.group('keyword')
+        return f"{self.emoji_mapping[keyword]} {keyword}"
+
+
+@lru_cache(maxsize=None)
+def get_platform_rules(path: str = DEFAULT_PLATFORMS_PATH) -> PlatformRulebook:
+    """Règles partagées par le processus, chargées au premier appel"""
+    return PlatformRulebook.from_file(path)
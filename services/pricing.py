@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, List, Optional
+import re
+
+_NUMBER_PATTERN = re.compile(r'\d[\d.,]*')
+# Espaces (y compris insécables) utilisés comme séparateurs de milliers
+_SPACES_PATTERN = re.compile(r'[\s\u00a0\u202f]')
+# Séparateur décimal : dernier ',' ou '.' suivi d'un ou deux chiffres en fin de nombre
+_DECIMAL_PATTERN = re.compile(r'[.,](\d{1,2})$')
+
+
+def parse_price(value) -> Optional[float]:
+    """Convertit un prix SerpAPI ('$1,299.00', '1.299,00 €', '45,90 €', 12) en float
+
+    Le séparateur décimal est le dernier ',' ou '.' suivi d'un ou deux chiffres ;
+    tous les autres séparateurs sont des séparateurs de milliers ('2.500 €',
+    '1,299' valent 2500 et 1299).
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        # Format google_lens récent : {'value': '$12', 'extracted_value': 12.0}
+        if 'extracted_value' in value:
+            return parse_price(value['extracted_value'])
+        return parse_price(value.get('value'))
+    if not isinstance(value, str):
+        return None
+
+    match = _NUMBER_PATTERN.search(_SPACES_PATTERN.sub('', value))
+    if not match:
+        return None
+    number = match.group(0).rstrip('.,')
+
+    decimal = _DECIMAL_PATTERN.search(number)
+    if decimal:
+        integer = number[:decimal.start()]
+        return float(f"{re.sub(r'[.,]', '', integer)}.{decimal.group(1)}")
+    return float(re.sub(r'[.,]', '', number))
+
+
+def extract_prices(visual_matches: Iterable[Dict]) -> List[float]:
+    """Extrait les prix exploitables d'une liste de correspondances visuelles"""
+    prices = []
+    for match in visual_matches:
+        if 'price' in match:
+            price = parse_price(match['price'])
+            if price is not None:
+                prices.append(price)
+    return prices
+
+
+def summarize_prices(prices: List[float]) -> Optional[Dict]:
+    """Retourne la fourchette {min, max, average} d'un échantillon de prix"""
+    if not prices:
+        return None
+    return {
+        'min': min(prices),
+        'max': max(prices),
+        'average': sum(prices) / len(prices)
+    }
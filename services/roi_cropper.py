@@ -0,0 +1,105 @@
+import numpy as np
+from typing import Dict, List
+from utils.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+
+class RegionOfInterestCropper:
+    """Découpe les régions d'intérêt détectées par YOLO pour des requêtes Lens ciblées"""
+
+    STRATEGIES = ('distinct', 'largest', 'most_confident', 'all')
+
+    def __init__(self, max_side: int = 640, jpeg_quality: int = 85,
+                 padding: float = 0.05, max_crops: int = 5,
+                 min_confidence: float = 0.25):
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.padding = padding
+        self.max_crops = max_crops
+        self.min_confidence = min_confidence
+
+    def select_regions(self, detections: List[Dict], strategy: str = 'distinct',
+                       limit: int = None) -> List[Dict]:
+        """Sélectionne les détections à découper selon la stratégie choisie"""
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Stratégie de découpage inconnue: {strategy}")
+
+        candidates = [d for d in detections if d['confidence'] >= self.min_confidence]
+        if not candidates:
+            return []
+
+        if strategy == 'largest':
+            return [max(candidates, key=self._box_area)]
+        if strategy == 'most_confident':
+            return [max(candidates, key=lambda d: d['confidence'])]
+
+        # 0 est une limite valide ; une valeur négative ne doit pas découper depuis la fin
+        limit = self.max_crops if limit is None else max(limit, 0)
+        if strategy == 'all':
+            # Chaque objet détecté est conservé (photos à plat, étagères)
+            return sorted(candidates, key=self._box_area, reverse=True)[:limit]
+
+        # Un seul crop par classe : le plus confiant, puis par surface décroissante
+        best_per_class = {}
+        for detection in candidates:
+            current = best_per_class.get(detection['class'])
+            if current is None or detection['confidence'] > current['confidence']:
+                best_per_class[detection['class']] = detection
+
+        regions = sorted(best_per_class.values(), key=self._box_area, reverse=True)
+        return regions[:limit]
+
+    def crop_regions(self, image: np.ndarray, detections: List[Dict],
+                     strategy: str = 'distinct', limit: int = None) -> List[Dict]:
+        """Découpe, redimensionne et encode en JPEG chaque région sélectionnée"""
+        crops = []
+        for detection in self.select_regions(detections, strategy, limit):
+            crop = self._extract(image, detection['bbox'])
+            if crop is None:
+                continue
+            crops.append({
+                'detection': detection,
+                'jpeg': self._encode(self._downscale(crop)),
+                'shape': crop.shape[:2]
+            })
+        return crops
+
+    def _extract(self, image: np.ndarray, bbox: List[float]):
+        """Extrait la zone de la boîte avec une marge relative"""
+        height, width = image.shape[:2]
+        x1, y1, x2, y2 = bbox
+        pad_x = (x2 - x1) * self.padding
+        pad_y = (y2 - y1) * self.padding
+
+        left = max(int(x1 - pad_x), 0)
+        top = max(int(y1 - pad_y), 0)
+        right = min(int(np.ceil(x2 + pad_x)), width)
+        bottom = min(int(np.ceil(y2 + pad_y)), height)
+
+        if right <= left or bottom <= top:
+            return None
+        # Vue sur l'image d'origine : aucune copie avant le redimensionnement
+        return image[top:bottom, left:right]
+
+    def _downscale(self, crop: np.ndarray) -> np.ndarray:
+        """Réduit le crop pour que son plus grand côté ne dépasse pas max_side"""
+        height, width = crop.shape[:2]
+        longest = max(height, width)
+        if longest <= self.max_side:
+            return crop
+
+        scale = self.max_side / longest
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        return cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+
+    def _encode(self, crop: np.ndarray) -> bytes:
+        """Encode le crop en JPEG"""
+        ok, buffer = cv2.imencode('.jpg', crop, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("Échec de l'encodage JPEG du crop")
+        return buffer.tobytes()
+
+    @staticmethod
+    def _box_area(detection: Dict) -> float:
+        x1, y1, x2, y2 = detection['bbox']
+        return max(x2 - x1, 0) * max(y2 - y1, 0)
@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from urllib.parse import urlsplit
+from utils.lazy import lazy_import
+import asyncio
+
+# Clients de recherche importés au premier appel seulement
+serpapi = lazy_import('serpapi')
+duckduckgo_search = lazy_import('duckduckgo_search')
+
+class SearchBackend(ABC):
+    """Backend de recherche textuelle utilisé par `ImageAnalyzer.search_additional_info`
+
+    Les sous-classes implémentent `search` et retournent des résultats normalisés
+    (`title`, `link`, `snippet`, `price`, `source`). Un backend de test n'a
+    besoin que de ces deux attributs et de cette coroutine.
+    """
+
+    name = 'base'
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+
+    @abstractmethod
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        """Retourne au plus `max_results` résultats normalisés pour `query`"""
+
+
+class DuckDuckGoBackend(SearchBackend):
+    name = 'duckduckgo'
+
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        # Le client DDGS est synchrone : l'exécuter hors de la boucle d'événements
+        raw_results = await asyncio.to_thread(self._search_sync, query, max_results)
+        return [
+            {
+                'title': result.get('title', ''),
+                'link': result.get('href', ''),
+                'snippet': result.get('body', ''),
+                'price': None,
+                'source': self.name
+            }
+            for result in raw_results
+        ]
+
+    def _search_sync(self, query: str, max_results: int) -> List[Dict]:
+        with duckduckgo_search.DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=max_results))
+
+
+class GoogleShoppingBackend(SearchBackend):
+    name = 'google_shopping'
+
+    def __init__(self, api_key: str, timeout: float = 5.0, hedger=None):
+        super().__init__(timeout)
+        self.api_key = api_key
+        # HedgedRequester optionnel pour couper la traîne de latence de SerpAPI
+        self.hedger = hedger
+
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        params = {
+            "api_key": self.api_key,
+            "engine": "google_shopping",
+            "q": query,
+            "num": max_results
+        }
+        search = serpapi.GoogleSearch(params)
+        if self.hedger is not None:
+            results = await self.hedger.call(lambda: asyncio.to_thread(search.get_dict))
+        else:
+            results = await asyncio.to_thread(search.get_dict)
+
+        return [
+            {
+                'title': result.get('title', ''),
+                'link': result.get('link') or result.get('product_link', ''),
+                'snippet': result.get('snippet', ''),
+                'price': result.get('price'),
+                'source': self.name
+            }
+            for result in results.get('shopping_results', [])[:max_results]
+        ]
+
+
+def result_key(result: Dict) -> str:
+    """Clé de déduplication : lien normalisé, ou titre à défaut"""
+    link = result.get('link')
+    if link:
+        parts = urlsplit(link.lower())
+        host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+        return f"{host}{parts.path.rstrip('/')}"
+    return ' '.join(result.get('title', '').lower().split())
+
+
+def merge_results(merged: Dict[str, Dict], results: List[Dict]) -> None:
+    """Fusionne des résultats dans `merged` en complétant les champs manquants"""
+    for result in results:
+        key = result_key(result)
+        if not key:
+            continue
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(result, sources=[result['source']])
+            continue
+        for field, value in result.items():
+            if value and not existing.get(field):
+                existing[field] = value
+        if result['source'] not in existing['sources']:
+            existing['sources'].append(result['source'])
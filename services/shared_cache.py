@@ -0,0 +1,142 @@
+from cachetools import TTLCache
+from typing import Any, Dict, Optional
+import argparse
+import asyncio
+import os
+import struct
+import orjson
+
+# Trames : longueur sur 4 octets (big-endian) suivie d'un message JSON
+_HEADER = struct.Struct('>I')
+DEFAULT_SOCKET_PATH = os.getenv('LENS_CACHE_SOCKET', '/tmp/lens_inventory_cache.sock')
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Dict:
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return orjson.loads(await reader.readexactly(length))
+
+
+def _frame(message: Dict) -> bytes:
+    payload = orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _HEADER.pack(len(payload)) + payload
+
+
+class CacheDaemon:
+    """Cache partagé par les workers d'une machine, servi sur un socket Unix
+
+    Un seul processus détient les caches Lens et de recherche ; les workers
+    les interrogent via SharedCacheClient au lieu d'en garder chacun une copie.
+    Chaque espace de noms a son propre TTLCache.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH, maxsize: int = 10_000, ttl: float = 3600):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespaces = {}
+
+    def _cache(self, namespace: str) -> TTLCache:
+        cache = self.namespaces.get(namespace)
+        if cache is None:
+            cache = self.namespaces[namespace] = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        return cache
+
+    def handle(self, message: Dict) -> Dict:
+        cache = self._cache(message['ns'])
+        if message['op'] == 'get':
+            if message['key'] in cache:
+                return {'hit': True, 'value': cache[message['key']]}
+            return {'hit': False}
+        if message['op'] == 'set':
+            cache[message['key']] = message['value']
+            return {'ok': True}
+        raise ValueError(f"Opération de cache inconnue: {message['op']}")
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    message = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break  # Worker déconnecté
+                try:
+                    response = self.handle(message)
+                except Exception as e:
+                    response = {'error': str(e)}
+                writer.write(_frame(response))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._serve_client, path=self.path)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+
+class SharedCacheClient:
+    """Client asynchrone du cache partagé, une connexion par processus
+
+    Le cache est une optimisation : si le démon est indisponible, les lectures
+    sont des échecs de cache et les écritures sont ignorées.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH, timeout: float = 0.2):
+        self.path = path
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = None
+
+    async def _request(self, message: Dict) -> Optional[Dict]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_unix_connection(self.path), self.timeout)
+                self._writer.write(_frame(message))
+                await self._writer.drain()
+                return await asyncio.wait_for(_read_frame(self._reader), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, orjson.JSONDecodeError):
+                # Connexion perdue ou réponse désynchronisée : reconnecter au prochain appel
+                self._close()
+                return None
+            except BaseException:
+                # Appelant annulé en plein échange (requêtes doublées, fan-out) : la
+                # réponse non lue serait servie à la requête suivante, on abandonne la connexion
+                self._close()
+                raise
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        response = await self._request({'op': 'get', 'ns': namespace, 'key': key})
+        if response and response.get('hit'):
+            return response['value']
+        return None
+
+    async def set(self, namespace: str, key: str, value: Any):
+        await self._request({'op': 'set', 'ns': namespace, 'key': key, 'value': value})
+
+    async def close(self):
+        self._close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Démon de cache partagé entre workers")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--maxsize', type=int, default=10_000)
+    parser.add_argument('--ttl', type=float, default=3600)
+    args = parser.parse_args()
+    CacheDaemon(args.socket, args.maxsize, args.ttl).run()
@@ -0,0 +1,194 @@
+from functools import lru_cache
+from models.listing import Listing
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+import re
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+METHODS = ('bm25', 'tfidf')
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (minuscules, ponctuation et # retirés)"""
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class Vocabulary:
+    """Vocabulaire compact : index terme → identifiant et fréquences en tableau numpy
+
+    La fréquence documentaire (nombre de documents contenant le terme) est
+    stockée dans un tableau int32 agrandi par doublement, indexé par
+    l'identifiant du terme.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.ids = {}
+        self.document_frequency = np.zeros(initial_capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.ids)
+            if term_id >= len(self.document_frequency):
+                grown = np.zeros(len(self.document_frequency) * 2, dtype=np.int32)
+                grown[:term_id] = self.document_frequency[:term_id]
+                self.document_frequency = grown
+        return term_id
+
+    def lookup(self, terms: Iterable[str]) -> np.ndarray:
+        """Identifiants des termes, -1 pour un terme inconnu du corpus"""
+        ids = self.ids
+        return np.fromiter((ids.get(term, -1) for term in terms), dtype=np.int64)
+
+    def frequencies(self, term_ids: np.ndarray) -> np.ndarray:
+        """Fréquences documentaires, 0 pour les termes inconnus"""
+        return np.where(term_ids >= 0, self.document_frequency[np.maximum(term_ids, 0)], 0)
+
+
+class TagRanker:
+    """Classement des tags par pertinence TF-IDF ou BM25 sur le catalogue d'annonces
+
+    Les statistiques du corpus (fréquences documentaires, longueur moyenne des
+    documents) sont construites à partir du catalogue enregistré puis mises à
+    jour à chaque annonce enregistrée, chaque annonce n'étant comptée qu'une
+    fois par identifiant ; le score d'un tag
+    est la somme des scores de ses termes dans l'annonce, calculée en une seule
+    passe vectorisée pour tous les tags.
+    """
+
+    def __init__(self, method: str = 'bm25', k1: float = 1.2, b: float = 0.75):
+        if method not in METHODS:
+            raise ValueError(f"Méthode de classement inconnue: {method}")
+        self.method = method
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = Vocabulary()
+        self.document_count = 0
+        self.total_length = 0
+        # Plus grand identifiant indexé : les ids de l'inventaire sont croissants,
+        # tout id inférieur ou égal a déjà été vu (mémoire constante)
+        self.last_id = 0
+
+    def add_document(self, text: str):
+        """Ajoute un document au corpus (mise à jour incrémentale des statistiques)"""
+        terms = tokenize(text)
+        term_ids = [self.vocabulary.add(term) for term in set(terms)]
+        # Identifiants uniques : une seule incrémentation vectorisée
+        self.vocabulary.document_frequency[term_ids] += 1
+        self.document_count += 1
+        self.total_length += len(terms)
+
+    def add_listing(self, listing, listing_id=None) -> bool:
+        """Indexe une annonce ; retourne False si son identifiant est déjà indexé
+
+        Les identifiants (ceux de l'inventaire) doivent être ajoutés par ordre
+        croissant : un id inférieur ou égal au dernier indexé est ignoré.
+        """
+        if listing_id is not None:
+            if listing_id <= self.last_id:
+                return False
+            self.last_id = listing_id
+        self.add_document(listing_text(listing))
+        return True
+
+    def add_catalog(self, listings: Iterable[Tuple[int, object]]) -> int:
+        """Indexe les (identifiant, annonce) du catalogue ; retourne le nombre d'ajouts"""
+        return sum(
+            self.add_listing(listing, listing_id)
+            for listing_id, listing in sorted(listings, key=lambda entry: entry[0])
+        )
+
+    def idf(self, term_ids: np.ndarray) -> np.ndarray:
+        n = self.document_count
+        df = self.vocabulary.frequencies(term_ids)
+        if self.method == 'bm25':
+            return np.log((n - df + 0.5) / (df + 0.5) + 1.0)
+        # IDF lissée : un terme inconnu reste le plus discriminant
+        return np.log((1.0 + n) / (1.0 + df)) + 1.0
+
+    def score_tags(self, tags: Sequence[str], text: str) -> np.ndarray:
+        """Score de pertinence de chaque tag pour le texte d'une annonce"""
+        scores, _ = self._score([tokenize(tag) for tag in tags], text)
+        return scores
+
+    def rank_tags(self, tags: Sequence[str], text: str, limit: Optional[int] = None) -> List[str]:
+        """Trie les tags par pertinence décroissante
+
+        À score égal, les tags les plus spécifiques (IDF moyenne la plus élevée)
+        puis les plus courts passent en premier.
+        """
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return []
+        scores, specificity = self._score([tokenize(tag) for tag in tags], text)
+        lengths = np.fromiter((len(tag) for tag in tags), dtype=np.int64, count=len(tags))
+        # lexsort trie sur la dernière clé en premier
+        order = np.lexsort((lengths, -specificity, -scores))
+        return [tags[index] for index in order[:limit]]
+
+    def _score(self, tag_terms: List[List[str]], text: str):
+        """Scores et IDF moyenne par tag, en une passe sur les termes aplatis"""
+        tag_count = len(tag_terms)
+        flat_terms = [term for terms in tag_terms for term in terms]
+        if not flat_terms:
+            return np.zeros(tag_count), np.zeros(tag_count)
+        term_counts = np.fromiter((len(terms) for terms in tag_terms), dtype=np.int64, count=tag_count)
+        owners = np.repeat(np.arange(tag_count), term_counts)
+
+        # Fréquence de chaque terme de tag dans le document
+        query = np.array(flat_terms)
+        document = tokenize(text)
+        document_length = len(document)
+        if document_length:
+            unique_terms, counts = np.unique(np.array(document), return_counts=True)
+            positions = np.minimum(np.searchsorted(unique_terms, query), len(unique_terms) - 1)
+            tf = np.where(unique_terms[positions] == query, counts[positions], 0).astype(np.float64)
+        else:
+            tf = np.zeros(len(flat_terms))
+
+        idf = self.idf(self.vocabulary.lookup(flat_terms))
+        if self.method == 'bm25':
+            average_length = self.total_length / self.document_count if self.document_count else max(document_length, 1)
+            norm = self.k1 * (1.0 - self.b + self.b * document_length / average_length)
+            term_scores = idf * tf * (self.k1 + 1.0) / (tf + norm)
+        else:
+            term_scores = idf * tf / max(document_length, 1)
+
+        scores = np.bincount(owners, weights=term_scores, minlength=tag_count)
+        specificity = np.bincount(owners, weights=idf, minlength=tag_count) / np.maximum(term_counts, 1)
+        return scores, specificity
+
+    def missing_keywords(self, tags: Iterable[str], text: str) -> List[str]:
+        """Tags dont au moins un terme est absent du texte"""
+        content = set(tokenize(text))
+        return [tag for tag in tags if not set(tokenize(tag)) <= content]
+
+
+def index_recorded_listings(listings: Sequence, ranker: TagRanker = None) -> Callable:
+    """Callback de fin de InventoryStore.record_listings : indexe les annonces sous leurs ids
+
+    Une écriture échouée (ou ignorée : inventaire non démarré) n'ajoute rien.
+    """
+    def callback(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        target = ranker or get_tag_ranker()
+        for listing_id, listing in zip(future.result() or [], listings):
+            target.add_listing(Listing.coerce(listing), listing_id)
+
+    return callback
+
+
+def listing_text(listing) -> str:
+    """Texte indexé d'une annonce : titre, description et points forts"""
+    return "\n".join([listing.title, listing.description, *listing.highlights])
+
+
+@lru_cache(maxsize=None)
+def get_tag_ranker(method: str = 'bm25') -> TagRanker:
+    """Classeur partagé par le processus, alimenté par le catalogue au démarrage"""
+    return TagRanker(method)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les paquets du dépôt sont des paquets de namespace importés depuis la racine
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
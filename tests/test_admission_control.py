@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from services.admission_control import AdmissionController, Overloaded
+
+
+def controller(**kwargs):
+    options = dict(max_concurrent=1, max_queue=4, latency_slo=1.0, min_samples=1)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def seed(admission, workload, **service_times):
+    for mode, seconds in service_times.items():
+        admission._trackers(workload)[mode].record(seconds)
+
+
+async def occupy(admission, release: asyncio.Event, workload='analyze'):
+    async with admission.admit(workload):
+        await release.wait()
+
+
+async def start_occupying(admission, release: asyncio.Event):
+    """Lance une requête qui garde l'unique emplacement jusqu'à `release`"""
+    task = asyncio.create_task(occupy(admission, release))
+    while admission.running == 0:
+        await asyncio.sleep(0)
+    return task
+
+
+def test_idle_request_runs_full_analysis():
+    admission = controller()
+    seed(admission, 'analyze', full=10.0)
+
+    async def scenario():
+        async with admission.admit() as ticket:
+            return ticket
+
+    assert asyncio.run(scenario()).mode == 'full'
+
+
+def test_queued_request_is_degraded_to_fit_the_slo():
+    admission = controller(latency_slo=2.0)
+    seed(admission, 'analyze', full=1.9, reduced=0.5)
+    admission.slot_time.record(0.1)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = await start_occupying(admission, release)
+
+        async def queued():
+            async with admission.admit() as ticket:
+                return ticket
+
+        waiting = asyncio.create_task(queued())
+        await asyncio.sleep(0.2)
+        release.set()
+        await running
+        return await waiting
+
+    ticket = asyncio.run(scenario())
+    assert ticket.mode == 'reduced'
+    assert ticket.imgsz == admission.reduced_imgsz
+    assert ticket.degraded
+
+
+def test_rejects_with_retry_after_when_no_mode_fits():
+    admission = controller(latency_slo=1.0)
+    seed(admission, 'analyze', full=5.0, reduced=4.0, detection_only=3.0)
+    admission.slot_time.record(2.4)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = await start_occupying(admission, release)
+        try:
+            with pytest.raises(Overloaded) as rejected:
+                async with admission.admit():
+                    pass
+        finally:
+            release.set()
+            await running
+        return rejected.value
+
+    error = asyncio.run(scenario())
+    assert admission.rejected == 1
+    # Attente estimée : une requête devant, 2,4 s par emplacement, arrondie à la seconde
+    assert error.retry_after == 3
+    assert "SLO" in str(error)
+
+
+def test_rejects_when_queue_is_full():
+    admission = controller(max_queue=0)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = await start_occupying(admission, release)
+        admission.waiting = 1
+        try:
+            with pytest.raises(Overloaded) as rejected:
+                async with admission.admit():
+                    pass
+        finally:
+            admission.waiting = 0
+            release.set()
+            await running
+        return rejected.value
+
+    assert asyncio.run(scenario()).retry_after >= 1
+
+
+def test_retry_after_follows_expected_wait():
+    admission = controller(max_concurrent=2)
+    admission.waiting = 3
+    admission.running = 2
+    admission.slot_time.record(2.0)
+    # (3 en file + 1) / 2 emplacements × 2 s
+    assert admission.expected_wait() == pytest.approx(4.0)
+    assert admission.retry_after() == 4
+
+
+def test_cache_hits_do_not_feed_service_times():
+    admission = controller()
+
+    async def scenario():
+        async with admission.admit() as ticket:
+            ticket.cached = True
+        async with admission.admit():
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert admission.cache_hits == 1
+    assert len(admission.cache_hit_time.samples) == 1
+    assert len(admission.service_time['analyze']['full'].samples) == 1
+    assert admission.snapshot()['cache_hits'] == 1
+
+
+def test_workloads_have_their_own_slo_and_modes():
+    admission = controller(latency_slo=1.0, workload_slos={'objects': 10.0})
+    seed(admission, 'analyze', full=5.0, reduced=5.0, detection_only=5.0)
+    seed(admission, 'objects', full=5.0, reduced=2.0)
+    admission.slot_time.record(0.1)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = await start_occupying(admission, release)
+
+        async def queued():
+            async with admission.admit('objects', ('full', 'reduced')) as ticket:
+                return ticket
+
+        waiting = asyncio.create_task(queued())
+        await asyncio.sleep(0.05)
+        release.set()
+        await running
+        return await waiting
+
+    assert asyncio.run(scenario()).mode == 'full'
+    assert admission.choose_mode(1.0, 'objects', ('full', 'reduced')) is None
+    assert admission.choose_mode(3.0, 'objects', ('full', 'reduced')) == 'reduced'
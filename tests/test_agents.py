@@ -0,0 +1,56 @@
+import importlib
+
+import pytest
+
+pytest.importorskip('crewai')
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Vrais services injectés, sans poids YOLO ni appel SerpAPI"""
+    from services.image_analyzer import ImageAnalyzer
+    from services.object_detection import ObjectDetectionService
+
+    monkeypatch.setattr(ObjectDetectionService, '_load', lambda self, weights: None)
+    monkeypatch.setenv('SERPAPI_API_KEY', 'test')
+    object_detection = ObjectDetectionService()
+    yield {
+        'VisionAgent': {'object_detection': object_detection},
+        'LensResearchAgent': {'image_analyzer': ImageAnalyzer(search_backends=[])},
+    }
+    object_detection.close()
+
+
+AGENTS = [
+    ('agents.vision_agent', 'VisionAgent', 'VisionEngine'),
+    ('agents.lens_research_agent', 'LensResearchAgent', 'LensResearchEngine'),
+    ('agents.data_aggregation_agent', 'DataAggregationAgent', 'DataAggregationEngine'),
+    ('agents.copywriter_agent', 'CopywriterAgent', 'CopywriterEngine'),
+    ('agents.platform_optimizer_agent', 'PlatformOptimizerAgent', 'PlatformOptimizerEngine'),
+    ('agents.quality_control_agent', 'QualityControlAgent', 'QualityControlEngine'),
+]
+
+
+@pytest.mark.parametrize('module_name, agent_name, engine_name', AGENTS)
+def test_crewai_agents_can_be_instantiated(services, module_name, agent_name, engine_name):
+    from crewai import Agent
+
+    module = importlib.import_module(module_name)
+    agent = getattr(module, agent_name)(**services.get(agent_name, {}))
+
+    assert isinstance(agent, Agent) and isinstance(agent, getattr(module, engine_name))
+    assert (agent.role, agent.goal, agent.backstory) == module.AGENT_PROFILE
+    assert [tool.name for tool in agent.tools] == [name for name, _, _ in module.AGENT_TOOLS]
+    # L'état du moteur est bien porté par l'agent
+    for attribute in vars(getattr(module, engine_name)(**services.get(agent_name, {}))):
+        assert hasattr(agent, attribute)
+
+
+def test_agent_tools_are_bound_to_the_injected_services(services):
+    from agents.vision_agent import VisionAgent
+
+    agent = VisionAgent(**services['VisionAgent'])
+    object_detection = services['VisionAgent']['object_detection']
+    assert agent.object_detection is object_detection
+    assert agent.tools[0].func == object_detection.detect_objects
+    assert agent._identify_main_subject([{'class': 'lamp', 'confidence': 0.9}]) == 'lamp'
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('httpx')
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # Sans bloc `with` : le cycle de vie (modèle, inventaire) n'est pas démarré
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize('max_objects', [0, -3])
+def test_analyze_objects_rejects_non_positive_max_objects(client, max_objects):
+    response = client.post(f"/analyze/objects?max_objects={max_objects}", files={'file': ('a.jpg', b'x')})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize('path', ['/analyze', '/analyze/objects'])
+def test_overloaded_requests_get_503_with_retry_after(client, monkeypatch, path):
+    from services.admission_control import AdmissionController
+
+    admission = AdmissionController(max_concurrent=1, max_queue=0, latency_slo=2.0)
+    # Emplacement occupé et file pleine : refus immédiat
+    admission.running = 1
+    monkeypatch.setitem(main.container._instances, 'admission', admission)
+
+    response = client.post(path, files={'file': ('a.jpg', b'x')})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '2'
+    assert admission.rejected == 1
+
+
+def test_load_status_reports_ladder_escalations(client, monkeypatch):
+    from services.object_detection import ObjectDetectionService
+
+    monkeypatch.setattr(ObjectDetectionService, '_load', lambda self, weights: None)
+    monkeypatch.delitem(main.container._instances, 'object_detection', raising=False)
+    # Détecteur non chargé : l'endpoint de santé ne le construit pas
+    assert 'detection' not in client.get('/health/load').json()
+    assert main.container.built('object_detection') is None
+
+    detector = ObjectDetectionService(ladder=[('yolov8n.pt', 640), ('yolov8s.pt', 640)])
+    detector.escalations[0] = 3
+    monkeypatch.setitem(main.container._instances, 'object_detection', detector)
+    try:
+        detection = client.get('/health/load').json()['detection']
+    finally:
+        detector.close()
+    assert detection['escalations'] == {'yolov8n@640': 3, 'yolov8s@640': 0}
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+from services.condition_estimator import CONDITION_THRESHOLDS, WORST_CONDITION, ConditionEstimator
+
+
+def textured(size=200, seed=0):
+    """Image couleur nette : damier fin bruité"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    board = np.where(((x // 8) + (y // 8)) % 2, 200, 60).astype(np.float32)
+    gray = np.clip(board + rng.normal(0, 10, board.shape), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def smooth(size=200):
+    """Surface lisse : dégradé doux sans contours"""
+    ramp = np.tile(np.linspace(90, 130, size, dtype=np.float32), (size, 1)).astype(np.uint8)
+    return cv2.cvtColor(ramp, cv2.COLOR_GRAY2BGR)
+
+
+def scratched(size=200):
+    """Même surface lisse, rayée de traits fins"""
+    image = smooth(size)
+    for offset in range(20, size - 20, 12):
+        cv2.line(image, (offset, 10), (size - offset // 2, size - 10), (255, 255, 255), 1)
+    return image
+
+
+def detection(size=200, cls='vase'):
+    return {'class': cls, 'confidence': 0.9, 'bbox': [0, 0, size, size]}
+
+
+def estimate(image, estimator=None, image_hash=None):
+    estimator = estimator or ConditionEstimator()
+    return estimator.estimate(image, [detection(image.shape[1])], image_hash)[0]['condition_estimate']
+
+
+def test_blurred_image_scores_lower_sharpness():
+    sharp = textured()
+    blurred = cv2.GaussianBlur(sharp, (15, 15), 5)
+
+    sharp_estimate, blurred_estimate = estimate(sharp), estimate(blurred)
+    assert blurred_estimate['sharpness'] < sharp_estimate['sharpness']
+    assert sharp_estimate['reliable']
+    assert not blurred_estimate['reliable'] and blurred_estimate['label'] is None
+
+
+def test_scratches_raise_the_wear_score():
+    estimator = ConditionEstimator(min_sharpness=0.0)
+    clean, worn = estimate(smooth(), estimator), estimate(scratched(), estimator)
+
+    assert clean['wear_score'] == 0.0 and clean['label'] == CONDITION_THRESHOLDS[0][1]
+    assert worn['wear_score'] > clean['wear_score']
+    assert worn['edge_density'] > clean['edge_density']
+
+
+@pytest.mark.parametrize('image', [textured(), smooth(), scratched(), np.zeros((200, 200), np.uint8)],
+                         ids=['textured', 'smooth', 'scratched', 'grayscale'])
+def test_estimates_stay_in_range(image):
+    result = estimate(image)
+    assert set(result) == {'wear_score', 'sharpness', 'edge_density', 'label', 'reliable'}
+    assert 0.0 <= result['wear_score'] <= 1.0
+    assert 0.0 <= result['edge_density'] <= 1.0
+    assert result['sharpness'] >= 0.0
+    assert result['label'] in {label for _, label in CONDITION_THRESHOLDS} | {WORST_CONDITION, None}
+
+
+def test_batch_returns_one_estimate_per_detection_in_order():
+    estimator = ConditionEstimator()
+    image = np.concatenate([textured(), smooth()], axis=1)
+    detections = [
+        {'class': 'vase', 'confidence': 0.9, 'bbox': [200, 0, 400, 200]},
+        {'class': 'vase', 'confidence': 0.8, 'bbox': [0, 0, 200, 200]},
+        # Trop petite pour une vignette
+        {'class': 'cup', 'confidence': 0.7, 'bbox': [10, 10, 12, 12]},
+    ]
+
+    results = estimator.estimate_many([(image, detections, 1), (textured(), [detection()], 2)])
+    assert [len(result) for result in results] == [3, 1]
+    first, second, tiny = results[0]
+    assert first['condition_estimate']['sharpness'] < second['condition_estimate']['sharpness']
+    assert tiny['condition_estimate'] is None
+    assert results[1][0]['condition_estimate'] == second['condition_estimate']
+
+
+def test_features_are_cached_by_hash_and_box():
+    estimator = ConditionEstimator()
+    first = estimate(textured(), estimator, image_hash=42)
+    # Même hash et même boîte : la valeur en cache est réutilisée
+    assert estimate(smooth(), estimator, image_hash=42) == first
+    assert len(estimator.cache) == 1
+
+
+def test_dimensions_use_the_reference_object():
+    estimator = ConditionEstimator()
+    image = textured(400)
+    detections = [
+        {'class': 'cell phone', 'confidence': 0.9, 'bbox': [0, 0, 50, 100]},
+        {'class': 'vase', 'confidence': 0.8, 'bbox': [100, 100, 300, 400]},
+    ]
+
+    phone, vase = estimator.annotate(image, detections)
+    assert vase['dimensions'] == {'relative_width': 0.5, 'relative_height': 0.75,
+                                  'width_cm': 30.0, 'height_cm': 45.0, 'reference': 'cell phone'}
+    assert 'reference' not in phone['dimensions']
+    assert 'condition_estimate' in vase
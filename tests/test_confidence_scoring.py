@@ -0,0 +1,119 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.lens_research_agent import LensResearchEngine
+from services.confidence_scoring import ConfidenceScorer, main_detection
+
+AGREEING = {'visual_matches': [
+    {'title': 'Lampe laiton vintage', 'price': '40 €'},
+    {'title': 'Lampe laiton vintage dorée', 'price': '42 €'},
+    {'title': 'Lampe vintage laiton', 'price': '39 €'},
+]}
+SCATTERED = {'visual_matches': [{'title': 'Vase'}, {'title': 'Chaise pliante'}]}
+
+
+def detection(confidence, bbox=(0, 0, 50, 50), cls='lamp'):
+    return {'class': cls, 'confidence': confidence, 'bbox': np.array(bbox, dtype=np.float32)}
+
+
+def test_box_size_comes_from_bbox_and_image_shape():
+    scorer = ConfidenceScorer()
+    features = scorer.features([detection(0.9, (0, 0, 50, 50))], [None], image_shape=(100, 100))
+    assert features[0, 1] == pytest.approx(0.5)
+    assert scorer.features([detection(0.9)], [None])[0, 1] == 0.0
+
+
+def test_confident_agreeing_analysis_scores_higher():
+    scorer = ConfidenceScorer()
+    good, bad = scorer.score_many([detection(0.9), detection(0.3, (0, 0, 5, 5))], [AGREEING, SCATTERED], (100, 100))
+    assert good > scorer.enrichment_threshold > bad
+    assert not scorer.should_enrich(good) and scorer.should_enrich(bad)
+
+
+def test_main_detection_prefers_main_subject():
+    vision_data = {'objects': [detection(0.9, cls='cup'), detection(0.6), detection(0.7)], 'main_subject': 'lamp'}
+    assert main_detection(vision_data)['confidence'] == 0.7
+    assert main_detection({'objects': []}) is None
+
+
+class FakeAnalyzer:
+    def __init__(self, analyses):
+        self.analyses = analyses
+        self.queries = []
+
+    async def analyze_crops_with_lens(self, crops, upload_crop):
+        return [{'detection': crop['detection'], 'lens_analysis': self.analyses[i]} for i, crop in enumerate(crops)]
+
+    async def search_additional_info(self, query):
+        self.queries.append(query)
+        return {'query': query, 'results': []}
+
+
+def test_only_uncertain_crops_are_enriched():
+    analyzer = FakeAnalyzer([AGREEING, SCATTERED])
+    researcher = LensResearchEngine(analyzer)
+    crops = [{'detection': detection(0.9)}, {'detection': detection(0.3, (0, 0, 5, 5), cls='vase')}]
+
+    results = asyncio.run(researcher.research_crops(crops, None, (100, 100)))
+    assert results[0]['additional_info'] is None
+    assert results[1]['additional_info']['query'].startswith('vase ')
+    assert len(analyzer.queries) == 1
+    assert results[0]['confidence_score'] > results[1]['confidence_score']
+
+    degraded = asyncio.run(researcher.research_crops(crops, None, (100, 100), enrich=False))
+    assert [result['additional_info'] for result in degraded] == [None, None]
+    assert len(analyzer.queries) == 1
+
+
+def synthetic_analyses(count, seed=0):
+    """Signaux aléatoires et exactitude tirée d'une vraie loi logistique"""
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(0, 1, count), rng.uniform(0, 1, count),
+        rng.uniform(0, 1, count), rng.uniform(0, 2, count)
+    ])
+    true_scorer = ConfidenceScorer(weights=(4.0, 0.5, 3.0, -2.0), bias=-2.5)
+    labels = rng.random(count) < true_scorer.score_batch(features)
+    return features, labels.astype(float)
+
+
+def test_fitted_score_tracks_the_empirical_accuracy():
+    features, labels = synthetic_analyses(20_000)
+    scorer = ConfidenceScorer().fit(features, labels)
+
+    test_features, test_labels = synthetic_analyses(20_000, seed=1)
+    scores = scorer.score_batch(test_features)
+    bins = np.minimum((scores * 10).astype(int), 9)
+    for index in np.unique(bins):
+        selected = bins == index
+        if selected.sum() >= 200:
+            assert abs(scores[selected].mean() - test_labels[selected].mean()) < 0.05
+    np.testing.assert_allclose(scorer.weights, (4.0, 0.5, 3.0, -2.0), atol=0.35)
+
+
+def test_fit_rejects_a_single_class():
+    features, _ = synthetic_analyses(10)
+    with pytest.raises(ValueError):
+        ConfidenceScorer().fit(features, np.ones(10))
+
+
+def test_fitted_model_and_threshold_are_loaded(tmp_path, monkeypatch):
+    from services import confidence_scoring
+
+    features, labels = synthetic_analyses(2_000)
+    fitted = ConfidenceScorer(enrichment_threshold=0.6).fit(features, labels)
+    path = tmp_path / 'confidence_model.json'
+    fitted.save(str(path))
+
+    monkeypatch.setenv('CONFIDENCE_MODEL', str(path))
+    monkeypatch.setenv('CONFIDENCE_ENRICH_THRESHOLD', '0.7')
+    confidence_scoring.get_confidence_scorer.cache_clear()
+    try:
+        loaded = confidence_scoring.get_confidence_scorer()
+    finally:
+        confidence_scoring.get_confidence_scorer.cache_clear()
+    np.testing.assert_allclose(loaded.score_batch(features), fitted.score_batch(features))
+    assert loaded.enrichment_threshold == 0.7
+    assert ConfidenceScorer.load(str(path)).enrichment_threshold == 0.6
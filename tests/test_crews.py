@@ -0,0 +1,54 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from crews.image_analysis_crew import ImageAnalysisCrew
+from crews.listing_generation_crew import ListingGenerationCrew
+
+
+class FakeCrew:
+    def __init__(self, agents, tasks):
+        self.agents = agents
+        self.tasks = tasks
+
+    async def kickoff(self):
+        return self
+
+
+class FakeTask:
+    def __init__(self, description, agent, expected_output):
+        self.agent = agent
+
+
+@pytest.fixture
+def crewai(monkeypatch):
+    # crewai n'est pas nécessaire à ces tests : seuls Crew et Task sont construits
+    module = types.SimpleNamespace(Crew=FakeCrew, Task=FakeTask)
+    monkeypatch.setitem(sys.modules, 'crewai', module)
+    return module
+
+
+@pytest.mark.parametrize('crew_class', [ImageAnalysisCrew, ListingGenerationCrew])
+def test_each_kickoff_gets_its_own_crew_with_shared_agents(crewai, monkeypatch, crew_class):
+    builds = []
+
+    def build_agents(self):
+        builds.append(self)
+        return ('agent-1', 'agent-2', 'agent-3')
+
+    monkeypatch.setattr(crew_class, '_build_agents', build_agents)
+    crew = crew_class.__new__(crew_class)
+    crew._agents = None
+
+    async def kickoffs():
+        if crew_class is ImageAnalysisCrew:
+            return await asyncio.gather(crew.analyze_image(None), crew.analyze_image(None))
+        return await asyncio.gather(crew.generate_listing(None), crew.generate_listing(None))
+
+    first, second = asyncio.run(kickoffs())
+    assert first is not second
+    assert first.tasks is not second.tasks
+    assert first.agents == second.agents == ['agent-1', 'agent-2', 'agent-3']
+    assert len(builds) == 1
@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import types
+
+import pytest
+
+from services import deployment
+from services.deployment import core_block, worker_count
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('workers, expected', [
+    (3, [[0, 1, 2], [3, 4, 5], [6, 7]]),
+    (4, [[0, 1], [2, 3], [4, 5], [6, 7]]),
+    (1, [list(range(8))]),
+])
+def test_core_blocks_are_contiguous_and_cover_every_core(workers, expected):
+    assert [core_block(slot, workers, list(range(8))) for slot in range(workers)] == expected
+
+
+def test_more_workers_than_cores_share_single_cores():
+    assert [core_block(slot, 5, [4, 5]) for slot in range(5)] == [[4], [5], [4], [5], [4]]
+
+
+def test_worker_count_defaults_to_one_per_core_block(monkeypatch):
+    monkeypatch.setattr(deployment, 'available_cores', lambda: list(range(10)))
+    assert worker_count(None, threads_per_worker=4) == 2
+    assert worker_count(6) == 6
+    monkeypatch.setattr(deployment, 'available_cores', lambda: [0])
+    assert worker_count(None) == 1
+
+
+def test_restarted_worker_takes_the_free_core_block():
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+
+    existing = {pid: types.SimpleNamespace(slot=slot) for pid, slot in ((10, 0), (12, 2))}
+    server = types.SimpleNamespace(WORKERS=existing, cfg=types.SimpleNamespace(workers=3))
+    worker = types.SimpleNamespace()
+    config.pre_fork(server, worker)
+    assert worker.slot == 1
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from services.hedging import HedgedRequester
+
+
+def warmed_requester(sample: float = 0.02) -> HedgedRequester:
+    requester = HedgedRequester(percentile=95, budget=1.0, min_samples=5, min_delay=0.02)
+    for _ in range(5):
+        requester.tracker.record(sample)
+    return requester
+
+
+def test_winning_hedge_is_timed_from_the_primary_start():
+    requester = warmed_requester()
+    delays = iter([1.0, 0.01])
+
+    async def request():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(requester.call(request)) == 0.01
+    assert requester.hedges == 1
+    # Le doublon répond en 10 ms, mais l'appel a duré délai de doublon + 10 ms
+    assert requester.tracker.samples[-1] >= 0.03
+
+
+def test_failures_are_recorded():
+    requester = HedgedRequester(min_samples=1)
+
+    async def request():
+        await asyncio.sleep(0.02)
+        raise ConnectionError("indisponible")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(requester.call(request))
+    assert len(requester.tracker.samples) == 1
+    assert requester.tracker.samples[0] >= 0.02
+
+
+def test_cancelled_call_is_recorded_as_its_elapsed_time():
+    requester = warmed_requester(sample=1.0)
+
+    async def request():
+        await asyncio.sleep(5)
+
+    async def cancel_after(delay):
+        task = asyncio.create_task(requester.call(request))
+        await asyncio.sleep(delay)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_after(0.05))
+    assert 0.05 <= requester.tracker.samples[-1] < 1.0
+
+
+def test_no_hedge_without_budget():
+    requester = warmed_requester()
+    requester.budget = 0.0
+
+    async def request():
+        await asyncio.sleep(0.05)
+        return 'primary'
+
+    assert asyncio.run(requester.call(request)) == 'primary'
+    assert requester.hedges == 0
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import services.image_analyzer as image_analyzer_module
+from services.image_analyzer import ImageAnalyzer
+from services.image_storage import TemporaryImageStore
+
+
+class FakeLens:
+    """Remplace serpapi : un résultat Lens différent par URL interrogée"""
+
+    def __init__(self):
+        self.calls = []
+
+    def GoogleSearch(self, params):
+        calls = self.calls
+        url = params['url']
+
+        class Search:
+            def get_dict(self):
+                calls.append(url)
+                return {'visual_matches': [{'title': f"match {url}"}]}
+
+        return Search()
+
+
+@pytest.fixture
+def lens(monkeypatch):
+    fake = FakeLens()
+    monkeypatch.setenv('SERPAPI_API_KEY', 'test')
+    monkeypatch.setattr(image_analyzer_module, 'serpapi', fake)
+    return fake
+
+
+def test_lens_cache_is_keyed_by_content(lens, tmp_path):
+    analyzer = ImageAnalyzer(search_backends=[])
+    store = TemporaryImageStore(str(tmp_path), 'https://images.test')
+    crops = [{'detection': {'class': 'cup'}, 'jpeg': b'first'},
+             {'detection': {'class': 'book'}, 'jpeg': b'second'}]
+
+    results = asyncio.run(analyzer.analyze_crops_with_lens(crops, store.store))
+    titles = [result['lens_analysis']['visual_matches'][0]['title'] for result in results]
+    assert titles[0] != titles[1]
+
+    # Même contenu : servi par le cache, sans nouvel upload ni appel Lens
+    uploads = []
+
+    async def upload(image_bytes):
+        uploads.append(image_bytes)
+        return await store.store(image_bytes)
+
+    again = asyncio.run(analyzer.analyze_image_bytes(b'first', upload))
+    assert again['visual_matches'][0]['title'] == titles[0]
+    assert uploads == [] and len(lens.calls) == 2
+
+
+def test_temporary_store_returns_one_url_per_content(tmp_path):
+    store = TemporaryImageStore(str(tmp_path), 'https://images.test/')
+    first = asyncio.run(store.store(b'first'))
+    assert first == asyncio.run(store.store(b'first'))
+    assert first != asyncio.run(store.store(b'second'))
+    assert first.startswith('https://images.test/') and len(list(tmp_path.iterdir())) == 2
+
+
+def test_temporary_store_requires_a_public_url(tmp_path):
+    with pytest.raises(RuntimeError):
+        asyncio.run(TemporaryImageStore(str(tmp_path)).store(b'image'))
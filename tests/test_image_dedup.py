@@ -0,0 +1,59 @@
+import numpy as np
+
+from services.image_dedup import HashIndex, ImageDeduplicator, hamming_distances
+
+
+def flip(image_hash: int, *bits: int) -> int:
+    for bit in bits:
+        image_hash ^= 1 << bit
+    return image_hash
+
+
+BASE = 0x0123456789ABCDEF
+
+
+def test_hamming_distances():
+    hashes = np.array([BASE, flip(BASE, 0), flip(BASE, 1, 40, 63)], dtype=np.uint64)
+    assert hamming_distances(hashes, BASE).tolist() == [0, 1, 3]
+
+
+def test_search_finds_nearest_within_distance():
+    index = HashIndex(capacity=64, max_distance=4, merge_threshold=2)
+    far = index.add(flip(BASE, *range(10)))
+    near = index.add(flip(BASE, 3, 17))
+    nearest = index.add(flip(BASE, 60))
+
+    assert index.search(BASE) == (nearest, 1)
+    assert index.search_all(BASE) == [(nearest, 1), (near, 2)]
+    assert far not in [entry for entry, _ in index.search_all(BASE)]
+    assert index.search(flip(BASE, *range(0, 64, 2))) is None
+
+
+def test_recycled_slots_are_compared_to_their_current_hash():
+    index = HashIndex(capacity=2, max_distance=2, merge_threshold=1)
+    index.add(BASE)
+    index.add(flip(BASE, *range(32)))
+    recent = index.add(flip(BASE, *range(32, 64)))
+
+    assert len(index) == 2
+    assert index.search(BASE) is None
+    assert index.search(flip(BASE, *range(32, 64))) == (recent, 0)
+
+
+def test_lookup_is_scoped_by_variant():
+    dedup = ImageDeduplicator(max_distance=4, capacity=64)
+    dedup.remember(BASE, {'strategy': 'distinct'}, 'distinct')
+
+    assert dedup.lookup(flip(BASE, 5), 'all') is None
+    assert dedup.lookup(flip(BASE, 5), 'distinct')['analysis'] == {'strategy': 'distinct'}
+
+
+def test_lookup_falls_back_when_nearest_result_was_evicted():
+    dedup = ImageDeduplicator(max_distance=4, capacity=64, results_capacity=1)
+    dedup.remember(BASE, {'analysis': 'nearest'})
+    # Évince l'analyse la plus proche du cache de résultats ; son hash reste indexé
+    dedup.remember(flip(BASE, 9, 10), {'analysis': 'farther'})
+
+    match = dedup.lookup(flip(BASE, 1))
+    assert match['analysis'] == {'analysis': 'farther'}
+    assert match['hamming_distance'] == 3
@@ -0,0 +1,79 @@
+import asyncio
+import gc
+import json
+
+from agents.copywriter_agent import CopywriterEngine
+from agents.data_aggregation_agent import DataAggregationEngine
+from services import incremental_listing
+from services.incremental_listing import DependencyGraph, _listing_graph
+
+
+def test_affected_nodes_follow_topological_order():
+    graph = DependencyGraph()
+    graph.add_input('a')
+    graph.add_input('b')
+    graph.add_node('c', ['a'], lambda get: None)
+    graph.add_node('d', ['c', 'b'], lambda get: None)
+    graph.add_node('e', ['b'], lambda get: None)
+
+    assert graph.affected(['a']) == ['c', 'd']
+    assert graph.affected(['b']) == ['d', 'e']
+
+
+def test_graph_is_shared_per_aggregator_and_released_with_it():
+    aggregator = DataAggregationEngine()
+    assert _listing_graph(aggregator) is _listing_graph(aggregator)
+    assert _listing_graph(DataAggregationEngine()) is not _listing_graph(aggregator)
+
+    del aggregator
+    gc.collect()
+    assert len(incremental_listing._GRAPHS) == 0
+
+
+def tracked_listing():
+    aggregator = DataAggregationEngine()
+    product = asyncio.run(aggregator.aggregate_data(
+        {'objects': [{'class': 'lamp', 'confidence': 0.9, 'bbox': [0, 0, 10, 10]}], 'main_subject': 'lamp'},
+        {'lens_analysis': {'visual_matches': [{'title': 'Lampe laiton', 'price': '40 €'}]}}
+    ))
+    return aggregator, CopywriterEngine().incremental_listing(aggregator, product)
+
+
+def test_new_prices_only_recompute_price_dependent_fields():
+    aggregator, tracked = tracked_listing()
+    title, tags = tracked.listing.title, list(tracked.listing.tags)
+
+    diff = tracked.update(price_samples=[60.0, 80.0])
+    assert set(diff) == {'price_range', 'description', 'call_to_action'}
+    # Valeurs simples, sérialisables en JSON
+    assert diff['price_range']['new'] == tracked.product.market_analysis.price_range.to_dict()
+    assert isinstance(diff['price_range']['old'], (dict, type(None)))
+    json.dumps(diff)
+    assert tracked.listing.title == title and tracked.listing.tags == tags
+
+
+def test_condition_change_updates_product_and_listing_in_place():
+    aggregator, tracked = tracked_listing()
+    product, listing = tracked.product, tracked.listing
+    old_condition = listing.condition
+
+    diff = tracked.update(condition='À restaurer')
+    assert diff['condition'] == {'old': old_condition, 'new': 'À restaurer'}
+    assert set(diff) == {'condition', 'title', 'description', 'highlights', 'tags'}
+    assert tracked.product is product and tracked.listing is listing
+    assert product.product_information.condition == listing.condition == 'À restaurer'
+    for field in set(diff) - {'condition'}:
+        assert diff[field]['new'] == getattr(listing, field)
+
+
+def test_unchanged_inputs_produce_an_empty_diff():
+    aggregator, tracked = tracked_listing()
+    assert tracked.update() == {}
+    assert tracked.update(condition=tracked.listing.condition) == {}
+
+
+def test_new_matches_are_appended():
+    aggregator, tracked = tracked_listing()
+    diff = tracked.update(visual_matches=[{'title': 'Lampe laiton vintage', 'price': '55 €'}])
+    assert len(tracked.product.product_information.visual_matches) == 2
+    assert diff['similar_products']['new'] == ['Lampe laiton', 'Lampe laiton vintage']
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+
+import pytest
+
+from agents.data_aggregation_agent import DataAggregationEngine
+from models.listing import Listing
+from services.inventory_store import LISTING_ONLY, InventoryStore, log_write_failure
+
+
+@pytest.fixture(scope='module')
+def product():
+    return asyncio.run(DataAggregationEngine().aggregate_data(
+        {'detections': [{'class': 'lamp', 'confidence': 0.9, 'bbox': [0, 0, 10, 10]}], 'main_subject': 'lamp'},
+        {'lens_analysis': {'visual_matches': [{'title': 'Lampe laiton', 'price': '40 €'}]}}
+    ))
+
+
+def listing(title):
+    return Listing(title=title, description='', highlights=[], tags=[], call_to_action='', condition='Bon état')
+
+
+def run(tmp_path, scenario):
+    async def wrapper():
+        store = InventoryStore(str(tmp_path / 'inventory.db'), max_batch=4)
+        await store.start()
+        try:
+            return await scenario(store)
+        finally:
+            await store.close()
+
+    return asyncio.run(wrapper())
+
+
+def test_analyses_are_kept_per_crop_strategy(tmp_path):
+    image_hash = 2 ** 64 - 1  # hors de l'intervalle des INTEGER signés
+
+    async def scenario(store):
+        distinct = await store.record_analysis(image_hash, [{'class': 'lamp', 'confidence': 0.9}], [{'a': 1}])
+        every = await store.record_analysis(image_hash, [{'class': 'chair', 'confidence': 0.5}], [],
+                                            crop_strategy='all')
+        replaced = await store.record_analysis(image_hash, [{'class': 'sofa', 'confidence': 0.7}], [],
+                                               crop_strategy='all')
+        return (distinct, every, replaced, await store.find_analysis(image_hash, 'distinct'),
+                await store.find_analysis(image_hash, 'all'), await store.find_analysis(1, 'all'))
+
+    distinct, every, replaced, stored_distinct, stored_all, missing = run(tmp_path, scenario)
+    assert distinct != every == replaced
+    assert [detection['class'] for detection in stored_distinct['object_detection']] == ['lamp']
+    assert stored_distinct['lens_analysis'] == [{'a': 1}]
+    assert [detection['class'] for detection in stored_all['object_detection']] == ['sofa']
+    assert missing is None
+
+
+def test_listings_are_linked_to_their_image(tmp_path, product):
+    async def scenario(store):
+        analysed = await store.record_analysis(42, [{'class': 'lamp', 'confidence': 0.9}], [{'a': 1}])
+        linked = await store.record_listings([product], [listing("Lampe")], image_hash=42)
+        # Image jamais analysée par /analyze (annonces de /analyze/objects)
+        first = await store.record_listings([product], [listing("Chaise")], image_hash=7)
+        second = await store.record_listings([product], [listing("Table")], image_hash=7)
+        rows = {row['id']: row['image_id'] for row in await store.search_listings()}
+        return analysed, rows[linked[0]], rows[first[0]], rows[second[0]], \
+            await store.find_analysis(7, LISTING_ONLY)
+
+    analysed, linked, first, second, listing_only = run(tmp_path, scenario)
+    assert linked == analysed
+    assert first is not None and first == second
+    assert listing_only is None
+
+
+def test_listings_filters_and_updates(tmp_path, product):
+    async def scenario(store):
+        ids = await store.record_listings([product, product], [listing("Lampe"), listing("Chaise")],
+                                          platform='leboncoin')
+        updated = await store.update_listing(ids[0], status='published', price=55.0)
+        missing = await store.update_listing(10_000, status='published')
+        return ids, updated, missing, await store.search_listings(status='published'), \
+            await store.search_listings(platform='facebook')
+
+    ids, updated, missing, published, other_platform = run(tmp_path, scenario)
+    assert updated and not missing
+    assert [row['id'] for row in published] == [ids[0]]
+    assert published[0]['price'] == 55.0 and published[0]['listing']['title'] == "Lampe"
+    assert other_platform == []
+
+
+def test_failed_write_does_not_cancel_its_batch(tmp_path, product):
+    def failing(connection):
+        raise ValueError("écriture invalide")
+
+    async def scenario(store):
+        futures = [store.record_listings([product], [listing("Lampe")]), store.submit(failing),
+                   store.record_listings([product], [listing("Chaise")])]
+        return await asyncio.gather(*futures, return_exceptions=True), await store.search_listings()
+
+    (first, failure, last), rows = run(tmp_path, scenario)
+    assert isinstance(failure, ValueError)
+    assert len(first) == len(last) == 1
+    assert len(rows) == 2
+
+
+def test_writes_before_start_are_ignored_with_a_warning(tmp_path, caplog, product):
+    async def scenario():
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        return await store.record_listings([product], [listing("Lampe")])
+
+    with caplog.at_level(logging.WARNING, logger='services.inventory_store'):
+        assert asyncio.run(scenario()) is None
+    assert "non démarré" in caplog.text
+
+
+def test_unawaited_write_failures_are_logged(tmp_path, caplog):
+    def failing(connection):
+        raise ValueError("écriture invalide")
+
+    async def scenario(store):
+        future = store.submit(failing)
+        future.add_done_callback(log_write_failure)
+        await asyncio.wait([future])
+
+    with caplog.at_level(logging.ERROR, logger='services.inventory_store'):
+        run(tmp_path, scenario)
+    assert "écriture invalide" in caplog.text
@@ -0,0 +1,153 @@
+import asyncio
+import gzip
+import tarfile
+
+import numpy as np
+import pytest
+
+from agents.data_aggregation_agent import DataAggregationEngine
+from agents.platform_optimizer_agent import PlatformOptimizerEngine
+from models.listing import Listing
+from services.image_storage import ListingImageStore
+from services.inventory_store import InventoryStore
+from services.platform_rules import get_platform_rules
+from services.listing_export import CsvFeedWriter, ExportItem, FeedWriter, ListingExporter, inventory_items
+
+
+def listing(title):
+    return Listing(title=title, description=f"{title} en bon état", highlights=['Complet'],
+                   tags=['vintage'], call_to_action='Contactez-moi', condition='Bon état')
+
+
+@pytest.mark.parametrize('listing_id', ['../x', 'a/b', '.hidden', '', 'a\\b', 'x\n'])
+def test_unsafe_listing_ids_are_rejected(listing_id):
+    with pytest.raises(ValueError):
+        ExportItem(listing_id, listing("Lampe"))
+
+
+def test_inventory_ids_are_converted_to_strings():
+    assert ExportItem(42, listing("Lampe")).listing_id == '42'
+
+
+def test_writers_must_implement_their_serialization():
+    class Incomplete(FeedWriter):
+        pass
+
+    class IncompleteCsv(CsvFeedWriter):
+        pass
+
+    for writer_class in (Incomplete, IncompleteCsv):
+        with pytest.raises(TypeError):
+            writer_class('feed.gz', None)
+
+
+def test_unknown_platform_is_rejected(tmp_path):
+    exporter = ListingExporter(PlatformOptimizerEngine())
+    with pytest.raises(ValueError):
+        asyncio.run(exporter.export([], str(tmp_path), ['myspace']))
+
+
+def test_export_writes_every_feed(tmp_path):
+    exporter = ListingExporter(PlatformOptimizerEngine(), chunk_size=2)
+    items = [ExportItem(str(index), listing(f"Lampe {index}"), price=40.0 + index) for index in range(5)]
+    try:
+        stats = asyncio.run(exporter.export(items, str(tmp_path)))
+    finally:
+        exporter.close()
+
+    assert stats['images'] == 0
+    assert stats['files'] and set(stats['files'].values()) == {5}
+    for path in stats['files']:
+        if path.endswith('.tar.gz'):
+            with tarfile.open(path) as archive:
+                assert len(archive.getnames()) == 5
+        else:
+            with gzip.open(path, 'rt', encoding='utf-8') as feed:
+                assert 'Lampe 4' in feed.read()
+
+
+@pytest.fixture(scope='module')
+def product():
+    return asyncio.run(DataAggregationEngine().aggregate_data(
+        {'detections': [{'class': 'lamp', 'confidence': 0.9, 'bbox': [0, 0, 10, 10]}], 'main_subject': 'lamp'},
+        {'lens_analysis': {'visual_matches': [{'title': 'Lampe laiton', 'price': '40 €'}]}}
+    ))
+
+
+def test_stored_listings_are_read_in_batches(tmp_path, product):
+
+    async def scenario():
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        await store.start()
+        try:
+            ids = await store.record_listings([product] * 5, [listing(f"Lampe {index}") for index in range(5)])
+            await store.update_listing(ids[0], status='published')
+            rows = [row async for row in store.iter_listings(batch_size=2)]
+            drafts = [item async for item in inventory_items(store, status='draft',
+                                                             listing_url='https://shop.example.com/')]
+            return ids, rows, drafts
+        finally:
+            await store.close()
+
+    ids, rows, drafts = asyncio.run(scenario())
+    assert [row['id'] for row in rows] == ids
+    assert [item.listing_id for item in drafts] == [str(listing_id) for listing_id in ids[1:]]
+    assert drafts[0].listing.title == "Lampe 1"
+    assert drafts[0].url == f"https://shop.example.com/{ids[1]}"
+
+
+def test_inventory_export_reencodes_stored_photos(tmp_path, product):
+    cv2 = pytest.importorskip('cv2')
+    photo = np.full((2000, 1500, 3), 127, dtype=np.uint8)
+    ok, encoded = cv2.imencode('.jpg', photo)
+    assert ok
+
+    async def scenario():
+        image_path = await ListingImageStore(str(tmp_path / 'photos')).save(encoded.tobytes())
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        await store.start()
+        exporter = ListingExporter(PlatformOptimizerEngine(), image_workers=1)
+        try:
+            ids = await store.record_listings([product], [listing("Lampe")], image_path=image_path)
+            stats = await exporter.export(inventory_items(store), str(tmp_path / 'export'), ['leboncoin'])
+            return ids, stats
+        finally:
+            await asyncio.to_thread(exporter.close)
+            await store.close()
+
+    ids, stats = asyncio.run(scenario())
+    assert stats['images'] == 1
+    size = get_platform_rules().get('leboncoin').image_size
+    reencoded = cv2.imread(str(tmp_path / 'export' / 'images' / f"{size[0]}x{size[1]}" / f"{ids[0]}.jpg"))
+    assert reencoded is not None
+    assert reencoded.shape[1] <= size[0] and reencoded.shape[0] <= size[1]
+
+
+def test_failed_chunk_cancels_the_next_encoding(tmp_path, monkeypatch):
+    exporter = ListingExporter(PlatformOptimizerEngine(), chunk_size=1)
+    encodings = []
+
+    async def slow_encoding(chunk, rules_by_platform, output_dir):
+        task = asyncio.current_task()
+        encodings.append(task)
+        if len(encodings) > 1:
+            await asyncio.sleep(10)
+        return {}
+
+    async def failing_write(chunk, encoding, *args):
+        await encoding
+        await asyncio.sleep(0.01)
+        raise RuntimeError("disque plein")
+
+    monkeypatch.setattr(exporter, '_reencode_chunk', slow_encoding)
+    monkeypatch.setattr(exporter, '_write_chunk', failing_write)
+
+    async def scenario():
+        items = [ExportItem(str(index), listing(f"Lampe {index}")) for index in range(3)]
+        with pytest.raises(RuntimeError):
+            await exporter.export(items, str(tmp_path))
+        await asyncio.sleep(0)
+        # Vérifié avant la sortie d'asyncio.run, qui annule lui-même les tâches restantes
+        return encodings[-1].cancelled()
+
+    assert asyncio.run(scenario())
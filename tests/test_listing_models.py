@@ -0,0 +1,80 @@
+import pytest
+
+from models.listing import (AggregatedProduct, AnalysisMetadata, CompetitionAnalysis, Listing, MarketAnalysis,
+                            PriceRange, ProductInformation, TechnicalDetails)
+
+
+def product():
+    return AggregatedProduct(
+        ProductInformation('Lampe laiton', 'Bon état', main_category='lamp',
+                           detected_objects=[{'class': 'lamp', 'confidence': 0.9, 'bbox': [0, 0, 10, 10]}],
+                           visual_matches=[{'title': 'Lampe laiton', 'price': '40 €'}]),
+        MarketAnalysis(PriceRange(30.0, 50.0, 40.0), ['Lampe laiton'], ['Maison'],
+                       CompetitionAnalysis(market_saturation='low', price_competitiveness='premium')),
+        TechnicalDetails(['Laiton massif'], {'hauteur': '40 cm'}, ['Abat-jour en tissu']),
+        AnalysisMetadata(analysis_version='1.0', confidence_score=0.9, timestamp='2024-01-01T00:00:00')
+    )
+
+
+def listing():
+    return Listing('Lampe laiton', 'Belle lampe.', highlights=['Laiton massif'], tags=['#lampe'],
+                   call_to_action='À saisir', condition='Bon état', platform_specific={'leboncoin': {'category': 'Maison'}})
+
+
+@pytest.mark.parametrize('instance', [
+    product(),
+    product().product_information,
+    product().market_analysis,
+    product().market_analysis.price_range,
+    product().market_analysis.competition_analysis,
+    product().technical_details,
+    product().metadata,
+    listing(),
+], ids=lambda instance: type(instance).__name__)
+def test_models_round_trip_through_dicts(instance):
+    data = instance.to_dict()
+    assert type(instance).from_dict(data) == instance
+    assert type(instance).from_dict(data).to_dict() == data
+
+
+@pytest.mark.parametrize('cls', [PriceRange, ProductInformation, CompetitionAnalysis, MarketAnalysis,
+                                 TechnicalDetails, AnalysisMetadata, AggregatedProduct, Listing])
+def test_models_are_slotted(cls):
+    assert '__slots__' in cls.__dict__
+    with pytest.raises(AttributeError):
+        object.__setattr__(cls.__new__(cls), 'undeclared', 1)
+
+
+def test_from_dict_copies_mutable_fields():
+    data = listing().to_dict()
+    restored = Listing.from_dict(data)
+    restored.tags.append('#vintage')
+    restored.platform_specific['ebay'] = {}
+    assert data['tags'] == ['#lampe']
+    assert 'ebay' not in data['platform_specific']
+
+
+def test_optional_sections_get_defaults():
+    restored = AggregatedProduct.from_dict({'product_information': {'product_name': 'Lampe', 'condition': None}})
+    assert restored.product_information.condition == ''
+    assert restored.market_analysis.price_range is None
+    assert restored.market_analysis.competition_analysis == CompetitionAnalysis()
+    assert restored.metadata.confidence_score == 0.0
+    assert restored.to_dict()['market_analysis']['price_range'] is None
+
+
+@pytest.mark.parametrize('cls, data', [
+    (Listing, {'title': 'Lampe'}),
+    (AggregatedProduct, {}),
+    (PriceRange, {'min': 1.0, 'max': 2.0}),
+])
+def test_missing_required_fields_raise_value_error(cls, data):
+    with pytest.raises(ValueError):
+        cls.from_dict(data)
+
+
+def test_coerce_accepts_instances_and_dicts():
+    instance = listing()
+    assert Listing.coerce(instance) is instance
+    assert Listing.coerce(instance.to_dict()) == instance
+    assert AggregatedProduct.coerce(product().to_dict()) == product()
@@ -0,0 +1,138 @@
+import copy
+
+import pytest
+
+from models.listing import (AggregatedProduct, AnalysisMetadata, CompetitionAnalysis, MarketAnalysis, PriceRange,
+                            ProductInformation, TechnicalDetails)
+from services.listing_templates import DEFAULT_TEMPLATES_PATH, ListingTemplateEngine, TemplateCompiler
+
+DEFAULT = {
+    'title': {'join': ' | ', 'parts': ['{product_name}', '{condition_title}', '{usp}']},
+    'usp': 'Prix Compétitif',
+    'opening': 'Découvrez {product_name} en {condition} !',
+    'main': '[[Caractéristiques:\n{specifications|dash:2}]]',
+    'technical': '[[Détails:\n{features|bullet}]]',
+    'market': '[[Entre {price_min}€ et {price_max}€]]',
+    'highlight_condition': '[[État: {condition}]]',
+    'cta': {'first': ['[[Seulement {price_average}€ !]]', 'Contactez-nous !']},
+}
+CONFIG = {
+    'default_condition': 'Bon état',
+    'categories': {'electronics': ['laptop', 'tv']},
+    'locales': {
+        'fr': {
+            'conditions': {'Bon état': 'Bon état', 'Neuf': 'Neuf'},
+            'templates': {
+                'default': DEFAULT,
+                'category:electronics': {'opening': 'Appareil {product_name} testé !'},
+                'platform:instagram': {'opening': 'Drop : {product_name} !'},
+            }
+        },
+        'en': {
+            'conditions': {'Bon état': 'Good condition', 'Neuf': 'New'},
+            'templates': {'default': dict(DEFAULT, opening='Check out {product_name} in {condition}!')}
+        }
+    }
+}
+
+
+def compiled(template):
+    return TemplateCompiler().compile(template, 'test')
+
+
+def test_fields_filters_and_optional_segments():
+    render = compiled('{name|lower}[[ ({count})]]:\n{items|dash:2}')
+    assert render({'name': 'LAMPE', 'count': 0, 'items': ['a', 'b', 'c']}) == 'lampe (0):\n- a\n- b'
+    assert render({'name': None}) == ':\n'
+
+
+def test_join_and_first_alternatives():
+    assert compiled({'join': ' | ', 'parts': ['{a}', '{b}', '{c}']})({'a': 'x', 'c': 'z'}) == 'x | z'
+    render = compiled({'first': ['[[{price}€]]', 'Sur demande']})
+    assert render({'price': 12}) == '12€'
+    assert render({}) == 'Sur demande'
+
+
+@pytest.mark.parametrize('template', [
+    '{items|shout}',                          # filtre inconnu
+    '{items|dash:abc}',                       # limite non numérique
+    '{name|lower:3}',                         # argument sur un filtre sans limite
+    {'join': 5, 'parts': ['{a}']},            # séparateur non textuel
+    {'join': ' ', 'parts': '{a}'},
+    {'first': '{a}'},
+    {'unknown': []},
+    42,
+])
+def test_invalid_templates_are_rejected_when_compiling(template):
+    with pytest.raises(ValueError):
+        compiled(template)
+
+
+def test_template_text_cannot_inject_code():
+    render = compiled("') + __import__('os').getcwd() + ('{name}")
+    assert render({'name': 'x'}) == "') + __import__('os').getcwd() + ('x"
+
+
+def test_bad_expression_in_config_fails_at_engine_construction():
+    config = copy.deepcopy(CONFIG)
+    config['locales']['en']['templates']['default']['main'] = '{specifications|dash:five}'
+    with pytest.raises(ValueError):
+        ListingTemplateEngine(config)
+
+
+def test_missing_default_template_is_rejected():
+    config = copy.deepcopy(CONFIG)
+    del config['locales']['fr']['templates']['default']['cta']
+    with pytest.raises(ValueError):
+        ListingTemplateEngine(config)
+
+
+def test_template_resolution_falls_back_from_platform_to_category_to_default():
+    engine = ListingTemplateEngine(CONFIG)
+    opening = lambda **kwargs: engine.template_set(**kwargs).opening('Lampe', 'Neuf')
+
+    assert opening(locale='fr') == 'Découvrez Lampe en Neuf !'
+    assert opening(locale='fr', category='laptop') == 'Appareil Lampe testé !'
+    assert opening(locale='fr', category='chair') == 'Découvrez Lampe en Neuf !'
+    assert opening(locale='fr', platform='Instagram') == 'Drop : Lampe !'
+    # La plateforme l'emporte sur la catégorie
+    assert opening(locale='fr', category='tv', platform='instagram') == 'Drop : Lampe !'
+    assert opening(locale='fr', platform='leboncoin') == 'Découvrez Lampe en Neuf !'
+    # Locale sans gabarits spécifiques : défaut de la locale, états traduits
+    assert opening(locale='en', category='laptop', platform='instagram') == 'Check out Lampe in New!'
+    with pytest.raises(ValueError):
+        engine.template_set('de')
+
+
+def product(condition='Neuf', price_range=PriceRange(10.0, 30.0, 20.0)):
+    return AggregatedProduct(
+        product_information=ProductInformation(
+            product_name='Lampe', condition=condition, main_category='lamp'),
+        market_analysis=MarketAnalysis(
+            price_range=price_range, market_categories=['deco'],
+            competition_analysis=CompetitionAnalysis(price_competitiveness='competitive')),
+        technical_details=TechnicalDetails(specifications=['laiton', 'E27', '40 cm'], features=['variateur']),
+        metadata=AnalysisMetadata(analysis_version='1.0', confidence_score=0.9, timestamp='')
+    )
+
+
+def test_render_matches_the_field_helpers():
+    templates = ListingTemplateEngine(CONFIG).template_set('fr')
+    listing = templates.render(product())
+
+    assert listing.title == 'Lampe | Neuf | Prix Compétitif'
+    assert listing.description == (
+        'Découvrez Lampe en Neuf !\n\nCaractéristiques:\n- laiton\n- E27\n\nDétails:\n• variateur'
+        '\n\nEntre 10.0€ et 30.0€')
+    assert listing.highlights == ['variateur', 'État: Neuf']
+    assert sorted(listing.tags) == ['deco', 'lampe', 'neuf']
+    assert listing.call_to_action == 'Seulement 20.0€ !'
+
+    plain = templates.render(product(condition='Bon état', price_range=None))
+    assert plain.title == 'Lampe | Prix Compétitif'
+    assert plain.call_to_action == 'Contactez-nous !'
+
+
+def test_shipped_templates_compile():
+    engine = ListingTemplateEngine.from_file(DEFAULT_TEMPLATES_PATH)
+    assert set(engine.locales) >= {'fr', 'en'}
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+httpx = pytest.importorskip('httpx')
+cv2 = pytest.importorskip('cv2')
+
+import main
+from services.admission_control import AdmissionController
+from services.image_dedup import ImageDeduplicator
+from services.object_detection import ObjectDetectionService
+from services.roi_cropper import RegionOfInterestCropper
+
+# Pipeline simulé : inférence bloquante sur le thread du détecteur, Lens sur le réseau
+INFERENCE_TIME = {640: 0.030, 320: 0.010}
+LENS_TIME = 0.100
+LATENCY_SLO = 0.5
+
+
+class Tensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class SlowModel:
+    """Modèle YOLO factice : un objet très sûr, temps d'inférence selon imgsz"""
+
+    def __call__(self, image, imgsz):
+        time.sleep(INFERENCE_TIME[imgsz])
+        boxes = type('Boxes', (), {
+            'xyxy': Tensor(np.array([[8.0, 8.0, 56.0, 56.0]])),
+            'conf': Tensor(np.array([0.9])),
+            'cls': Tensor(np.array([0.0]))
+        })
+        return [type('Result', (), {'boxes': boxes, 'names': {0: 'cup'}})]
+
+
+class SlowLens:
+    async def research_crops(self, crops, upload_crop, image_shape, enrich=True):
+        await asyncio.sleep(LENS_TIME)
+        return [{'detection': crop['detection'], 'lens_analysis': {}} for crop in crops]
+
+
+class NullInventory:
+    async def find_analysis(self, image_hash, crop_strategy):
+        return None
+
+    def record_analysis(self, *args):
+        written = asyncio.get_running_loop().create_future()
+        written.set_result(None)
+        return written
+
+
+def photos(count):
+    """Images PNG toutes différentes : aucune réponse servie par la déduplication"""
+    rng = np.random.default_rng(0)
+    return [cv2.imencode('.png', rng.integers(0, 256, (64, 64, 3), dtype=np.uint8))[1].tobytes()
+            for _ in range(count)]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    threads = {'decode': [], 'hash': [], 'crop': []}
+
+    def recorded(name, function):
+        def wrapper(*args, **kwargs):
+            threads[name].append(threading.current_thread())
+            return function(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(ObjectDetectionService, '_load', lambda self, weights: SlowModel())
+    detector = ObjectDetectionService(ladder=[('yolov8n.pt', 640)])
+    deduplicator = ImageDeduplicator()
+    cropper = RegionOfInterestCropper()
+    monkeypatch.setattr(detector, 'decode_image', recorded('decode', detector.decode_image))
+    monkeypatch.setattr(deduplicator, 'hash_image', recorded('hash', deduplicator.hash_image))
+    monkeypatch.setattr(cropper, 'crop_regions', recorded('crop', cropper.crop_regions))
+
+    admission = AdmissionController(max_concurrent=2, max_queue=8, latency_slo=LATENCY_SLO, min_samples=5)
+    for name, instance in {'object_detection': detector, 'deduplicator': deduplicator, 'roi_cropper': cropper,
+                           'lens_researcher': SlowLens(), 'inventory': NullInventory(),
+                           'admission': admission}.items():
+        monkeypatch.setitem(main.container._instances, name, instance)
+    yield admission, threads
+    detector.close()
+
+
+def test_bursty_load_is_shed_within_the_latency_slo(pipeline):
+    admission, threads = pipeline
+    images = iter(photos(10 + 4 * 40))
+
+    async def scenario():
+        latencies, rejected = [], []
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+
+            async def request():
+                start = time.monotonic()
+                response = await client.post('/analyze', files={'file': ('a.png', next(images))})
+                if response.status_code == 503:
+                    rejected.append(response)
+                else:
+                    assert response.status_code == 200, response.text
+                    latencies.append(time.monotonic() - start)
+
+            # Échauffement séquentiel : le contrôleur apprend les temps de service
+            for _ in range(10):
+                await request()
+            latencies.clear()
+
+            # Rafales bien au-delà de la capacité (2 emplacements, ~0,15 s par requête)
+            for _ in range(4):
+                await asyncio.gather(*(request() for _ in range(40)))
+                await asyncio.sleep(0.2)
+        return latencies, rejected
+
+    latencies, rejected = asyncio.run(scenario())
+
+    # Chaque rafale occupe au moins tous les emplacements ; le surplus est refusé
+    assert len(latencies) >= 4 * admission.max_concurrent
+    assert rejected and len(rejected) == admission.rejected
+    for response in rejected:
+        assert int(response.headers['retry-after']) >= 1
+    # Les requêtes servies tiennent le SLO malgré les rafales
+    latencies.sort()
+    p99 = latencies[min(int(0.99 * len(latencies)), len(latencies) - 1)]
+    assert p99 <= LATENCY_SLO
+
+    # Décodage, hash et découpage hors de la boucle d'événements
+    loop_thread = threading.current_thread()
+    for name, used in threads.items():
+        assert used and all(thread is not loop_thread for thread in used), name
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from services.object_detection import ObjectDetectionService
+
+
+class FakeBoxes:
+    def __init__(self, confidence):
+        self.xyxy = FakeTensor(np.array([[0.0, 0.0, 10.0, 10.0]]))
+        self.conf = FakeTensor(np.array([confidence]))
+        self.cls = FakeTensor(np.array([0.0]))
+
+
+class FakeTensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class FakeModel:
+    """Modèle YOLO factice : confiance fixe, enregistre le thread et la résolution d'inférence"""
+
+    def __init__(self, confidence, threads):
+        self.confidence = confidence
+        self.threads = threads
+        self.sizes = []
+
+    def __call__(self, image, imgsz):
+        self.threads.append(threading.current_thread())
+        self.sizes.append(imgsz)
+        result = type('Result', (), {'boxes': FakeBoxes(self.confidence), 'names': {0: 'cup'}})
+        return [result]
+
+
+def service(confidences, monkeypatch):
+    threads = []
+    models = {f"m{i}.pt": FakeModel(confidence, threads) for i, confidence in enumerate(confidences)}
+    monkeypatch.setattr(ObjectDetectionService, '_load', lambda self, weights: models[weights])
+    detector = ObjectDetectionService(ladder=[(weights, 640) for weights in models])
+    detector.fakes = models
+    return detector, threads
+
+
+def test_inference_runs_off_the_event_loop(monkeypatch):
+    detector, threads = service([0.9], monkeypatch)
+
+    async def scenario():
+        detections = await detector.detect_objects_in_image(np.zeros((20, 20, 3), dtype=np.uint8))
+        return detections, threading.current_thread()
+
+    try:
+        detections, loop_thread = asyncio.run(scenario())
+    finally:
+        detector.close()
+    assert detections[0]['class'] == 'cup' and detections[0]['model'] == 'm0@640'
+    assert threads and all(thread is not loop_thread for thread in threads)
+
+
+def test_ladder_escalates_until_confident(monkeypatch):
+    detector, threads = service([0.2, 0.6, 0.9], monkeypatch)
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    try:
+        best = asyncio.run(detector.detect_objects_in_image(image))
+        degraded = asyncio.run(detector.detect_objects_in_image(image, escalate=False))
+    finally:
+        detector.close()
+    assert best[0]['model'] == 'm1@640'
+    assert degraded[0]['model'] == 'm0@640'
+    assert detector.escalations == [1, 0, 0]
+    assert detector.ladder_stats() == {
+        'runs': 2, 'reduced_runs': 0, 'escalations': {'m0@640': 1, 'm1@640': 0, 'm2@640': 0}
+    }
+
+
+def test_reduced_imgsz_runs_the_first_rung_only(monkeypatch):
+    detector, threads = service([0.2, 0.6, 0.9], monkeypatch)
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    try:
+        detections = asyncio.run(detector.detect_objects_in_image(image, imgsz=320))
+    finally:
+        detector.close()
+    # Confiance sous la cible, mais pas d'escalade en mode dégradé
+    assert detections[0]['model'] == 'm0@320'
+    assert detector.fakes['m0.pt'].sizes == [320]
+    assert detector.fakes['m1.pt'].sizes == detector.fakes['m2.pt'].sizes == []
+    assert detector.escalations == [0, 0, 0]
+    assert detector.ladder_stats()['reduced_runs'] == 1 and detector.ladder_stats()['runs'] == 0
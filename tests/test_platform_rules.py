@@ -0,0 +1,55 @@
+from services.platform_rules import PlatformRulebook, get_platform_rules
+
+CONFIG = {
+    'emojis': {'prix': '💰', 'prix bas': '🔥', 'livraison': '🚚'},
+    'platforms': {
+        'Leboncoin': {
+            'title_length': 70,
+            'description_length': 4000,
+            'tags_count': 0,
+            'forbidden_words': ['WhatsApp', 'paypal'],
+            'condition_map': {'Neuf': 'Etat neuf'},
+            'default_condition': 'Bon état',
+            'export': {'formats': ['leboncoin_csv'], 'image_size': [1200, 900]}
+        },
+        'instagram': {'title_length': 100, 'description_length': 2200, 'tags_count': 30, 'hashtags': True}
+    }
+}
+
+
+def test_platforms_are_looked_up_case_insensitively():
+    rulebook = PlatformRulebook(CONFIG)
+    rules = rulebook.get('LEBONCOIN')
+    assert rules.name == 'leboncoin'
+    assert rules.export_formats == ('leboncoin_csv',)
+    assert rules.image_size == (1200, 900)
+    assert rulebook.get('instagram').image_size is None
+    assert rulebook.get('ebay') is None
+
+
+def test_forbidden_words_are_reported_in_configuration_order():
+    rules = PlatformRulebook(CONFIG).get('leboncoin')
+    assert rules.find_forbidden("Paiement PayPal", "Écrivez-moi sur whatsapp") == ['whatsapp', 'paypal']
+    assert rules.find_forbidden("Remise en main propre") == []
+    assert PlatformRulebook(CONFIG).get('instagram').find_forbidden("paypal") == []
+
+
+def test_condition_category_falls_back_to_default():
+    rules = PlatformRulebook(CONFIG).get('leboncoin')
+    assert rules.condition_category('Neuf') == 'Etat neuf'
+    assert rules.condition_category('Usé') == 'Bon état'
+    assert rules.condition_category(None) == 'Bon état'
+
+
+def test_emoji_pass_prefers_longest_keyword_and_is_idempotent():
+    rulebook = PlatformRulebook(CONFIG)
+    once = rulebook.add_emojis("prix bas et livraison offerte, prix ferme")
+    assert once == "🔥 prix bas et 🚚 livraison offerte, 💰 prix ferme"
+    assert rulebook.add_emojis(once) == once
+
+
+def test_shipped_configuration_loads():
+    rulebook = get_platform_rules()
+    for name in ('facebook', 'instagram', 'leboncoin'):
+        rules = rulebook.get(name)
+        assert rules.title_length > 0 and rules.export_formats and rules.image_size
@@ -0,0 +1,34 @@
+import pytest
+
+from services.pricing import extract_prices, parse_price, summarize_prices
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('$1,299.00', 1299.0),
+    ('1.299,00 €', 1299.0),
+    ('2.500 €', 2500.0),
+    ('1,299', 1299.0),
+    ('45,90 €', 45.9),
+    ('12.5', 12.5),
+    ('1 299,99 €', 1299.99),
+    ('1 234,5 €', 1234.5),
+    ('1.234.567', 1234567.0),
+    ('CHF 80.-', 80.0),
+    (12, 12.0),
+    ({'value': '$12', 'extracted_value': 12.0}, 12.0),
+    ({'value': '8,50 €'}, 8.5),
+])
+def test_parse_price(value, expected):
+    assert parse_price(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', ['Prix sur demande', None, [], ''])
+def test_unparseable_prices(value):
+    assert parse_price(value) is None
+
+
+def test_extract_and_summarize_prices():
+    prices = extract_prices([{'price': '10 €'}, {'title': 'sans prix'}, {'price': 'gratuit'}, {'price': '30,00 €'}])
+    assert prices == [10.0, 30.0]
+    assert summarize_prices(prices) == {'min': 10.0, 'max': 30.0, 'average': 20.0}
+    assert summarize_prices([]) is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from services.roi_cropper import RegionOfInterestCropper
+
+
+def detection(cls, confidence, bbox):
+    return {'class': cls, 'confidence': confidence, 'bbox': bbox}
+
+
+DETECTIONS = [
+    detection('cup', 0.9, [0, 0, 10, 10]),
+    detection('cup', 0.6, [0, 0, 50, 50]),
+    detection('book', 0.7, [10, 10, 40, 30]),
+    detection('chair', 0.1, [0, 0, 100, 100]),
+]
+
+
+def test_low_confidence_detections_are_ignored():
+    regions = RegionOfInterestCropper().select_regions(DETECTIONS, 'all')
+    assert all(region['class'] != 'chair' for region in regions)
+
+
+def test_distinct_keeps_most_confident_per_class_by_area():
+    regions = RegionOfInterestCropper().select_regions(DETECTIONS, 'distinct')
+    assert [(r['class'], r['confidence']) for r in regions] == [('book', 0.7), ('cup', 0.9)]
+
+
+def test_single_region_strategies():
+    cropper = RegionOfInterestCropper()
+    assert cropper.select_regions(DETECTIONS, 'largest')[0]['confidence'] == 0.6
+    assert cropper.select_regions(DETECTIONS, 'most_confident')[0]['confidence'] == 0.9
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        RegionOfInterestCropper().select_regions(DETECTIONS, 'random')
+
+
+def test_crop_is_padded_clipped_and_downscaled():
+    image = np.zeros((2000, 3000, 3), dtype=np.uint8)
+    cropper = RegionOfInterestCropper(max_side=640, padding=0.05)
+    crops = cropper.crop_regions(image, [detection('tv', 0.9, [0, 0, 2000, 1000])], 'all')
+
+    assert len(crops) == 1
+    # Marge de 5 % à droite et en bas, bornée à gauche et en haut par l'image
+    assert crops[0]['shape'] == (1050, 2100)
+    assert crops[0]['jpeg'][:2] == b'\xff\xd8'
+
+
+def test_degenerate_box_produces_no_crop():
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    crops = RegionOfInterestCropper(padding=0).crop_regions(image, [detection('tv', 0.9, [200, 200, 300, 300])])
+    assert crops == []
+
+
+def test_limit_zero_and_negative_select_nothing():
+    cropper = RegionOfInterestCropper(max_crops=5)
+    assert cropper.select_regions(DETECTIONS, 'all', limit=0) == []
+    assert cropper.select_regions(DETECTIONS, 'all', limit=-1) == []
+    assert len(cropper.select_regions(DETECTIONS, 'all')) == 3
+    assert len(cropper.select_regions(DETECTIONS, 'all', limit=1)) == 1
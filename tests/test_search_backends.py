@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services.image_analyzer import ImageAnalyzer
+from services.search_backends import SearchBackend, merge_results
+
+
+class StaticBackend(SearchBackend):
+    def __init__(self, name, results, delay=0.0, timeout=1.0):
+        super().__init__(timeout)
+        self.name = name
+        self.results = results
+        self.delay = delay
+
+    async def search(self, query, max_results):
+        await asyncio.sleep(self.delay)
+        return [dict(result, source=self.name) for result in self.results][:max_results]
+
+
+def test_backend_must_implement_search():
+    class Incomplete(SearchBackend):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        SearchBackend()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_merge_results_deduplicates_by_normalized_link():
+    merged = {}
+    merge_results(merged, [{'title': 'Lampe', 'link': 'https://www.shop.fr/lampe/', 'price': None, 'source': 'a'}])
+    merge_results(merged, [{'title': 'Lampe', 'link': 'https://shop.fr/lampe', 'price': '12 €', 'source': 'b'}])
+    assert list(merged.values()) == [
+        {'title': 'Lampe', 'link': 'https://www.shop.fr/lampe/', 'price': '12 €', 'source': 'a', 'sources': ['a', 'b']}
+    ]
+
+
+def test_search_additional_info_reports_backend_timeouts(monkeypatch):
+    monkeypatch.setenv('SERPAPI_API_KEY', 'test')
+    analyzer = ImageAnalyzer(search_backends=[
+        StaticBackend('fast', [{'title': 'Lampe', 'link': 'https://shop.fr/lampe'}]),
+        StaticBackend('slow', [{'title': 'Autre', 'link': 'https://shop.fr/autre'}], delay=1.0, timeout=0.05),
+    ])
+
+    result = asyncio.run(analyzer.search_additional_info('  lampe   vintage ', max_results=5))
+    assert result['query'] == 'lampe vintage'
+    assert [item['title'] for item in result['results']] == ['Lampe']
+    assert result['backends'] == {'fast': 'ok', 'slow': 'timeout'}
+
+
+def test_early_stopped_search_is_not_cached(monkeypatch):
+    monkeypatch.setenv('SERPAPI_API_KEY', 'test')
+    analyzer = ImageAnalyzer(search_backends=[
+        StaticBackend('fast', [{'title': 'Lampe', 'link': 'https://shop.fr/lampe'}]),
+        StaticBackend('slow', [{'title': 'Autre', 'link': 'https://shop.fr/autre'}], delay=0.05),
+    ])
+
+    async def scenario():
+        partial = await analyzer.search_additional_info('lampe', max_results=5, min_results=1)
+        full = await analyzer.search_additional_info('lampe', max_results=5)
+        return partial, full, await analyzer.search_additional_info('lampe', max_results=5)
+
+    partial, full, cached = asyncio.run(scenario())
+    assert partial['backends'] == {'fast': 'ok', 'slow': 'cancelled'}
+    assert [item['title'] for item in full['results']] == ['Lampe', 'Autre']
+    assert cached is full
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from utils import serialization
+from utils.serialization import MSGPACK_MEDIA_TYPE, dumps_json, negotiate_response, trim_lens_payload
+
+
+class FakeRequest:
+    def __init__(self, accept):
+        self.headers = {'accept': accept}
+
+
+def test_dumps_json_handles_numpy_and_sets():
+    assert dumps_json({'score': np.float32(0.5), 'boxes': np.arange(3), 'tags': {'a'}}) == \
+        b'{"score":0.5,"boxes":[0,1,2],"tags":["a"]}'
+
+
+def test_trim_lens_payload_keeps_useful_fields():
+    trimmed = trim_lens_payload({
+        'visual_matches': [{'title': 'Lampe', 'position': 1, 'link': 'https://shop.fr'}],
+        'knowledge_graph': [{'title': 'Lampe', 'images': []}]
+    })
+    assert trimmed == {'visual_matches': [{'title': 'Lampe', 'link': 'https://shop.fr'}],
+                       'knowledge_graph': [{'title': 'Lampe'}]}
+
+
+def test_msgpack_is_negotiated_when_installed():
+    msgpack = pytest.importorskip('msgpack')
+    response = negotiate_response(FakeRequest(MSGPACK_MEDIA_TYPE), {'count': np.int64(2)})
+    assert response.media_type == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.body) == {'count': 2}
+
+
+def test_json_fallback_without_msgpack(monkeypatch):
+    monkeypatch.setattr(serialization, 'msgpack', None)
+    response = negotiate_response(FakeRequest(MSGPACK_MEDIA_TYPE), {'count': 2})
+    assert response.media_type == 'application/json'
+    assert response.body == b'{"count":2}'
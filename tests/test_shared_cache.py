@@ -0,0 +1,84 @@
+import asyncio
+import shutil
+import tempfile
+
+import pytest
+
+from services.shared_cache import CacheDaemon, SharedCacheClient, _frame, _read_frame
+
+
+@pytest.fixture
+def socket_path():
+    # Chemin court : les sockets Unix sont limités à ~100 caractères
+    directory = tempfile.mkdtemp(prefix='lens-cache-', dir='/tmp')
+    yield f"{directory}/cache.sock"
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+async def serving(server_coroutine):
+    task = asyncio.create_task(server_coroutine)
+    await asyncio.sleep(0.05)
+    return task
+
+
+def test_round_trip_through_the_daemon(socket_path):
+    async def scenario():
+        daemon = await serving(CacheDaemon(socket_path).serve())
+        client = SharedCacheClient(socket_path, timeout=1.0)
+        try:
+            missing = await client.get('lens', 'abc')
+            await client.set('lens', 'abc', {'visual_matches': [{'title': 'Lampe'}]})
+            await client.set('search', 'abc', 'autre espace')
+            return missing, await client.get('lens', 'abc'), await client.get('search', 'abc')
+        finally:
+            await client.close()
+            daemon.cancel()
+
+    assert asyncio.run(scenario()) == (None, {'visual_matches': [{'title': 'Lampe'}]}, 'autre espace')
+
+
+def test_unknown_operation_is_an_error_response():
+    with pytest.raises(ValueError):
+        CacheDaemon().handle({'op': 'delete', 'ns': 'lens', 'key': 'abc'})
+
+
+def test_missing_daemon_is_a_cache_miss(socket_path):
+    async def scenario():
+        client = SharedCacheClient(socket_path, timeout=0.1)
+        await client.set('lens', 'abc', 1)
+        return await client.get('lens', 'abc')
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_cancelled_request_does_not_leak_its_response(socket_path):
+    async def slow_echo(reader, writer):
+        # Répond la clé demandée, lentement pour la clé 'slow'
+        try:
+            while True:
+                message = await _read_frame(reader)
+                if message['key'] == 'slow':
+                    await asyncio.sleep(0.1)
+                writer.write(_frame({'hit': True, 'value': message['key']}))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    async def scenario():
+        server = await asyncio.start_unix_server(slow_echo, path=socket_path)
+        client = SharedCacheClient(socket_path, timeout=1.0)
+        try:
+            slow = asyncio.create_task(client.get('lens', 'slow'))
+            await asyncio.sleep(0.02)
+            slow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await slow
+            await asyncio.sleep(0.15)
+            return await client.get('lens', 'fast')
+        finally:
+            await client.close()
+            server.close()
+
+    assert asyncio.run(scenario()) == 'fast'
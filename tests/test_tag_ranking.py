@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.data_aggregation_agent import DataAggregationEngine
+from models.listing import Listing
+from services.inventory_store import InventoryStore
+from services.tag_ranking import TagRanker, Vocabulary, index_recorded_listings, tokenize
+
+
+def listing(title, description='', highlights=()):
+    return Listing(title=title, description=description, highlights=list(highlights), tags=[],
+                   call_to_action='', condition='Bon état')
+
+
+def test_tokenize_normalizes_case_and_hashtags():
+    assert tokenize("#Vintage Lampe, laiton!") == ['vintage', 'lampe', 'laiton']
+    assert tokenize('') == []
+
+
+def test_vocabulary_grows_and_reports_unknown_terms():
+    vocabulary = Vocabulary(initial_capacity=1)
+    ids = [vocabulary.add(term) for term in ('a', 'b', 'c', 'a')]
+    assert ids == [0, 1, 2, 0]
+    assert vocabulary.lookup(['c', 'z']).tolist() == [2, -1]
+    assert vocabulary.frequencies(np.array([2, -1])).tolist() == [0, 0]
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        TagRanker('bm42')
+
+
+@pytest.mark.parametrize('method', ['bm25', 'tfidf'])
+def test_specific_tags_rank_above_common_ones(method):
+    ranker = TagRanker(method)
+    for i in range(20):
+        ranker.add_document(f"smartphone occasion modèle {i}")
+    ranker.add_document("smartphone pliable occasion")
+
+    text = "Smartphone pliable d'occasion, très bon état"
+    assert ranker.rank_tags(['occasion', 'pliable', 'tablette', 'occasion'], text) == ['pliable', 'occasion', 'tablette']
+    assert ranker.rank_tags(['occasion', 'pliable'], text, limit=1) == ['pliable']
+
+
+def test_listings_are_counted_once_per_id():
+    ranker = TagRanker()
+    assert ranker.add_listing(listing("Lampe"), listing_id=1)
+    assert not ranker.add_listing(listing("Lampe modifiée"), listing_id=1)
+    assert ranker.add_catalog([(1, listing("Lampe")), (2, listing("Chaise"))]) == 1
+    assert ranker.document_count == 2
+
+
+def test_catalog_order_does_not_matter():
+    ranker = TagRanker()
+    # Catalogue de l'inventaire : du plus récent au plus ancien
+    assert ranker.add_catalog([(3, listing("Table")), (2, listing("Chaise")), (1, listing("Lampe"))]) == 3
+    assert ranker.last_id == 3
+    assert not ranker.add_listing(listing("Chaise"), listing_id=2)
+
+
+def test_recorded_listings_are_indexed_under_their_ids():
+    ranker = TagRanker()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        recorded, failed, ignored = loop.create_future(), loop.create_future(), loop.create_future()
+        for future in (recorded, failed, ignored):
+            future.add_done_callback(index_recorded_listings([listing("Lampe"), listing("Chaise")], ranker))
+        recorded.set_result([7, 8])
+        failed.set_exception(ValueError("écriture invalide"))
+        ignored.set_result(None)
+        await asyncio.sleep(0)
+        failed.exception()
+
+    asyncio.run(scenario())
+    assert ranker.document_count == 2
+    assert ranker.last_id == 8
+    assert ranker.vocabulary.lookup(['chaise']).tolist() != [-1]
+
+
+def test_catalog_is_loaded_from_the_inventory(tmp_path):
+    aggregator = DataAggregationEngine()
+    product = asyncio.run(aggregator.aggregate_data(
+        {'detections': [{'class': 'lamp', 'confidence': 0.9, 'bbox': [0, 0, 10, 10]}], 'main_subject': 'lamp'},
+        {'lens_analysis': {'visual_matches': [{'title': 'Lampe laiton', 'price': '40 €'}]}}
+    ))
+
+    async def scenario():
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        await store.start()
+        try:
+            ids = await store.record_listings([product, product], [listing("Lampe laiton"), listing("Chaise")])
+            return ids, await store.catalog()
+        finally:
+            await store.close()
+
+    ids, catalog = asyncio.run(scenario())
+    assert [listing_id for listing_id, _ in catalog] == ids[::-1]
+    assert catalog[-1][1].title == "Lampe laiton"
+
+    ranker = TagRanker()
+    assert ranker.add_catalog(catalog) == 2
+    assert ranker.add_catalog(catalog) == 0
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Tuple
+import importlib
+
+# Outils d'un agent crewai : (nom, attribut du moteur, description). L'attribut
+# peut être un chemin pointé vers un service injecté ('object_detection.detect_objects').
+ToolSpec = Tuple[str, str, str]
+# Profil crewai d'un agent : (rôle, objectif, histoire)
+AgentProfile = Tuple[str, str, str]
+
+
+class LazyModule:
+    """Module importé au premier accès à l'un de ses attributs
+
+    Remplace `import cv2` en tête de module : l'import (et ses centaines de
+    Mo de bibliothèques natives) n'a lieu que si le code s'en sert vraiment.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self) -> str:
+        state = 'importé' if self._module is not None else 'non importé'
+        return f"<module paresseux {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+@lru_cache(maxsize=None)
+def agent_class(name: str, engine: type, tools: Tuple[ToolSpec, ...], profile: AgentProfile) -> type:
+    """Sous-classe crewai d'un moteur d'agent, construite au premier accès
+
+    Le moteur porte toute la logique et s'importe sans crewai ni langchain ;
+    ces derniers ne sont chargés que lorsqu'un crew a besoin de l'agent.
+    """
+    from crewai import Agent
+    try:
+        # crewai récent : n'accepte que ses propres outils
+        from crewai.tools.base_tool import Tool
+    except ImportError:
+        from langchain_core.tools import Tool
+
+    role, goal, backstory = profile
+
+    def __init__(self, *args, **kwargs):
+        # Agent est un modèle pydantic : son __init__ remplace le __dict__ et
+        # refuse les attributs hors de ses champs. L'état du moteur est donc
+        # construit à part, puis recopié sans validation après l'Agent.
+        state = engine.__new__(engine)
+        engine.__init__(state, *args, **kwargs)
+        Agent.__init__(self, role=role, goal=goal, backstory=backstory, tools=[
+            Tool(name=tool_name, func=attrgetter(path)(state), description=description)
+            for tool_name, path, description in tools
+        ])
+        for attribute, value in vars(state).items():
+            object.__setattr__(self, attribute, value)
+
+    return type(name, (engine, Agent), {
+        '__init__': __init__,
+        '__module__': engine.__module__,
+        '__qualname__': name,
+        '__doc__': engine.__doc__
+    })
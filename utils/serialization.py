@@ -0,0 +1,106 @@
+from dataclasses import fields, is_dataclass
+from functools import lru_cache
+from typing import Any, Dict
+import numpy as np
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # MessagePack reste optionnel
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Champs SerpAPI réellement utilisés par les agents en aval
+VISUAL_MATCH_FIELDS = ('title', 'link', 'source', 'price', 'thumbnail',
+                       'category', 'features', 'specifications')
+KNOWLEDGE_GRAPH_FIELDS = ('title', 'subtitle', 'description', 'link')
+
+
+def trim_lens_payload(results: Dict) -> Dict:
+    """Ne conserve que les champs utiles d'une réponse Google Lens"""
+    return {
+        'visual_matches': [
+            {key: match[key] for key in VISUAL_MATCH_FIELDS if key in match}
+            for match in results.get('visual_matches', [])
+        ],
+        'knowledge_graph': _trim_knowledge_graph(results.get('knowledge_graph', {}))
+    }
+
+
+def _trim_knowledge_graph(knowledge_graph):
+    # SerpAPI renvoie parfois une liste d'entités plutôt qu'un objet unique
+    if isinstance(knowledge_graph, list):
+        return [_trim_knowledge_graph(entity) for entity in knowledge_graph]
+    return {key: knowledge_graph[key] for key in KNOWLEDGE_GRAPH_FIELDS if key in knowledge_graph}
+
+
+def _default(obj: Any):
+    """Types non natifs : modèles typés (to_dict), scalaires numpy, ensembles"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type non sérialisable: {type(obj).__name__}")
+
+
+def _msgpack_default(obj: Any):
+    # MessagePack ne connaît pas numpy : passer par des listes Python
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if is_dataclass(obj) and not hasattr(obj, 'to_dict'):
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    return _default(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+@lru_cache(maxsize=None)
+def _response_classes() -> Dict[str, type]:
+    """Classes de réponse HTTP, construites au premier besoin : dumps_json et
+    trim_lens_payload restent utilisables sans importer FastAPI"""
+    from fastapi.responses import Response
+
+    class FastJSONResponse(Response):
+        """Réponse JSON encodée par orjson, tableaux numpy compris"""
+
+        media_type = "application/json"
+
+        def render(self, content: Any) -> bytes:
+            return dumps_json(content)
+
+    class MsgPackResponse(Response):
+        """Réponse MessagePack (nécessite le paquet optionnel msgpack)"""
+
+        media_type = MSGPACK_MEDIA_TYPE
+
+        def render(self, content: Any) -> bytes:
+            return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+    for response_class in (FastJSONResponse, MsgPackResponse):
+        response_class.__module__ = __name__
+    return {'FastJSONResponse': FastJSONResponse, 'MsgPackResponse': MsgPackResponse}
+
+
+def negotiate_response(request, content: Any, status_code: int = 200):
+    """Choisit MessagePack ou JSON selon l'en-tête Accept de la requête"""
+    classes = _response_classes()
+    accept = request.headers.get('accept', '')
+    if msgpack is not None and MSGPACK_MEDIA_TYPE in accept:
+        return classes['MsgPackResponse'](content, status_code=status_code)
+    return classes['FastJSONResponse'](content, status_code=status_code)
+
+
+def __getattr__(name):
+    # PEP 562 : FastJSONResponse et MsgPackResponse importent FastAPI à la demande
+    if name in ('FastJSONResponse', 'MsgPackResponse'):
+        return _response_classes()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")